@@ -1,12 +1,28 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.routes import router as api_router
-from models.database import Base, engine
+from app.scheduler import resume_knowledge_bases
+from models.database import init_db
+from crawler.log import configure_logging
+from ml.loader import warm_up
+from config import ML_WARM_UP
 
-# Inicializar o banco de dados
-Base.metadata.create_all(bind=engine)
+configure_logging()
+
+# Inicializar o banco de dados (criando tabelas e colunas que faltarem)
+init_db()
+
+# Retomar bases interrompidas (ex.: restart do uvicorn com reload=True)
+@asynccontextmanager
+async def lifespan(app):
+    resume_knowledge_bases()
+    # spaCy e o estimador carregam em segundo plano: a API já atende enquanto isso
+    if ML_WARM_UP:
+        warm_up()
+    yield
 
 # Inicializar a aplicação FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Incluir as rotas da API
 app.include_router(api_router)
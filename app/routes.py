@@ -1,16 +1,15 @@
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional
-import threading
-from app.scheduler import knowledge_bases, schedule_task, run_crawler
-from app.state import current_status
+from app.scheduler import knowledge_bases, schedule_task, start_crawl, add_urls_to_running_crawl, fetch_and_estimate, crawl_scheduler
+from app.state import current_status, save_knowledge_base, status_snapshot
+from crawler.search import get_search_index
+from crawler.metrics import registry as metrics_registry
+from ml.predict import predict_pages_batch
+from config import SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE
 import requests
-from bs4 import BeautifulSoup
-from ml.predict import classify_text, predict_pages
-
-# Configurar logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 router = APIRouter()
 
@@ -29,6 +28,13 @@ class PredictRequest(BaseModel):
     url: str
     profundidade: int
 
+class PredictBatchItem(BaseModel):
+    area_atuacao: str
+    profundidade: int
+
+class PredictBatchRequest(BaseModel):
+    consultas: List[PredictBatchItem]
+
 @router.post("/create")
 def create_knowledge_base(request: CreateRequest):
     if request.nome in knowledge_bases:
@@ -41,14 +47,14 @@ def create_knowledge_base(request: CreateRequest):
         'configuracoes': request.configuracoes,
         'status': 'agendado' if request.agendamento else 'em andamento'
     }
+    save_knowledge_base(request.nome, knowledge_bases[request.nome])
 
     if request.agendamento:
         logging.info(f"Agendamento criado para a base '{request.nome}' às {request.agendamento}.")
         schedule_task(request.nome, request.urls, request.profundidade, request.configuracoes, request.agendamento)
     else:
-        thread = threading.Thread(target=run_crawler, args=(request.nome, request.urls, request.profundidade, request.configuracoes))
-        thread.start()
-        logging.info(f"Execução imediata iniciada para a base '{request.nome}'.")
+        start_crawl(request.nome, request.urls, request.profundidade, request.configuracoes)
+        logging.info(f"Execução imediata enfileirada para a base '{request.nome}'.")
 
     return {"message": "Base de conhecimento criada com sucesso"}
 
@@ -58,14 +64,41 @@ def add_urls_to_knowledge_base(request: AddUrlsRequest):
         raise HTTPException(status_code=404, detail="Base de conhecimento não encontrada")
 
     knowledge_bases[request.nome]['urls'].extend(request.urls)
+    save_knowledge_base(request.nome, knowledge_bases[request.nome])
     logging.info(f"Novas URLs adicionadas à base '{request.nome}': {request.urls}")
 
-    # Iniciar o processamento das novas URLs
-    thread = threading.Thread(target=run_crawler, args=(request.nome, request.urls, knowledge_bases[request.nome]['profundidade'], knowledge_bases[request.nome]['configuracoes']))
-    thread.start()
+    # Mesclar na fronteira do crawl em andamento ou iniciar o processamento das novas URLs
+    if not add_urls_to_running_crawl(request.nome, request.urls):
+        start_crawl(request.nome, request.urls, knowledge_bases[request.nome]['profundidade'], knowledge_bases[request.nome]['configuracoes'])
 
     return {"message": "Novas URLs adicionadas e processamento iniciado"}
 
+@router.post("/pause/{nome}")
+def pause_knowledge_base(nome: str):
+    if not crawl_scheduler.pause(nome):
+        raise HTTPException(status_code=409, detail="Base de conhecimento não está na fila nem em andamento")
+    return {"message": "Base de conhecimento pausada"}
+
+@router.post("/resume/{nome}")
+def resume_knowledge_base(nome: str):
+    if not crawl_scheduler.resume(nome):
+        raise HTTPException(status_code=409, detail="Base de conhecimento não está pausada")
+    return {"message": "Base de conhecimento retomada"}
+
+@router.post("/cancel/{nome}")
+def cancel_knowledge_base(nome: str):
+    if not crawl_scheduler.cancel(nome):
+        raise HTTPException(status_code=409, detail="Base de conhecimento não está no escalonador")
+    return {"message": "Base de conhecimento cancelada"}
+
+@router.post("/priority/{nome}")
+def set_knowledge_base_priority(nome: str, prioridade: float):
+    if prioridade <= 0:
+        raise HTTPException(status_code=400, detail="A prioridade deve ser positiva")
+    if not crawl_scheduler.set_priority(nome, prioridade):
+        raise HTTPException(status_code=409, detail="Base de conhecimento não está no escalonador")
+    return {"message": "Prioridade atualizada"}
+
 @router.get("/list")
 def list_knowledge_bases():
     return knowledge_bases
@@ -78,65 +111,62 @@ def get_knowledge_base_details(nome: str):
 
 @router.get("/status")
 def get_crawl_status():
-    # Obter a URL e a profundidade atuais do estado global
-    current_url = current_status.get('current_url')
-    profundidade = current_status.get('depth', 1)  # Usar profundidade padrão de 3 se não estiver definida
-
-    if not current_url:
-        return {"status": "idle", "paginas_extraidas": 0, "paginas_totais": 0}
-
-    # Fazer a requisição para obter o conteúdo da página
-    try:
-        response = requests.get(current_url)
-        response.raise_for_status()
-    except requests.RequestException as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao acessar a URL: {e}")
-
-    # Analisar o conteúdo da página para determinar a área de atuação
-    soup = BeautifulSoup(response.text, 'html.parser')
-    content = soup.get_text()
-
-    # Classificar o conteúdo usando spaCy
-    area_atuacao = classify_text(content)
-
-    # Fazer a previsão usando o modelo treinado
-    try:
-        predicted_pages = predict_pages(area_atuacao, profundidade)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    # Snapshot em memória: a estimativa de páginas é calculada uma vez, no início de cada crawl
+    bases = status_snapshot()
+    if not current_status.get('current_url'):
+        return {"status": "idle", "paginas_extraidas": 0, "paginas_totais": 0, "bases": bases}
 
     return {
         "status": current_status['status'],
         "paginas_extraidas": current_status['pages_extracted'],
-        "paginas_totais": predicted_pages
+        "paginas_totais": current_status['total_pages'],
+        "bases": bases
     }
 
+@router.get("/status/{nome}")
+def get_knowledge_base_status(nome: str):
+    kb_status = status_snapshot(nome)
+    if kb_status is None:
+        raise HTTPException(status_code=404, detail="Base de conhecimento não encontrada")
+    return kb_status
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    # Contadores, histogramas de latência e filas do pipeline no formato de texto do Prometheus
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@router.get("/search")
+def search_pages(q: str, base: Optional[str] = None, pagina: int = Query(1, ge=1),
+                 por_pagina: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE)):
+    # Busca de texto completo nas páginas indexadas durante os crawls, ordenada por relevância (BM25)
+    if base is not None and base not in knowledge_bases:
+        raise HTTPException(status_code=404, detail="Base de conhecimento não encontrada")
+    results = get_search_index().search(q, base=base, page=pagina, per_page=por_pagina)
+    return {"consulta": q, "base": base, "pagina": pagina, "por_pagina": por_pagina, **results}
 
 @router.post("/predict")
 def predict_pages_route(request: PredictRequest):
     url = request.url
     profundidade = request.profundidade
 
-    # Fazer uma requisição para obter o conteúdo da página
+    # Baixar a página, classificar a área de atuação e estimar o total de páginas
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        area_atuacao, predicted_pages = fetch_and_estimate(url, profundidade)
     except requests.RequestException as e:
         raise HTTPException(status_code=400, detail=f"Erro ao acessar a URL: {e}")
-
-    # Analisar o conteúdo da página para determinar a área de atuação
-    soup = BeautifulSoup(response.text, 'html.parser')
-    content = soup.get_text()
-
-    # Classificar o conteúdo usando spaCy
-    area_atuacao = classify_text(content)
-
-    # Fazer a previsão usando o modelo treinado
-    try:
-        predicted_pages = predict_pages(area_atuacao, profundidade)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    
+
     return {"paginas_estimadas": predicted_pages,
             "area_atuacao": area_atuacao,
     }
+
+@router.post("/predict/batch")
+def predict_pages_batch_route(request: PredictBatchRequest):
+    # Estimativa direta para pares (área de atuação, profundidade), sem baixar nem classificar páginas
+    try:
+        predicted_pages = predict_pages_batch((item.area_atuacao, item.profundidade) for item in request.consultas)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"paginas_estimadas": predicted_pages}
@@ -1,43 +1,544 @@
+import itertools
 import logging
+import requests
 import schedule
 import threading
 import time
 from crawler.core import WebCrawler
+from crawler.async_core import AsyncWebCrawler
+from crawler.frontier import PersistentFrontier
+from crawler.distributed import create_shared_frontier, submit_knowledge_base, ingest_pages, start_sitemap_discovery
+from crawler.seen import create_seen_urls
+from crawler.parsers import parse_html
+from crawler.metrics import registry as metrics_registry
+from crawler.search import get_search_index
+from crawler.storage import Storage, PageWriter
+from crawler.dedup import merge_duplicate_reports
+from config import (CRAWLER_ENGINE, ASYNC_MAX_CONCURRENCY, ASYNC_CONNECTIONS_PER_HOST, REQUEST_TIMEOUT, MAX_WORKERS,
+                    CRAWL_WORKER_BUDGET, MAX_ACTIVE_CRAWLS, DEFAULT_CRAWL_PRIORITY, SCHEDULER_POLL_INTERVAL,
+                    DISTRIBUTED_POLL_INTERVAL, SEARCH_INDEX_ENABLED)
 from models.database import engine
 from sqlalchemy.orm import sessionmaker
-from app.state import update_status, current_status
-
-# Configurar logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+from app.state import update_status, save_knowledge_base, load_knowledge_bases
+from ml.predict import classify_text, predict_pages
+from ml.history import append_history
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Variáveis globais para manter o estado da execução atual
-status_lock = threading.Lock()
 knowledge_bases = {}
 
-def run_crawler(nome, urls, profundidade, configuracoes):
-    pages_extracted = 0
+def build_crawler(url, profundidade, configuracoes, frontier=None, nome=None, max_workers=MAX_WORKERS):
+    configuracoes = configuracoes or {}
+    engine = configuracoes.get('engine', CRAWLER_ENGINE)
+    if engine == 'async':
+        return AsyncWebCrawler(base_url=url, depth=profundidade,
+                               max_concurrency=configuracoes.get('max_concurrency', ASYNC_MAX_CONCURRENCY),
+                               connections_per_host=configuracoes.get('connections_per_host', ASYNC_CONNECTIONS_PER_HOST),
+                               configuracoes=configuracoes, frontier=frontier, nome=nome)
+    if engine != 'threads':
+        raise ValueError(f"Motor de crawl '{engine}' não reconhecido")
+    return WebCrawler(base_url=url, depth=profundidade, max_workers=max_workers, configuracoes=configuracoes,
+                      frontier=frontier, nome=nome)
+
+def fetch_and_estimate(url, profundidade):
+    # Baixa a página, classifica a área de atuação e estima o total de páginas
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    area_atuacao = classify_text(parse_html(response.text, url).text)
+    return area_atuacao, float(predict_pages(area_atuacao, profundidade))
+
+def estimate_knowledge_base(nome, url, profundidade):
+    # Calculada uma vez por base, no início do crawl; o /status só lê o valor guardado
+    kb = knowledge_bases.get(nome)
+    if kb is None:
+        return
+    if kb.get('paginas_estimadas') is None or kb.get('profundidade_estimada') != profundidade:
+        try:
+            kb['area_atuacao'], kb['paginas_estimadas'] = fetch_and_estimate(url, profundidade)
+        except (requests.RequestException, ValueError) as e:
+            logging.warning(f"Não foi possível estimar a base '{nome}': {e}")
+            return
+        kb['profundidade_estimada'] = profundidade
+        save_knowledge_base(nome, kb)
+    update_status(total_pages=kb['paginas_estimadas'], area=kb['area_atuacao'], nome=nome)
+
+def record_history(nome, url, profundidade, paginas_extraidas, estimate=None):
+    # Crawl concluído entra no histórico de treino do estimador, com a área classificada no início.
+    # Roda numa thread própria: espera a estimativa em segundo plano terminar para não gravar a área vazia
+    if estimate is not None:
+        estimate.join()
+    area_atuacao = knowledge_bases.get(nome, {}).get('area_atuacao')
+    append_history(url, profundidade, paginas_extraidas, area_atuacao)
+
+# Uma base de conhecimento sob o escalonador: na fila, em andamento, pausada ou sendo encerrada
+class CrawlJob:
+    _order = itertools.count()
+
+    def __init__(self, nome, urls, profundidade, configuracoes, prioridade):
+        self.nome = nome
+        self.urls = list(urls)
+        self.profundidade = profundidade
+        self.configuracoes = configuracoes or {}
+        self.prioridade = prioridade
+        self.state = 'na fila'
+        self.crawler = None
+        self.frontier = None
+        self.active_workers = 0  # Workers em uso; um crawl async conta a concorrência que recebeu
+        self.order = next(self._order)  # FIFO entre bases de mesma prioridade
+        self.done = threading.Event()
+        self.estimate = None  # Thread da estimativa de páginas/área, iniciada com o crawl
+        self.totals = {}  # Contadores somados dos trechos de um crawl pausado e retomado
+
+    def add_segment(self, crawler):
+        # Soma os contadores do crawler que terminou aos dos trechos anteriores e devolve os totais
+        segment = {'pages_extracted': crawler.get_total_links_extracted(), 'fetches_evitados': crawler.get_fetches_saved(),
+                   'paginas_inalteradas': crawler.get_pages_unchanged(), 'paginas_indexadas': crawler.writer.pages_indexed}
+        for key, value in segment.items():
+            self.totals[key] = self.totals.get(key, 0) + value
+        self.totals['duplicados'] = merge_duplicate_reports(self.totals.get('duplicados'), crawler.get_duplicate_report())
+        sitemaps = self.totals.get('sitemaps', {})
+        self.totals['sitemaps'] = {key: sitemaps.get(key, 0) + value for key, value in crawler.get_sitemap_report().items()}
+        return dict(self.totals)
+
+    def start_estimate(self, url):
+        self.estimate = threading.Thread(target=estimate_knowledge_base, args=(self.nome, url, self.profundidade), daemon=True)
+        self.estimate.start()
+
+    @property
+    def exclusive(self):
+        # O motor async roda o próprio event loop numa única thread, mas abre até max_concurrency
+        # conexões: essa concorrência é descontada do orçamento enquanto ele roda
+        return isinstance(self.crawler, AsyncWebCrawler)
+
+
+# Escalonador central: um orçamento fixo de threads (CRAWL_WORKER_BUDGET) é dividido entre as
+# bases ativas na proporção das prioridades. Cada worker pega a próxima URL da base mais atrasada
+# em relação à sua fatia (workers ocupados / prioridade), então as sementes de uma base são
+# crawleadas em paralelo e uma base sozinha pode usar o orçamento inteiro. No máximo
+# MAX_ACTIVE_CRAWLS bases ficam ativas; as demais (inclusive as agendadas) aguardam na fila.
+class CrawlScheduler:
+    def __init__(self, worker_budget=CRAWL_WORKER_BUDGET, max_active=MAX_ACTIVE_CRAWLS):
+        self.worker_budget = worker_budget
+        self.max_active = max_active
+        self.jobs = {}
+        self.condition = threading.Condition()
+        self.threads = []
+
+    def start(self):
+        with self.condition:
+            if self.threads:
+                return
+            self.threads = [threading.Thread(target=self._worker, name=f"crawl-worker-{i}", daemon=True)
+                            for i in range(self.worker_budget)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, nome, urls, profundidade, configuracoes, paused=False):
+        # Enfileira a base; se ela já está no escalonador, as URLs são mescladas à sua fronteira
+        seed = None
+        with self.condition:
+            job = self.jobs.get(nome)
+            if job is not None:
+                seed = self._add_urls(job, urls)
+            else:
+                prioridade = (configuracoes or {}).get('prioridade', DEFAULT_CRAWL_PRIORITY)
+                job = CrawlJob(nome, urls, profundidade, configuracoes, prioridade)
+                self.jobs[nome] = job
+                if paused:
+                    job.state = 'pausado'
+                self._set_status(job)
+            self.condition.notify_all()
+        if seed is not None:
+            seed()
+        self.start()
+        return job
+
+    def _add_urls(self, job, urls):
+        # Chamado com o lock. Com o crawl em andamento, devolve a função que semeia as URLs, chamada
+        # depois de soltar o lock: add_seed pode baixar o robots.txt de um host novo
+        if job.crawler is not None and job.state == 'em andamento':
+            # A fronteira não termina (nem conclui uma pausa) antes de as sementes entrarem nela
+            job.frontier.hold()
+            return lambda crawler=job.crawler: self._seed(crawler, urls)
+        job.urls.extend(url for url in urls if url not in job.urls)
+        return None
+
+    def _seed(self, crawler, urls):
+        try:
+            for url in urls:
+                crawler.add_seed(url)
+        finally:
+            crawler.frontier.task_done()
+            with self.condition:
+                self.condition.notify_all()
+
+    def add_urls(self, nome, urls):
+        # Retorna False se a base não está no escalonador
+        with self.condition:
+            job = self.jobs.get(nome)
+            if job is None:
+                return False
+            seed = self._add_urls(job, urls)
+            self.condition.notify_all()
+        if seed is not None:
+            seed()
+        return True
+
+    def pause(self, nome):
+        with self.condition:
+            job = self.jobs.get(nome)
+            if job is None or job.state not in ('na fila', 'iniciando', 'em andamento'):
+                return False
+            job.state = 'pausado' if job.crawler is None and job.state == 'na fila' else 'pausando'
+            if job.crawler is not None:
+                job.crawler.stop_requested = True
+            self._set_status(job)
+            self.condition.notify_all()
+            return True
+
+    def resume(self, nome):
+        with self.condition:
+            job = self.jobs.get(nome)
+            if job is None or job.state != 'pausado':
+                return False
+            job.state = 'na fila'
+            self._set_status(job)
+            self.condition.notify_all()
+            return True
+
+    def cancel(self, nome):
+        with self.condition:
+            job = self.jobs.get(nome)
+            if job is None or job.state in ('cancelando', 'finalizando'):
+                return False
+            if job.crawler is None and job.state in ('na fila', 'pausado'):
+                del self.jobs[nome]
+                job.state = 'cancelado'
+                self._set_status(job)
+                job.done.set()
+            else:
+                job.state = 'cancelando'
+                if job.crawler is not None:
+                    job.crawler.stop_requested = True
+                self._set_status(job)
+            self.condition.notify_all()
+            return True
+
+    def set_priority(self, nome, prioridade):
+        with self.condition:
+            job = self.jobs.get(nome)
+            if job is None:
+                return False
+            job.prioridade = prioridade
+            self.condition.notify_all()
+            return True
+
+    def snapshot(self):
+        with self.condition:
+            return {nome: {'status': job.state, 'prioridade': job.prioridade, 'workers': job.active_workers}
+                    for nome, job in self.jobs.items()}
+
+    def queue_depths(self):
+        # Filas do pipeline de cada base ativa, lidas na coleta de /metrics
+        with self.condition:
+            crawlers = [(nome, job.crawler) for nome, job in self.jobs.items() if job.crawler is not None]
+        depths = {}
+        for nome, crawler in crawlers:
+            depths[(nome, 'frontier')] = len(crawler.frontier)
+            depths[(nome, 'in_flight')] = crawler.frontier.in_flight
+            depths[(nome, 'write')] = crawler.writer.buffer.qsize()
+            if crawler.parse_stage is not None:
+                depths[(nome, 'parse')] = crawler.parse_stage.queue_depth()
+        return depths
+
+    def busy_workers(self):
+        with self.condition:
+            return {(nome,): job.active_workers for nome, job in self.jobs.items()}
+
+    def utilization(self):
+        with self.condition:
+            busy = sum(job.active_workers for job in self.jobs.values())
+        return {(): busy / self.worker_budget}
 
-    # Atualizar estado para 'em andamento'
-    with status_lock:
-        update_status(status='em andamento', total_pages=len(urls), depth=profundidade)
+    def _set_status(self, job):
+        update_status(status=job.state, nome=job.nome)
+        if job.nome in knowledge_bases:
+            knowledge_bases[job.nome]['status'] = job.state
+            save_knowledge_base(job.nome, knowledge_bases[job.nome])
 
-    for url in urls:
-        update_status(current_url=url)
-        crawler = WebCrawler(base_url=url, depth=profundidade)
-        crawler.crawl()
-        pages_extracted = crawler.get_total_links_extracted()
-        update_status(pages_extracted=pages_extracted)
+    def _worker(self):
+        while True:
+            with self.condition:
+                action = self._next_action()
+                if action is None:
+                    self.condition.wait(self._idle_wait())
+                    continue
+            action()
+
+    def _idle_wait(self):
+        waits = [job.frontier.next_ready_in() for job in self.jobs.values()
+                 if job.state == 'em andamento' and not job.exclusive]
+        return min([SCHEDULER_POLL_INTERVAL] + [wait for wait in waits if wait is not None])
+
+    def _next_action(self):
+        # Chamado com o lock: encerra bases terminadas, ativa bases da fila ou pega a próxima URL
+        for job in self.jobs.values():
+            if job.crawler is None or job.active_workers:
+                continue
+            if job.state == 'em andamento' and job.frontier.finished:
+                return self._claim(job, 'finalizando', self._finish, 'concluído')
+            if job.state in ('pausando', 'cancelando') and job.frontier.in_flight == 0:
+                outcome = 'pausado' if job.state == 'pausando' else 'cancelado'
+                return self._claim(job, 'finalizando', self._finish, outcome)
+
+        active = [job for job in self.jobs.values() if job.crawler is not None or job.state == 'iniciando']
+        queued = [job for job in self.jobs.values() if job.state == 'na fila']
+        if queued and len(active) < self.max_active:
+            job = min(queued, key=lambda job: (-job.prioridade, job.order))
+            return self._claim(job, 'iniciando', self._activate)
+
+        free = self.worker_budget - sum(job.active_workers for job in self.jobs.values())
+        if free <= 0:
+            return None
+        running = [job for job in self.jobs.values() if job.state == 'em andamento']
+        running.sort(key=lambda job: ((job.active_workers + 1) / max(job.prioridade, 1e-9), job.order))
+        for job in running:
+            if job.exclusive:
+                if not job.active_workers:
+                    # A concorrência fica limitada ao que resta do orçamento quando o crawl começa
+                    job.crawler.max_concurrency = min(job.crawler.max_concurrency, free)
+                    job.active_workers += job.crawler.max_concurrency
+                    return lambda job=job: self._run_exclusive(job)
+                continue
+            item = job.frontier.get_nowait()
+            if item is not None:
+                job.active_workers += 1
+                return lambda job=job, item=item: self._process(job, item)
+        return None
+
+    def _claim(self, job, state, action, *args):
+        job.state = state
+        job.active_workers += 1
+        return lambda: action(job, *args)
+
+    def _release(self, job, workers=1):
+        with self.condition:
+            job.active_workers -= workers
+            self.condition.notify_all()
+
+    def _process(self, job, item):
+        try:
+            job.crawler.process_item(*item)
+        finally:
+            self._release(job)
+
+    def _run_exclusive(self, job):
+        try:
+            job.crawler.crawl()
+        except Exception as e:
+            logging.error(f"Crawl da base '{job.nome}' falhou: {e}")
+        finally:
+            self._release(job, job.crawler.max_concurrency)
+
+    def _activate(self, job):
+        nome = job.nome
+        with self.condition:
+            urls = list(job.urls)  # add_urls pode mesclar URLs enquanto a base inicia
+        try:
+            update_status(status='em andamento', depth=job.profundidade, current_url=urls[0], pages_extracted=0, nome=nome)
+            # A estimativa roda em paralelo para não atrasar o início do crawl
+            job.start_estimate(urls[0])
+
+            # A fronteira persistida retoma as URLs pendentes de uma execução interrompida ou pausada
+            frontier = PersistentFrontier(nome, job.profundidade, seen=create_seen_urls(job.configuracoes))
+            crawler = build_crawler(urls[0], job.profundidade, job.configuracoes, frontier=frontier,
+                                    nome=nome, max_workers=self.worker_budget)
+            for url in urls[1:]:
+                crawler.add_seed(url)
+            if not isinstance(crawler, AsyncWebCrawler):
+                crawler.writer.start()
+                crawler.start_sitemap_discovery()
+        except Exception as e:
+            logging.error(f"Não foi possível iniciar a base '{nome}': {e}")
+            with self.condition:
+                del self.jobs[nome]
+                job.state = 'erro'
+                job.active_workers -= 1
+                self._set_status(job)
+                job.done.set()
+                self.condition.notify_all()
+            return
+
+        with self.condition:
+            job.crawler, job.frontier = crawler, frontier
+            # job.urls passa a guardar só a primeira semente e as URLs que ainda não estão na fronteira
+            added, job.urls = job.urls[len(urls):], urls[:1]
+            seed = None
+            if job.state == 'iniciando':
+                job.state = 'em andamento'
+                self._set_status(job)
+                if added:
+                    seed = self._add_urls(job, added)
+            else:
+                job.urls.extend(added)
+                crawler.stop_requested = True  # Pausada ou cancelada enquanto iniciava
+            job.active_workers -= 1
+            self.condition.notify_all()
+        if seed is not None:
+            seed()
+
+    def _finish(self, job, outcome):
+        nome, crawler, frontier = job.nome, job.crawler, job.frontier
+        try:
+            crawler.save_processed_urls()
+            if outcome != 'pausado':
+                # Pausada, a fronteira persistida guarda as URLs pendentes para a retomada
+                frontier.clear()
+            frontier.close()
+        except Exception as e:
+            logging.error(f"Falha ao encerrar a base '{nome}': {e}")
+
+        # Os totais cobrem todos os trechos do crawl, não só o do crawler da última retomada
+        totals = job.add_segment(crawler)
+        pages_extracted = totals['pages_extracted']
+        with self.condition:
+            job.crawler = job.frontier = None
+            job.active_workers -= 1
+            job.state = outcome
+            if outcome != 'pausado':
+                # Pausada, reinicia da fronteira persistida ao retomar; job.urls guarda as URLs
+                # recebidas por add_urls durante a pausa, que ainda não estão nela
+                del self.jobs[nome]
+            update_status(status=outcome, pages_extracted=pages_extracted, nome=nome)
+            self.condition.notify_all()
+
+        if nome in knowledge_bases:
+            knowledge_bases[nome]['status'] = outcome
+            knowledge_bases[nome]['fetches_evitados'] = totals['fetches_evitados']
+            knowledge_bases[nome]['vazao_estagios'] = crawler.get_stage_stats()
+            knowledge_bases[nome]['paginas_inalteradas'] = totals['paginas_inalteradas']
+            knowledge_bases[nome]['duplicados'] = totals['duplicados']
+            knowledge_bases[nome]['sitemaps'] = totals['sitemaps']
+            knowledge_bases[nome]['paginas_indexadas'] = totals['paginas_indexadas']
+            save_knowledge_base(nome, knowledge_bases[nome])
+        if outcome == 'concluído':
+            threading.Thread(target=record_history, args=(nome, job.urls[0], job.profundidade, pages_extracted, job.estimate),
+                             daemon=True).start()
+        logging.info(f"Execução da base '{nome}' {outcome}. Total de páginas extraídas: {pages_extracted}. "
+                     f"Fetches evitados pela canonicalização: {totals['fetches_evitados']}.")
+        if outcome != 'pausado':
+            job.done.set()
+
+
+crawl_scheduler = CrawlScheduler()
+metrics_registry.gauge('crawler_queue_depth', 'Items waiting per knowledge base and pipeline queue', ('base', 'queue'),
+                       crawl_scheduler.queue_depths)
+metrics_registry.gauge('crawler_workers_busy', 'Crawl workers busy per knowledge base', ('base',),
+                       crawl_scheduler.busy_workers)
+metrics_registry.gauge('crawler_worker_utilization', 'Busy share of the crawl worker budget', (),
+                       crawl_scheduler.utilization)
+
+# Bases em modo distribuído acompanhadas por este coordenador
+distributed_jobs = {}
+distributed_lock = threading.Lock()
+
+def is_distributed(configuracoes):
+    return (configuracoes or {}).get('modo') == 'distribuido'
+
+def monitor_distributed_crawl(job, frontier):
+    # Os workers (crawler/distributed.py) fazem o crawl; aqui lemos os sitemaps das sementes,
+    # acompanhamos o progresso e gravamos no storage e no índice de busca deste processo as páginas
+    # que eles entregam
+    nome = job.nome
+    search_index = get_search_index() if job.configuracoes.get('search_index', SEARCH_INDEX_ENABLED) else None
+    writer = PageWriter(Storage(), search_index=search_index, base=nome).start()
+    try:
+        sitemaps = start_sitemap_discovery(frontier, nome)
+        while True:
+            ingest_pages(frontier, nome, writer)
+            progress = frontier.progress(nome)
+            update_status(pages_extracted=progress['done'], nome=nome)
+            with distributed_lock:
+                # A base só termina depois que os sitemaps foram lidos e as URLs deles, baixadas
+                if frontier.finished(nome) and (sitemaps is None or sitemaps.frontier.in_flight == 0):
+                    # complete() entrega as páginas junto com a URL: terminada a fronteira, nada mais chega
+                    ingest_pages(frontier, nome, writer)
+                    duplicados = frontier.near_duplicate_report(nome)
+                    del distributed_jobs[nome]
+                    frontier.clear(nome)
+                    break
+            time.sleep(DISTRIBUTED_POLL_INTERVAL)
+    finally:
+        writer.close()
+
+    job.state = 'concluído'
+    update_status(status='concluído', pages_extracted=progress['done'], nome=nome)
+    if nome in knowledge_bases:
+        knowledge_bases[nome]['status'] = 'concluído'
+        knowledge_bases[nome]['duplicados'] = duplicados
+        knowledge_bases[nome]['paginas_indexadas'] = writer.pages_indexed
+        if sitemaps is not None:
+            knowledge_bases[nome]['sitemaps'] = sitemaps.get_sitemap_report()
+            knowledge_bases[nome]['paginas_inalteradas'] = sitemaps.get_pages_unchanged()
+        save_knowledge_base(nome, knowledge_bases[nome])
+    record_history(nome, job.urls[0], job.profundidade, progress['done'], job.estimate)
+    logging.info(f"Execução distribuída da base '{nome}' concluída. Total de páginas extraídas: {progress['done']}.")
+    job.done.set()
+
+def start_distributed_crawl(nome, urls, profundidade, configuracoes):
+    # Coordenador: publica as sementes na fronteira compartilhada, de onde os workers arrendam URLs
+    frontier = create_shared_frontier()
+    with distributed_lock:
+        submit_knowledge_base(frontier, nome, urls, profundidade, configuracoes)
+        job = distributed_jobs.get(nome)
+        if job is not None:
+            return job
+        job = distributed_jobs[nome] = CrawlJob(nome, urls, profundidade, configuracoes, DEFAULT_CRAWL_PRIORITY)
+    job.state = 'em andamento'
+    update_status(status='em andamento', depth=profundidade, current_url=urls[0], pages_extracted=0, nome=nome)
+    if nome in knowledge_bases:
+        knowledge_bases[nome]['status'] = 'em andamento'
+        save_knowledge_base(nome, knowledge_bases[nome])
+    job.start_estimate(urls[0])
+    threading.Thread(target=monitor_distributed_crawl, args=(job, frontier), daemon=True).start()
+    return job
+
+def add_urls_to_running_crawl(nome, urls):
+    # Mescla as URLs na base que já está no escalonador; retorna False se ela não está
+    with distributed_lock:
+        job = distributed_jobs.get(nome)
+    if job is not None:
+        start_distributed_crawl(nome, urls, job.profundidade, job.configuracoes)
+        return True
+    return crawl_scheduler.add_urls(nome, urls)
+
+def start_crawl(nome, urls, profundidade, configuracoes):
+    if is_distributed(configuracoes):
+        return start_distributed_crawl(nome, urls, profundidade, configuracoes)
+    return crawl_scheduler.submit(nome, urls, profundidade, configuracoes)
+
+def run_crawler(nome, urls, profundidade, configuracoes):
+    # Enfileira a base no escalonador central e espera o crawl terminar
+    start_crawl(nome, urls, profundidade, configuracoes).done.wait()
 
-    update_status(status='concluído')
-    knowledge_bases[nome]['status'] = current_status['status']
-    logging.info(f"Execução da base '{nome}' concluída. Total de páginas extraídas: {pages_extracted}.")
+def resume_knowledge_bases():
+    # Recarrega as bases persistidas e retoma crawls interrompidos, pausas e agendamentos pendentes
+    knowledge_bases.update(load_knowledge_bases())
+    for nome, kb in knowledge_bases.items():
+        if kb['status'] == 'agendado':
+            schedule_task(nome, kb['urls'], kb['profundidade'], kb['configuracoes'], kb['agendamento'])
+        elif kb['status'] in ('em andamento', 'na fila'):
+            logging.info(f"Retomando a base '{nome}' de onde parou.")
+            start_crawl(nome, kb['urls'], kb['profundidade'], kb['configuracoes'])
+        elif kb['status'] in ('pausado', 'pausando'):
+            crawl_scheduler.submit(nome, kb['urls'], kb['profundidade'], kb['configuracoes'], paused=True)
 
 def schedule_task(nome, urls, profundidade, configuracoes, agendamento):
     def task():
-        logging.info(f"Execução agendada para a base '{nome}' iniciada.")
-        run_crawler(nome, urls, profundidade, configuracoes)
+        # A execução entra na fila do escalonador central em vez de rodar nesta thread
+        logging.info(f"Execução agendada para a base '{nome}' enfileirada.")
+        start_crawl(nome, urls, profundidade, configuracoes)
         # Cancelar a tarefa após a execução
         schedule.cancel_job(job)
     job = schedule.every().day.at(agendamento).do(task)
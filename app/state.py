@@ -1,3 +1,10 @@
+import json
+import sqlite3
+import threading
+from contextlib import closing
+
+from config import CRAWL_STATE_PATH
+
 current_status = {
     'status': 'idle',
     'pages_extracted': 0,
@@ -6,16 +13,67 @@ current_status = {
     'depth': 0
 }
 
-def update_status(status=None, pages_extracted=None, total_pages=None, current_url=None, depth=None):
-    global current_status
-    if status is not None:
-        current_status['status'] = status
-    if pages_extracted is not None:
-        current_status['pages_extracted'] = pages_extracted
-    if total_pages is not None:
-        current_status['total_pages'] = total_pages
-    if current_url is not None:
-        current_status['current_url'] = current_url
-    if depth is not None:
-        current_status['depth'] = depth
-        
\ No newline at end of file
+# Progresso por base de conhecimento: os workers atualizam a cada página e o /status só
+# copia estes dicionários, sem I/O
+knowledge_base_status = {}
+progress_lock = threading.Lock()
+
+def update_status(status=None, pages_extracted=None, total_pages=None, current_url=None, depth=None, area=None, nome=None):
+    with progress_lock:
+        if status is not None:
+            current_status['status'] = status
+        if pages_extracted is not None:
+            current_status['pages_extracted'] = pages_extracted
+        if total_pages is not None:
+            current_status['total_pages'] = total_pages
+        if current_url is not None:
+            current_status['current_url'] = current_url
+        if depth is not None:
+            current_status['depth'] = depth
+        if nome is not None:
+            kb_status = knowledge_base_status.setdefault(nome, {
+                'status': 'idle',
+                'paginas_extraidas': 0,
+                'paginas_totais': None,
+                'area_atuacao': None,
+                'url_atual': None,
+                'profundidade': 0
+            })
+            if status is not None:
+                kb_status['status'] = status
+            if pages_extracted is not None:
+                kb_status['paginas_extraidas'] = pages_extracted
+            if total_pages is not None:
+                kb_status['paginas_totais'] = total_pages
+            if area is not None:
+                kb_status['area_atuacao'] = area
+            if current_url is not None:
+                kb_status['url_atual'] = current_url
+            if depth is not None:
+                kb_status['profundidade'] = depth
+
+def status_snapshot(nome=None):
+    with progress_lock:
+        if nome is not None:
+            kb_status = knowledge_base_status.get(nome)
+            return dict(kb_status) if kb_status is not None else None
+        return {nome: dict(kb_status) for nome, kb_status in knowledge_base_status.items()}
+
+
+# Registro das bases de conhecimento persistido no mesmo SQLite da fronteira, para que um
+# restart (uvicorn com reload=True) consiga retomar os crawls interrompidos
+registry_lock = threading.Lock()
+
+def _connect_registry():
+    conn = sqlite3.connect(CRAWL_STATE_PATH, timeout=30)
+    conn.execute("CREATE TABLE IF NOT EXISTS knowledge_bases (nome TEXT PRIMARY KEY, data TEXT NOT NULL)")
+    return conn
+
+def save_knowledge_base(nome, data):
+    with registry_lock, closing(_connect_registry()) as conn:
+        conn.execute("INSERT OR REPLACE INTO knowledge_bases (nome, data) VALUES (?, ?)", (nome, json.dumps(data)))
+        conn.commit()
+
+def load_knowledge_bases():
+    with registry_lock, closing(_connect_registry()) as conn:
+        return {nome: json.loads(data) for nome, data in conn.execute("SELECT nome, data FROM knowledge_bases")}
@@ -0,0 +1,183 @@
+# Benchmark de crawl de ponta a ponta: sobe o site sintético (benchmarks/synthetic_site.py) num
+# processo à parte, roda o WebCrawler (ou o AsyncWebCrawler) com Storage, BlobStore e PageWriter num
+# diretório temporário e mede páginas/s, latência de fetch (p50/p99), pico de RSS e taxa de gravação.
+# Cada execução é salva em JSON em --output, para comparar com --compare.
+#
+#   python -m benchmarks.bench_crawl --pages 20000 --fan-out 20 --latency 0.02 --errors 503:0.01 --label antes
+#   python -m benchmarks.bench_crawl --pages 20000 --fan-out 20 --latency 0.02 --errors 503:0.01 --compare benchmarks/results/<arquivo>.json
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.synthetic_site import SyntheticSite, serve, add_site_arguments, spec_from_args
+from crawler.async_core import AsyncWebCrawler
+from crawler.blobs import BlobStore
+from crawler.core import WebCrawler
+from crawler.log import configure_logging
+from crawler.metrics import DB_WRITE_SECONDS
+from crawler.storage import Storage
+from models.database import Base, set_sqlite_pragmas
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+# Métricas comparadas entre execuções e se "maior é melhor"
+COMPARED = [('pages_per_second', True), ('fetch_p50_ms', False), ('fetch_p99_ms', False),
+            ('peak_rss_mb', False), ('db_pages_per_second', True)]
+
+
+def make_storage(tmp):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'storage.db')}")
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    return Storage(sessionmaker(autocommit=False, autoflush=False, bind=engine)(), BlobStore(os.path.join(tmp, 'blobs')))
+
+
+def timed_crawler(crawler_cls):
+    # Guarda a duração de cada fetch (do envio ao fim da leitura do corpo, ou ao erro)
+    class TimedCrawler(crawler_cls):
+        def record_fetch(self, url, status_code, timings, start, headers_at, read_at, body_bytes):
+            self.fetch_latencies.append(time.monotonic() - start)
+            super().record_fetch(url, status_code, timings, start, headers_at, read_at, body_bytes)
+
+    return TimedCrawler
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_mb():
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def start_site(spec):
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(spec, 0, ready), daemon=True)
+    process.start()
+    return process, ready.get(timeout=30)
+
+
+def run_benchmark(spec, engine='threads', workers=10, depth=None, parse_processes=0, sitemaps=True):
+    site = SyntheticSite(spec)
+    depth = site.max_level() if depth is None else depth
+    process, port = start_site(spec)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            configuracoes = {'parse_processes': parse_processes, 'incremental': False, 'sitemaps': sitemaps}
+            base_url = f"http://127.0.0.1:{port}"
+            if engine == 'async':
+                crawler = timed_crawler(AsyncWebCrawler)(base_url, depth, max_concurrency=workers, configuracoes=configuracoes)
+            else:
+                crawler = timed_crawler(WebCrawler)(base_url, depth, max_workers=workers, configuracoes=configuracoes)
+            crawler.fetch_latencies = []
+            # Banco e blobs temporários, no lugar do storage.db e do ./blobs padrão
+            crawler.storage = crawler.writer.storage = make_storage(tmp)
+
+            rss_before = peak_rss_mb()
+            write_seconds_before = DB_WRITE_SECONDS.sum('', 'pages')
+            start = time.perf_counter()
+            crawler.crawl()
+            elapsed = time.perf_counter() - start
+            write_seconds = DB_WRITE_SECONDS.sum('', 'pages') - write_seconds_before
+    finally:
+        process.terminate()
+        process.join()
+
+    latencies = crawler.fetch_latencies
+    pages_written = crawler.writer.pages_written
+    return {
+        'seconds': round(elapsed, 3),
+        'pages_fetched': len(latencies),
+        'pages_expected': site.expected_fetches(depth, sitemaps),
+        'pages_written': pages_written,
+        'pages_per_second': round(len(latencies) / elapsed, 1),
+        'fetch_p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'fetch_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'rss_growth_mb': round(peak_rss_mb() - rss_before, 1),
+        'db_pages_per_second': round(pages_written / write_seconds, 1) if write_seconds else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def save_result(result, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    name = f"{result['timestamp'].replace(':', '')}-{result['label'] or 'run'}.json"
+    path = os.path.join(output_dir, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def compare(result, previous_path):
+    with open(previous_path, encoding='utf-8') as f:
+        previous = json.load(f)
+    if previous['site'] != result['site'] or previous['crawler'] != result['crawler']:
+        print("Atenção: cenário diferente do da execução anterior")
+    print(f"\nComparação com {os.path.basename(previous_path)} ({previous.get('commit') or '?'}):")
+    for metric, higher_is_better in COMPARED:
+        before, after = previous['results'].get(metric), result['results'].get(metric)
+        if not before or after is None:
+            continue
+        change = (after - before) / before * 100
+        better = change > 0 if higher_is_better else change < 0
+        print(f"  {metric:20} {before:10} -> {after:10} ({change:+.1f}%{', melhor' if better and change else ''})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_site_arguments(parser)
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads')
+    parser.add_argument('--workers', type=int, default=10, help="Threads (ou requisições em voo no motor async)")
+    parser.add_argument('--depth', type=int, help="Profundidade do crawl (padrão: a árvore inteira)")
+    parser.add_argument('--parse-processes', type=int, default=0, help="Processos de parse (0 = nas threads de I/O)")
+    parser.add_argument('--no-sitemaps', action='store_true', help="Não lê os sitemaps do site")
+    parser.add_argument('--label', default='')
+    parser.add_argument('--output', default=RESULTS_DIR, help="Diretório onde o resultado é salvo")
+    parser.add_argument('--no-save', action='store_true')
+    parser.add_argument('--compare', help="Resultado salvo de uma execução anterior")
+    parser.add_argument('--log-level', default='ERROR')
+    args = parser.parse_args()
+
+    configure_logging(args.log_level, log_file=None)
+
+    spec = spec_from_args(args)
+    crawler_settings = {'engine': args.engine, 'workers': args.workers, 'depth': args.depth,
+                        'parse_processes': args.parse_processes, 'sitemaps': not args.no_sitemaps}
+    results = run_benchmark(spec, args.engine, args.workers, args.depth, args.parse_processes, not args.no_sitemaps)
+    result = {'timestamp': datetime.now().isoformat(timespec='seconds'), 'label': args.label, 'commit': git_commit(),
+              'site': spec.to_dict(), 'crawler': crawler_settings, 'results': results}
+
+    for metric, value in results.items():
+        print(f"{metric:20} {value}")
+    if not args.no_save:
+        print(f"\nResultado salvo em {save_result(result, args.output)}")
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Benchmark dos backends de parse (crawler/parsers.py) sobre um corpus de páginas salvas:
+# por padrão as páginas do storage.db, ou os .html de um diretório (--corpus).
+#
+#   python -m benchmarks.bench_parsers --db storage.db
+#   python -m benchmarks.bench_parsers --corpus ./saved_pages --repeat 5
+import argparse
+import glob
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import BLOB_STORE_PATH
+from crawler.blobs import BlobStore
+from crawler.parsers import PARSER_BACKENDS, parse_html
+
+
+def load_corpus(corpus_dir, db_path, blobs_path=BLOB_STORE_PATH):
+    if corpus_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(corpus_dir, '**', '*.htm*'), recursive=True)):
+            with open(path, encoding='utf-8', errors='replace') as f:
+                pages.append((f"file://{os.path.abspath(path)}", f.read()))
+        return pages
+    # Corpos inline (bancos antigos) ou no BlobStore, pelo content_hash
+    blobs = BlobStore(blobs_path)
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute("SELECT url, content, content_hash FROM pages WHERE content IS NOT NULL OR content_hash IS NOT NULL")
+        pages = [(url, content if content is not None else blobs.read(content_hash)) for url, content, content_hash in rows
+                 if content is not None or blobs.exists(content_hash)]
+    return [(url, html) for url, html in pages if html]
+
+
+def bench(backend, pages, repeat):
+    total_bytes = sum(len(html) for _, html in pages) * repeat
+    total_links = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for url, html in pages:
+            total_links += len(parse_html(html, url, backend).links)
+    elapsed = time.perf_counter() - start
+    print(f"{backend:12} {len(pages) * repeat / elapsed:10.0f} páginas/s {total_bytes / elapsed / 1e6:8.1f} MB/s "
+          f"links={total_links}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', help="Diretório com páginas .html salvas")
+    parser.add_argument('--db', default='storage.db', help="Banco com a tabela pages (usado se --corpus não for informado)")
+    parser.add_argument('--blobs', default=BLOB_STORE_PATH, help="Diretório do BlobStore com os corpos das páginas")
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--backends', nargs='*', default=list(PARSER_BACKENDS))
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, args.db, args.blobs)
+    if not pages:
+        sys.exit("Corpus vazio")
+    print(f"{len(pages)} páginas, {sum(len(html) for _, html in pages) / 1e6:.1f} MB")
+    for backend in args.backends:
+        try:
+            bench(backend, pages, args.repeat)
+        except ImportError as e:
+            print(f"{backend:12} indisponível ({e})")
+
+
+if __name__ == "__main__":
+    main()
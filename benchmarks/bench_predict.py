@@ -0,0 +1,62 @@
+# Benchmark do estimador de páginas (ml/estimator.py): o caminho original, que monta um
+# DataFrame por previsão e chama model.predict, comparado ao PagePredictor (uma previsão e lote).
+#
+#   python -m benchmarks.bench_predict --queries 20000
+import argparse
+import os
+import random
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import PAGE_MODEL_PATH, MODEL_COLUMNS_PATH
+from ml.estimator import PagePredictor, SUPPORTED_AREAS
+
+
+def dataframe_predict(model, model_columns, area_atuacao, profundidade):
+    # Caminho anterior do ml.predict.predict_pages, reproduzido para comparação
+    df = pd.DataFrame({'profundidade': [profundidade], 'media_paginas_extraidas': [0]})
+    for area in SUPPORTED_AREAS:
+        df[f'area_atuacao_{area}'] = 0
+    df[f'area_atuacao_{area_atuacao}'] = 1
+    for col in model_columns:
+        if col not in df.columns:
+            df[col] = 0
+    return model.predict(df[model_columns])[0]
+
+
+def bench(name, function, queries):
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    print(f"{name:22} {queries / elapsed:12.0f} previsões/s {elapsed / queries * 1e6:10.2f} µs/previsão")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--dataframe-queries', type=int, default=500, help="Previsões no caminho com DataFrame (lento)")
+    args = parser.parse_args()
+
+    model = joblib.load(PAGE_MODEL_PATH)
+    model_columns = joblib.load(MODEL_COLUMNS_PATH)
+    predictor = PagePredictor.from_model(model, model_columns)
+    rng = random.Random(42)
+    pairs = [(rng.choice(SUPPORTED_AREAS), rng.randint(1, 5)) for _ in range(args.queries)]
+    areas, depths = zip(*pairs)
+
+    legacy = bench("dataframe", lambda: [dataframe_predict(model, model_columns, area, depth)
+                                          for area, depth in pairs[:args.dataframe_queries]], args.dataframe_queries)
+    single = bench("predictor (um a um)", lambda: [predictor.predict(area, depth) for area, depth in pairs], args.queries)
+    batch = bench("predictor (lote)", lambda: predictor.predict_batch(areas, depths), args.queries)
+    assert np.allclose(legacy, single[:len(legacy)]) and np.allclose(single, batch)
+
+
+if __name__ == "__main__":
+    main()
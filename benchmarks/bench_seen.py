@@ -0,0 +1,48 @@
+# Benchmark das estruturas de URLs vistas (crawler/seen.py): memória e vazão de add/lookup
+# comparadas ao set de strings original.
+#
+#   python -m benchmarks.bench_seen --urls 1000000
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crawler.seen import UrlSet, FingerprintSet, ScalableBloomFilter
+
+
+def make_urls(count):
+    return [f"https://www.example{i % 97}.com/catalog/category-{i % 1013}/item-{i}.html?ref=home" for i in range(count)]
+
+
+def bench(name, factory, urls):
+    start = time.perf_counter()
+    seen = factory()
+    for url in urls:
+        seen.add(url)
+    add_seconds = time.perf_counter() - start
+    memory = seen.memory_bytes()  # No set conta também as strings que ele mantém vivas
+
+    start = time.perf_counter()
+    hits = sum(1 for url in urls if url in seen)
+    lookup_seconds = time.perf_counter() - start
+
+    print(f"{name:12} {memory / len(urls):8.1f} B/URL {len(urls) / add_seconds:12,.0f} add/s "
+          f"{len(urls) / lookup_seconds:12,.0f} lookup/s  hits={hits}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--urls', type=int, default=1000000)
+    parser.add_argument('--error-rate', type=float, default=0.001)
+    args = parser.parse_args()
+
+    urls = make_urls(args.urls)
+    bench('set', UrlSet, urls)
+    bench('fingerprint', FingerprintSet, urls)
+    bench('bloom', lambda: ScalableBloomFilter(error_rate=args.error_rate), urls)
+
+
+if __name__ == "__main__":
+    main()
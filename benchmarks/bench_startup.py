@@ -0,0 +1,61 @@
+# Benchmark de inicialização: tempo de import de cada ponto de entrada num interpretador novo
+# (mediana de --repeat execuções), quais bibliotecas pesadas de ML cada um carrega e quanto custa
+# carregar os recursos adiados pelo ml.loader (o que o warm_up da API faz em segundo plano).
+#
+#   python -m benchmarks.bench_startup --repeat 5
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = ['spacy', 'sklearn', 'pandas', 'joblib']
+ENTRY_POINTS = ['crawler.core', 'crawler.distributed', 'app.scheduler', 'app.main']
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+WARM_UP_SCRIPT = """
+import json, time
+from ml import predict
+result = {}
+for name in ('predictor', 'nlp'):
+    start = time.perf_counter()
+    getattr(predict, name).get()
+    result[name] = time.perf_counter() - start
+print(json.dumps(result))
+"""
+
+
+def run(script):
+    # Cada medição num processo novo, para não aproveitar módulos já importados
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--modules', nargs='*', default=ENTRY_POINTS)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        runs = [run(IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)) for _ in range(args.repeat)]
+        seconds = statistics.median(r['seconds'] for r in runs)
+        heavy = ', '.join(runs[0]['heavy']) or '-'
+        print(f"import {module:22} {seconds:8.2f}s   bibliotecas de ML: {heavy}")
+
+    loads = run(WARM_UP_SCRIPT)
+    for name, seconds in loads.items():
+        print(f"carga adiada {name:17} {seconds:8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Benchmark de gravação de páginas: Storage.save_page (SELECT + INSERT + commit por página)
+# contra o PageWriter (lotes numa única transação, INSERT ... ON CONFLICT DO NOTHING).
+#
+#   python -m benchmarks.bench_storage --pages 5000 --batch-size 500
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base, set_sqlite_pragmas
+from crawler.blobs import BlobStore
+from crawler.storage import Storage, PageWriter
+
+
+def make_storage(path):
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    # Blobs ao lado do banco temporário, não no ./blobs padrão
+    blobs = BlobStore(os.path.splitext(path)[0] + '-blobs')
+    return Storage(sessionmaker(autocommit=False, autoflush=False, bind=engine)(), blobs)
+
+
+def make_pages(count, size):
+    body = "<html><body>" + "x" * size + "</body></html>"
+    return [(f"http://bench.local/page{i}.html", body) for i in range(count)]
+
+
+def bench_save_page(storage, pages):
+    start = time.perf_counter()
+    for url, content in pages:
+        storage.save_page(url, content)
+    return time.perf_counter() - start
+
+
+def bench_page_writer(storage, pages, batch_size):
+    writer = PageWriter(storage, batch_size=batch_size).start()
+    start = time.perf_counter()
+    for url, content in pages:
+        writer.put(url, content)
+    writer.close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=5000)
+    parser.add_argument('--page-size', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, args.page_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        before = bench_save_page(make_storage(os.path.join(tmp, 'before.db')), pages)
+        after = bench_page_writer(make_storage(os.path.join(tmp, 'after.db')), pages, args.batch_size)
+
+    print(f"save_page (por página): {args.pages / before:10.0f} páginas/s")
+    print(f"PageWriter (lotes de {args.batch_size}): {args.pages / after:10.0f} páginas/s")
+    print(f"Speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# Site sintético para benchmarks de crawl: as páginas são geradas na hora, de forma determinística
+# a partir da semente, numa árvore em que a página i aponta para os filhos i*fan_out+1 .. i*fan_out+fan_out
+# (além da raiz e da página pai, como um menu). Latência, erros e robots.txt são configuráveis, e
+# o site pode publicar um índice de sitemaps (/sitemap.xml, também declarado no robots.txt) com
+# sitemaps .xml.gz de até sitemap_size URLs cada.
+#
+#   python -m benchmarks.synthetic_site --pages 100000 --fan-out 20 --latency 0.05 --errors 503:0.01 --port 8090
+import argparse
+import gzip
+import http.server
+import random
+import re
+import string
+import sys
+import time
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'exponential')
+PRIVATE_PREFIX = '/private/'
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def parse_errors(value):
+    # "500:0.01,404:0.02" -> {500: 0.01, 404: 0.02}
+    errors = {}
+    for item in filter(None, value.split(',')):
+        status, rate = item.split(':')
+        errors[int(status)] = float(rate)
+    return errors
+
+
+class SiteSpec:
+    def __init__(self, pages=1000, fan_out=10, page_size=20000, latency=0.0, latency_distribution='fixed',
+                 errors=None, disallowed_fraction=0.0, crawl_delay=None, robots_status=200, sitemap=False,
+                 sitemap_size=50000, seed=0):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Distribuição de latência desconhecida: {latency_distribution}")
+        self.pages = pages
+        self.fan_out = fan_out
+        self.page_size = page_size  # Bytes aproximados do HTML de cada página
+        self.latency = latency  # Latência média (s) de cada resposta
+        self.latency_distribution = latency_distribution
+        self.errors = errors or {}  # Status HTTP -> fração das páginas que respondem com ele
+        self.disallowed_fraction = disallowed_fraction  # Fração das páginas sob /private/, bloqueada no robots.txt
+        self.crawl_delay = crawl_delay
+        self.robots_status = robots_status  # 404: sem robots.txt; 5xx: o crawler bloqueia o host inteiro
+        self.sitemap = sitemap
+        self.sitemap_size = sitemap_size  # URLs por sitemap do índice
+        self.seed = seed
+
+    def to_dict(self):
+        return dict(vars(self), errors={str(status): rate for status, rate in self.errors.items()})
+
+
+class SyntheticSite:
+    def __init__(self, spec):
+        self.spec = spec
+        vocabulary_rng = random.Random(spec.seed)
+        self.vocabulary = [''.join(vocabulary_rng.choices(string.ascii_lowercase, k=vocabulary_rng.randint(3, 10)))
+                           for _ in range(50000)]
+
+    def rng(self, page, purpose):
+        return random.Random(f"{self.spec.seed}:{page}:{purpose}")
+
+    def is_private(self, page):
+        return page != 0 and self.rng(page, 'private').random() < self.spec.disallowed_fraction
+
+    def path(self, page):
+        if page == 0:
+            return '/'
+        return f"{PRIVATE_PREFIX}{page}" if self.is_private(page) else f"/p/{page}"
+
+    def page_from_path(self, path):
+        if path in ('/', '', '/index.html'):
+            return 0
+        match = re.fullmatch(r'/(?:p|private)/(\d+)', path)
+        if match is None:
+            return None
+        page = int(match.group(1))
+        if page >= self.spec.pages or self.path(page) != path:
+            return None
+        return page
+
+    def parent(self, page):
+        return (page - 1) // self.spec.fan_out if page else None
+
+    def children(self, page):
+        first = page * self.spec.fan_out + 1
+        return range(first, min(first + self.spec.fan_out, self.spec.pages))
+
+    def level(self, page):
+        level = 0
+        while page:
+            page = self.parent(page)
+            level += 1
+        return level
+
+    def error_status(self, page):
+        if page == 0:
+            return None
+        draw = self.rng(page, 'error').random()
+        for status, rate in sorted(self.spec.errors.items()):
+            if draw < rate:
+                return status
+            draw -= rate
+        return None
+
+    def latency(self, page):
+        mean = self.spec.latency
+        if not mean:
+            return 0.0
+        rng = self.rng(page, 'latency')
+        if self.spec.latency_distribution == 'uniform':
+            return rng.uniform(0, 2 * mean)
+        if self.spec.latency_distribution == 'exponential':
+            return rng.expovariate(1 / mean)
+        return mean
+
+    def robots_txt(self, base):
+        lines = ['User-agent: *', f'Disallow: {PRIVATE_PREFIX}']
+        if self.spec.crawl_delay is not None:
+            lines.append(f'Crawl-delay: {self.spec.crawl_delay}')
+        if self.spec.sitemap:
+            lines.append(f'Sitemap: {base}/sitemap_index.xml')
+        return '\n'.join(lines) + '\n'
+
+    def lastmod(self, page):
+        return f"2024-{self.rng(page, 'lastmod').randint(1, 12):02d}-{self.rng(page, 'lastmod-day').randint(1, 28):02d}"
+
+    def sitemap_count(self):
+        return -(-self.spec.pages // self.spec.sitemap_size)
+
+    def sitemap_index(self, base):
+        items = ''.join(f'<sitemap><loc>{base}/sitemaps/{number}.xml.gz</loc></sitemap>'
+                        for number in range(self.sitemap_count()))
+        return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="{SITEMAP_NS}">{items}</sitemapindex>'
+
+    def sitemap(self, base, number):
+        # Só as páginas públicas; o sitemap sai comprimido, como os .xml.gz de sites grandes
+        first = number * self.spec.sitemap_size
+        pages = range(first, min(first + self.spec.sitemap_size, self.spec.pages))
+        items = ''.join(f'<url><loc>{base}{self.path(page)}</loc><lastmod>{self.lastmod(page)}</lastmod></url>'
+                        for page in pages if not self.is_private(page))
+        xml = f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{SITEMAP_NS}">{items}</urlset>'
+        return gzip.compress(xml.encode('utf-8'))
+
+    def render(self, page):
+        links = [self.path(0)]
+        if page:
+            links.append(self.path(self.parent(page)))
+        links.extend(self.path(child) for child in self.children(page))
+        nav = ''.join(f'<li><a href="{href}">{href}</a></li>' for href in links)
+        head = f'<html><head><title>Página {page}</title></head><body><h1>Página {page}</h1><ul>{nav}</ul>'
+        # Texto aleatório sobre um "assunto" próprio (um recorte do vocabulário): a deduplicação
+        # compara o peso das palavras, e páginas sorteadas do vocabulário inteiro viram quase-duplicatas
+        rng = self.rng(page, 'text')
+        topic = rng.sample(self.vocabulary, 500)
+        words = rng.choices(topic, k=max(0, self.spec.page_size - len(head)) // 7)
+        paragraphs = ''.join(f"<p>{' '.join(words[i:i + 80])}</p>" for i in range(0, len(words), 80))
+        return f'{head}{paragraphs}</body></html>'
+
+    def robots_allows(self, page):
+        # Como o robots.txt é interpretado: 5xx, 401 e 403 bloqueiam tudo, os demais 4xx liberam tudo
+        status = self.spec.robots_status
+        if status >= 500 or status in (401, 403):
+            return False
+        return status >= 400 or not self.is_private(page)
+
+    def expected_fetches(self, depth, sitemaps=False):
+        # Páginas que um crawl a partir da raiz até a profundidade dada baixa: segue só os links
+        # liberados pelo robots.txt e não expande as que respondem com erro (que contam como fetch).
+        # Lendo os sitemaps, todas as páginas públicas liberadas são baixadas
+        if sitemaps and self.spec.sitemap and depth > 0:
+            return 1 + sum(1 for page in range(1, self.spec.pages) if self.robots_allows(page))
+        count, level = 0, [0]
+        for current_depth in range(depth + 1):
+            count += len(level)
+            if current_depth == depth:
+                break
+            level = [child for page in level if self.error_status(page) is None
+                     for child in self.children(page) if self.robots_allows(child)]
+        return count
+
+    def max_level(self):
+        return self.level(self.spec.pages - 1)
+
+
+class SyntheticHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, como um servidor real
+    disable_nagle_algorithm = True  # Cabeçalhos e corpo saem em writes separados; sem isso cada resposta espera o ACK atrasado
+    site = None
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        base = f"http://{self.headers.get('Host', '127.0.0.1')}"
+        if path == '/robots.txt':
+            if self.site.spec.robots_status != 200:
+                return self.respond(self.site.spec.robots_status, 'text/plain', '')
+            return self.respond(200, 'text/plain', self.site.robots_txt(base))
+        if self.site.spec.sitemap and path in ('/sitemap.xml', '/sitemap_index.xml'):
+            return self.respond(200, 'application/xml', self.site.sitemap_index(base))
+        match = re.fullmatch(r'/sitemaps/(\d+)\.xml\.gz', path)
+        if self.site.spec.sitemap and match and int(match.group(1)) < self.site.sitemap_count():
+            return self.respond(200, 'application/gzip', self.site.sitemap(base, int(match.group(1))))
+        page = self.site.page_from_path(path)
+        if page is None:
+            return self.respond(404, 'text/html', '<html><body>Não encontrada</body></html>')
+        delay = self.site.latency(page)
+        if delay:
+            time.sleep(delay)
+        status = self.site.error_status(page)
+        if status is not None:
+            return self.respond(status, 'text/html', f'<html><body>Erro {status}</body></html>')
+        self.respond(200, 'text/html; charset=utf-8', self.site.render(page))
+
+    def respond(self, status, content_type, body):
+        data = body if isinstance(body, bytes) else body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SyntheticServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # O crawler fecha conexões keep-alive ociosas ao terminar: não é erro do servidor
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+def make_server(spec, host='127.0.0.1', port=0):
+    handler = type('Handler', (SyntheticHandler,), {'site': SyntheticSite(spec)})
+    return SyntheticServer((host, port), handler)
+
+
+def serve(spec, port=0, ready=None):
+    # Alvo de multiprocessing: informa a porta escolhida em ready (uma Queue) e atende até ser encerrado
+    server = make_server(spec, port=port)
+    if ready is not None:
+        ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def add_site_arguments(parser):
+    parser.add_argument('--pages', type=int, default=1000)
+    parser.add_argument('--fan-out', type=int, default=10)
+    parser.add_argument('--page-size', type=int, default=20000, help="Bytes aproximados de cada página")
+    parser.add_argument('--latency', type=float, default=0.0, help="Latência média (s) por resposta")
+    parser.add_argument('--latency-distribution', choices=LATENCY_DISTRIBUTIONS, default='fixed')
+    parser.add_argument('--errors', type=parse_errors, default={}, help="Status e fração das páginas, ex.: 500:0.01,503:0.02")
+    parser.add_argument('--disallowed-fraction', type=float, default=0.0, help="Fração das páginas bloqueada no robots.txt")
+    parser.add_argument('--crawl-delay', type=float)
+    parser.add_argument('--robots-status', type=int, default=200)
+    parser.add_argument('--sitemap', action='store_true', help="Publica um índice de sitemaps .xml.gz")
+    parser.add_argument('--sitemap-size', type=int, default=50000, help="URLs por sitemap")
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def spec_from_args(args):
+    return SiteSpec(pages=args.pages, fan_out=args.fan_out, page_size=args.page_size, latency=args.latency,
+                    latency_distribution=args.latency_distribution, errors=args.errors,
+                    disallowed_fraction=args.disallowed_fraction, crawl_delay=args.crawl_delay,
+                    robots_status=args.robots_status, sitemap=args.sitemap, sitemap_size=args.sitemap_size,
+                    seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_site_arguments(parser)
+    parser.add_argument('--port', type=int, default=8090)
+    args = parser.parse_args()
+
+    server = make_server(spec_from_args(args), port=args.port)
+    print(f"Serving at http://127.0.0.1:{server.server_address[1]}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,115 @@ MAX_LINKS_PER_PAGE = 100  # Limite para prevenir spider traps
 DELAY = 0  # Delay entre requisições para evitar sobrecarregar o servidor
 ALLOWED_FILE_TYPES = ['.html', '.htm', '']  # Por padrão, apenas HTML e URLs sem extensão são permitidos
 MAX_WORKERS = 10  # Número máximo de threads
+REQUEST_TIMEOUT = 10  # Timeout (s) de cada requisição HTTP
+LOG_LEVEL = 'INFO'  # Nível do log da API e dos workers (DEBUG registra cada URL)
+LOG_FILE = 'crawler.log'  # Arquivo de log, acrescentado a cada execução (None = só console)
+
+# Motor de crawl: 'threads' (WebCrawler) ou 'async' (AsyncWebCrawler), selecionável em 'configuracoes'
+CRAWLER_ENGINE = 'threads'
+ASYNC_MAX_CONCURRENCY = 200  # Requisições simultâneas em voo no motor async
+ASYNC_CONNECTIONS_PER_HOST = 10  # Conexões keep-alive por host no motor async
+ASYNC_KEEPALIVE_TIMEOUT = 30  # Tempo (s) que uma conexão ociosa fica no pool
+
+# Cortesia por host (crawler/politeness.py)
+MAX_CONNECTIONS_PER_HOST = 10  # Conexões simultâneas por host
+BACKOFF_INITIAL_DELAY = 1.0  # Delay (s) aplicado no primeiro 429/503
+BACKOFF_MAX_DELAY = 60.0  # Teto do delay adaptativo (s)
+HEALTHY_LATENCY = 1.0  # Latência (s) abaixo da qual o delay volta a diminuir
+BACKOFF_RECOVERY_FACTOR = 0.5  # Fator de redução do delay em respostas saudáveis
+
+# Gravação em lote das páginas (crawler/storage.py)
+WRITE_BATCH_SIZE = 500  # Páginas por transação
+WRITE_BUFFER_SIZE = 2000  # Páginas aguardando gravação; acima disso os fetchers esperam
+WRITE_FLUSH_INTERVAL = 1.0  # Tempo máximo (s) que uma página fica no buffer
+
+# Corpos das páginas (crawler/blobs.py): arquivos comprimidos endereçados pelo hash do conteúdo
+BLOB_STORE_PATH = './blobs'  # Diretório do store, ao lado do storage.db
+BLOB_CODEC = 'zlib'  # 'zlib' ou 'zstd' (requer o pacote zstandard)
+BLOB_COMPRESSION_LEVEL = 6  # Nível de compressão do codec
+BLOB_DICT_SAMPLES = 20  # Páginas de um domínio usadas para treinar o dicionário dele (0 = sem dicionários)
+BLOB_DICT_SIZE = 32 * 1024  # Tamanho máximo (bytes) do dicionário por domínio
+
+# Índice de busca de texto completo (crawler/search.py), alimentado pelo crawl em lotes
+SEARCH_INDEX_ENABLED = True  # Indexa as páginas das bases de conhecimento; desligável por base com "search_index": false
+SEARCH_INDEX_PATH = './search_index.db'  # Banco SQLite FTS5, ao lado do storage.db
+SEARCH_MAX_CHARS = 200000  # Caracteres do texto de cada página indexados
+SEARCH_SNIPPET_TOKENS = 24  # Palavras no trecho destacado de cada resultado
+SEARCH_PAGE_SIZE = 10  # Resultados por página em /search
+SEARCH_MAX_PAGE_SIZE = 100  # Limite de resultados por página aceito em /search
+
+# Métricas do pipeline (crawler/metrics.py), expostas em /metrics no formato do Prometheus
+METRICS_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # Limites (s) dos histogramas
+METRICS_MAX_HOSTS = 1000  # Hosts distintos com série própria; os demais somam em host="other"
+
+# Descoberta de URLs por sitemaps (crawler/sitemaps.py), desligável por base com "sitemaps": false
+SITEMAP_DISCOVERY = True  # Lê os Sitemap: do robots.txt e o /sitemap.xml de cada host semeado
+SITEMAP_MAX_FILES = 1000  # Sitemaps (inclusive índices) lidos por host em cada crawl
+SITEMAP_MAX_URLS = 1000000  # URLs de sitemap enfileiradas por host em cada crawl
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024  # Tamanho máximo (descomprimido) de um sitemap, o limite do protocolo
+SITEMAP_BATCH_SIZE = 500  # URLs de sitemap conferidas no banco e enfileiradas por vez
+
+# Estado de crawl persistido (fronteira e bases de conhecimento), ao lado do storage.db
+CRAWL_STATE_PATH = './crawl_state.db'
+FRONTIER_COMMIT_EVERY = 100  # URLs enfileiradas entre commits da fronteira
+
+# Estrutura de URLs já vistas por base (crawler/seen.py): 'set', 'fingerprint' ou 'bloom'
+SEEN_URLS_BACKEND = 'set'
+BLOOM_ERROR_RATE = 0.001  # Taxa máxima de falsos positivos do Bloom filter escalável
+BLOOM_INITIAL_CAPACITY = 100000  # URLs no primeiro estágio do Bloom filter
+
+# Canonicalização de URLs (crawler/canonical.py), sobrescrevível por base em 'configuracoes'
+CANONICAL_STRIP_PARAMS = ['utm_*', 'gclid', 'fbclid', 'msclkid', 'mc_cid', 'mc_eid',
+                          'sessionid', 'session_id', 'jsessionid', 'phpsessid', 'sid']  # Padrões fnmatch
+CANONICAL_STRIP_TRAILING_SLASH = True  # Trata /pagina/ e /pagina como a mesma URL
+
+HTML_PARSER = 'lxml'  # Backend de parse (crawler/parsers.py): 'lxml', 'html.parser' ou 'selectolax'
+
+# Estágio de parse em processos (crawler/pipeline.py)
+PARSE_PROCESSES = None  # Processos do pool de parse (None = número de CPUs; 0 = parse nas threads de I/O)
+PARSE_QUEUE_SIZE = 256  # Páginas baixadas aguardando parse por crawl; acima disso os fetchers esperam
+
+# Cache de robots.txt do processo (crawler/robots.py), compartilhado por todos os crawls
+ROBOTS_TTL = 86400  # Validade (s) de um robots.txt baixado
+ROBOTS_ERROR_TTL = 300  # Validade (s) do bloqueio total quando o robots.txt falha (erro de rede ou 5xx)
+ROBOTS_CACHE_SIZE = 10000  # Hosts mantidos no cache; acima disso sai o menos usado
+ROBOTS_TIMEOUT = 10  # Timeout (s) do download do robots.txt
+
+# Download em streaming (crawler/download.py), sobrescrevível por base em 'configuracoes'
+MAX_BODY_SIZE = 5 * 1024 * 1024  # Bytes (descomprimidos) lidos por página; acima disso a página é descartada
+READ_DEADLINE = 30  # Tempo máximo (s) para ler o corpo inteiro de uma resposta
+
+# Classificação de área de atuação (ml/predict.py)
+CLASSIFY_EXCLUDED_COMPONENTS = ['parser', 'ner', 'senter']  # Componentes do spaCy que a classificação não usa
+CLASSIFY_MAX_CHARS = 20000  # Caracteres do início da página usados na classificação
+CLASSIFY_BATCH_SIZE = 64  # Textos por lote no nlp.pipe
+CLASSIFY_CACHE_SIZE = 10000  # Classificações memorizadas por hash do texto
+
+# Estimativa de páginas (ml/estimator.py)
+PREDICTOR_PATH = 'ml/page_estimator.npz'  # Coeficientes do modelo linear, gerados pelo train_model.py
+PAGE_MODEL_PATH = 'ml/page_estimator_model.pkl'  # Modelo scikit-learn, usado só se o .npz não existir
+MODEL_COLUMNS_PATH = 'ml/model_columns.pkl'
+PREDICT_CACHE_SIZE = 4096  # Previsões (área, profundidade) memorizadas
+ML_WARM_UP = True  # A API carrega spaCy e o estimador em segundo plano logo depois de subir
+HISTORY_CHUNK_SIZE = 50000  # Linhas do histórico lidas por vez na importação e no treino
+
+# Escalonador central de crawls (app/scheduler.py)
+CRAWL_WORKER_BUDGET = 32  # Threads de crawl compartilhadas por todas as bases de conhecimento
+MAX_ACTIVE_CRAWLS = 8  # Bases crawleadas ao mesmo tempo; as demais aguardam na fila
+DEFAULT_CRAWL_PRIORITY = 1  # Peso da base na divisão do orçamento ('prioridade' em configuracoes)
+SCHEDULER_POLL_INTERVAL = 0.05  # Espera máxima (s) de um worker ocioso antes de reavaliar as bases
+
+# Modo distribuído (crawler/distributed.py): bases com "modo": "distribuido" em 'configuracoes'
+SHARED_FRONTIER_BACKEND = 'sqlite'  # Implementação da fronteira compartilhada entre coordenador e workers
+SHARED_FRONTIER_PATH = './shared_frontier.db'  # Arquivo da fronteira compartilhada (backend 'sqlite')
+DISTRIBUTED_LEASE_SIZE = 20  # URLs (de um mesmo host) arrendadas por vez por um worker
+DISTRIBUTED_LEASE_SECONDS = 60  # Validade do arrendamento; vencido, as URLs voltam para a fila
+DISTRIBUTED_POLL_INTERVAL = 0.5  # Espera (s) de um worker ocioso ou do coordenador entre consultas
+
+# Detecção de quase-duplicatas (crawler/dedup.py): descarta páginas, então fica desligada até ser
+# validada no site; ligue por base com "near_duplicates": true
+NEAR_DUPLICATE_DETECTION = False
+NEAR_DUPLICATE_MAX_DISTANCE = 3  # Bits diferentes (de 64) no SimHash para duas páginas serem quase-duplicatas
+NEAR_DUPLICATE_MIN_WORDS = 50  # Páginas com menos palavras de texto principal não são comparadas
+NEAR_DUPLICATE_SHINGLE_SIZE = 3  # Palavras por shingle do SimHash (sequências de palavras distinguem páginas de catálogo com o mesmo vocabulário)
+NEAR_DUPLICATE_REPORT_LIMIT = 100  # Clusters de duplicatas guardados no relatório da base
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .core import WebCrawler, FetchResult, NOT_MODIFIED
+from .politeness import host_scheduler
+from .pipeline import parse_job
+from .download import BodyReader, BodyLimitExceeded, CHUNK_SIZE, is_html, check_declared_length
+from .metrics import FetchTimings
+from config import ALLOWED_FILE_TYPES, ASYNC_MAX_CONCURRENCY, ASYNC_CONNECTIONS_PER_HOST, ASYNC_KEEPALIVE_TIMEOUT, REQUEST_TIMEOUT
+from app.state import update_status
+
+
+def fetch_trace_config():
+    # DNS e conexão de cada requisição, somados no FetchTimings passado em trace_request_ctx. A
+    # criação da conexão no aiohttp inclui a resolução do nome, que é descontada
+    async def on_dns_start(session, context, params):
+        context.dns_start = time.perf_counter()
+
+    async def on_dns_end(session, context, params):
+        if context.trace_request_ctx is not None:
+            context.trace_request_ctx.dns += time.perf_counter() - context.dns_start
+
+    async def on_connection_start(session, context, params):
+        context.connect_start = time.perf_counter()
+        context.dns_before = context.trace_request_ctx.dns if context.trace_request_ctx is not None else 0.0
+
+    async def on_connection_end(session, context, params):
+        timings = context.trace_request_ctx
+        if timings is not None:
+            timings.connect += time.perf_counter() - context.connect_start - (timings.dns - context.dns_before)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connection_start)
+    trace_config.on_connection_create_end.append(on_connection_end)
+    return trace_config
+
+
+# Motor asyncio: mesmo contrato de crawl()/get_total_links_extracted() do WebCrawler, mas com
+# um pool de conexões keep-alive limitado por host e centenas de requisições em voo
+class AsyncWebCrawler(WebCrawler):
+    def __init__(self, base_url, depth, allowed_file_types=ALLOWED_FILE_TYPES,
+                 max_concurrency=ASYNC_MAX_CONCURRENCY, connections_per_host=ASYNC_CONNECTIONS_PER_HOST,
+                 politeness=host_scheduler, configuracoes=None, frontier=None, nome=None):
+        super().__init__(base_url, depth, allowed_file_types=allowed_file_types, max_workers=max_concurrency,
+                         politeness=politeness, configuracoes=configuracoes, frontier=frontier, nome=nome)
+        self.max_concurrency = max_concurrency
+        self.connections_per_host = connections_per_host
+
+    def crawl(self):
+        logging.info("Starting async crawl")
+        self.writer.start()
+        asyncio.run(self._crawl())
+        self.save_processed_urls()
+
+    async def _crawl(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                         limit_per_host=self.connections_per_host,
+                                         keepalive_timeout=ASYNC_KEEPALIVE_TIMEOUT)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def wake():
+            # Chamado pelas threads de sitemap: URLs novas na fronteira (ou fim da leitura)
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                pass  # O crawl já terminou e o loop foi fechado
+
+        self.start_sitemap_discovery(wake)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         trace_configs=[fetch_trace_config()]) as session:
+            async def worker():
+                while not self.stop_requested:
+                    item = self.frontier.get_nowait()
+                    if item is None:
+                        if self.frontier.finished:
+                            wakeup.set()
+                            return
+                        wakeup.clear()
+                        try:
+                            await asyncio.wait_for(wakeup.wait(), self.frontier.next_ready_in())
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+                    url, url_depth, fetch_url = item
+                    try:
+                        wait = self.politeness.reserve(urlparse(url).netloc)
+                        if wait:
+                            self.frontier.defer(url, url_depth, wait, fetch_url)
+                            continue
+                        for new_url, new_depth, link_fetch_url in await self.process_and_extract_async(
+                                session, url, url_depth, fetch_url):
+                            self.frontier.put(new_url, new_depth, fetch_url=link_fetch_url)
+                    except Exception as e:
+                        logging.error(f"URL failed: {url} with exception {e}")
+                    finally:
+                        self.frontier.task_done()
+                        wakeup.set()
+                        update_status(pages_extracted=len(self.processed_urls), nome=self.nome)
+
+            await asyncio.gather(*(worker() for _ in range(self.max_concurrency)))
+
+    async def fetch_async(self, session, url, previous=None, fetch_url=None):
+        status_code, retry_after = None, None
+        reader, headers_at, read_at = None, None, None
+        timings = FetchTimings()
+        start = time.monotonic()
+        try:
+            logging.debug("Fetching URL: %s", url)
+            async with session.get(fetch_url or url, headers=self.conditional_headers(previous),
+                                   trace_request_ctx=timings) as response:
+                headers_at = time.monotonic()
+                status_code, retry_after = response.status, response.headers.get('Retry-After')
+                final_url = str(response.url)
+                if status_code == NOT_MODIFIED:
+                    return FetchResult(None, status_code, response.headers.get('ETag', previous.etag),
+                                       response.headers.get('Last-Modified', previous.last_modified), final_url)
+                response.raise_for_status()
+                etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+                if not is_html(response.headers):
+                    return FetchResult(None, status_code, etag, last_modified, final_url)
+                check_declared_length(response.headers, self.max_body_size)
+                reader = BodyReader(response.charset, self.max_body_size, self.read_deadline)
+                try:
+                    # O prazo vale para a leitura inteira, não só entre um pedaço e outro
+                    await asyncio.wait_for(self.read_body(response, reader), max(reader.remaining(), 0))
+                except asyncio.TimeoutError:
+                    reader.check_deadline()
+                    raise
+                read_at = time.monotonic()
+                return FetchResult(reader.text(), status_code, etag, last_modified, final_url)
+        except BodyLimitExceeded as e:
+            logging.warning(f"Discarding {url}: {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.error(f"Failed to fetch {url}: {e}")
+        finally:
+            elapsed = time.monotonic() - start
+            self.fetch_stats.record(elapsed)
+            self.politeness.release(urlparse(url).netloc, status_code, elapsed, retry_after)
+            self.record_fetch(url, status_code, timings, start, headers_at, read_at, reader.size if reader else 0)
+        return FetchResult(None, status_code, None, None)
+
+    @staticmethod
+    async def read_body(response, reader):
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            reader.feed(chunk)
+
+    async def process_and_extract_async(self, session, url, current_depth, fetch_url=None):
+        # As leituras do SQLite (validadores, corpo armazenado num 304) saem do event loop
+        previous = await asyncio.to_thread(self.load_previous_version, url) if self.incremental else None
+        result = await self.fetch_async(session, url, previous, fetch_url)
+        page_url = result.url or fetch_url or url
+        if self.writer.full() or result.status_code == NOT_MODIFIED:
+            # Buffer de gravação cheio: espera fora do event loop (backpressure)
+            content = await asyncio.to_thread(self.store_result, url, result, previous)
+        else:
+            content = self.store_result(url, result, previous)
+
+        if content and self.needs_parse(current_depth):
+            page = await self.parse_page_async(content, page_url)
+            if self.writer.full():
+                accepted = await asyncio.to_thread(self.accept_page, url, page)
+            else:
+                accepted = self.accept_page(url, page)
+            if accepted and current_depth < self.depth:
+                if self.robots_cached(page.links):
+                    return self.filter_links(page.links, current_depth)
+                # robots.txt de um host sem entrada válida no cache (novo ou vencida pelo TTL): o download
+                # síncrono sai do event loop, como a leitura do storage
+                return await asyncio.to_thread(self.filter_links, page.links, current_depth)
+        return []
+
+    def robots_cached(self, hrefs):
+        # filter_links só consulta o robots.txt dos links para os domínios do crawl
+        with self.lock:
+            domains = set(self.domains)
+        return all(self.robots.is_cached(href) for href in hrefs if urlparse(href).netloc.lower() in domains)
+
+    async def parse_page_async(self, html, page_url):
+        # O parse sai do event loop para o pool de processos; a concorrência do motor limita a fila
+        if self.parse_stage is None:
+            return self.parse_page(html, page_url)
+        loop = asyncio.get_running_loop()
+        page, cpu_seconds = await loop.run_in_executor(self.parse_stage.pool, parse_job, html, page_url, self.parser_backend,
+                                                       self.min_words)
+        self.parse_stage.stats.record(cpu_seconds)
+        return page
@@ -0,0 +1,255 @@
+import codecs
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import zlib
+from collections import Counter
+from urllib.parse import urlsplit
+
+from config import BLOB_STORE_PATH, BLOB_CODEC, BLOB_COMPRESSION_LEVEL, BLOB_DICT_SAMPLES, BLOB_DICT_SIZE
+
+CHUNK_SIZE = 64 * 1024
+ZLIB_MAX_DICT_SIZE = 32 * 1024  # O zlib só enxerga os últimos 32 KB do dicionário
+SAMPLE_EDGE = 8 * 1024  # Bytes do início e do fim de cada página guardados como amostra
+
+
+def _zstd():
+    import zstandard  # Dependência opcional
+    return zstandard
+
+
+def train_zlib_dictionary(samples, size=ZLIB_MAX_DICT_SIZE):
+    # "Treino" para o zlib: linhas que se repetem em boa parte das amostras (cabeçalho, menu,
+    # rodapé do template do site), com as mais frequentes no fim, mais perto do texto comprimido
+    counts = Counter()
+    for sample in samples:
+        counts.update({line.strip() for line in sample.split(b'\n') if len(line.strip()) > 8})
+    common = [line for line, count in counts.items() if count * 2 >= len(samples)]
+    common.sort(key=lambda line: counts[line])
+    return b'\n'.join(common)[-min(size, ZLIB_MAX_DICT_SIZE):]
+
+
+# Codecs de compressão: cada um sabe treinar um dicionário a partir de amostras do mesmo domínio
+# e comprimir/descomprimir (a leitura em streaming) com ou sem ele
+class ZlibCodec:
+    name = 'zlib'
+
+    def __init__(self, level=BLOB_COMPRESSION_LEVEL):
+        self.level = level
+
+    def train(self, samples, size):
+        return train_zlib_dictionary(samples, size)
+
+    def compress(self, data, dictionary=None):
+        compressor = zlib.compressobj(self.level, zdict=dictionary) if dictionary else zlib.compressobj(self.level)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress_stream(self, f, dictionary=None):
+        # Saída limitada a CHUNK_SIZE por passo: um blob muito comprimível não vira um bloco enorme
+        decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            while chunk:
+                yield decompressor.decompress(chunk, CHUNK_SIZE)
+                chunk = decompressor.unconsumed_tail
+        yield decompressor.flush()
+
+
+class ZstdCodec:
+    name = 'zstd'
+
+    def __init__(self, level=BLOB_COMPRESSION_LEVEL):
+        self.zstd = _zstd()
+        self.level = level
+
+    def train(self, samples, size):
+        return self.zstd.train_dictionary(size, samples).as_bytes()
+
+    def compress(self, data, dictionary=None):
+        dict_data = self.zstd.ZstdCompressionDict(dictionary) if dictionary else None
+        return self.zstd.ZstdCompressor(level=self.level, dict_data=dict_data).compress(data)
+
+    def decompress_stream(self, f, dictionary=None):
+        dict_data = self.zstd.ZstdCompressionDict(dictionary) if dictionary else None
+        yield from self.zstd.ZstdDecompressor(dict_data=dict_data).read_to_iter(f, read_size=CHUNK_SIZE,
+                                                                                write_size=CHUNK_SIZE)
+
+
+BLOB_CODECS = {
+    'zlib': ZlibCodec,
+    'zstd': ZstdCodec,
+}
+
+
+def create_codec(name=BLOB_CODEC, level=BLOB_COMPRESSION_LEVEL):
+    if name not in BLOB_CODECS:
+        raise ValueError(f"Codec de blobs '{name}' não reconhecido")
+    return BLOB_CODECS[name](level)
+
+
+# Armazenamento de corpos de página endereçado por conteúdo: cada corpo vira um arquivo
+# comprimido em <path>/<hash[:2]>/<hash[2:]>, com o SHA-256 de hash_content como chave, então
+# corpos idênticos (mesmo de URLs ou bases diferentes) são gravados uma única vez. Cada arquivo
+# começa com uma linha "<codec> <dicionário>\n"; os dicionários são treinados por domínio com as
+# primeiras BLOB_DICT_SAMPLES páginas dele e guardados em <path>/dicts, também pelo hash.
+class BlobStore:
+    def __init__(self, path=BLOB_STORE_PATH, codec=BLOB_CODEC, level=BLOB_COMPRESSION_LEVEL,
+                 dict_samples=BLOB_DICT_SAMPLES, dict_size=BLOB_DICT_SIZE):
+        self.path = path
+        self.codec = create_codec(codec, level)
+        self.level = level
+        self.dict_samples = dict_samples
+        self.dict_size = dict_size
+        self.codecs = {self.codec.name: self.codec}
+        self.domain_dicts = {}  # domínio -> id do dicionário ('' = sem dicionário)
+        self.samples = {}  # domínio -> corpos guardados até treinar o dicionário
+        self.dictionaries = {}  # id -> bytes do dicionário
+        self.lock = threading.Lock()
+        self.written = 0
+        self.deduplicated = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def blob_path(self, content_hash):
+        return os.path.join(self.path, content_hash[:2], content_hash[2:])
+
+    def exists(self, content_hash):
+        return os.path.exists(self.blob_path(content_hash))
+
+    def put(self, content_hash, content, url=None):
+        # Grava o corpo se ainda não existe; devolve False quando já estava no store
+        path = self.blob_path(content_hash)
+        if os.path.exists(path):
+            with self.lock:
+                self.deduplicated += 1
+            return False
+        data = content.encode('utf-8', 'surrogatepass')
+        dict_id = self._dictionary_for(urlsplit(url).netloc.lower() if url else '', data)
+        compressed = self.codec.compress(data, self.dictionaries.get(dict_id))
+        self._write_atomic(path, f"{self.codec.name} {dict_id or '-'}\n".encode('ascii') + compressed)
+        with self.lock:
+            self.written += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(compressed)
+        return True
+
+    def open(self, content_hash):
+        # Leitura preguiçosa: descomprime e decodifica pedaço a pedaço, sem montar o corpo inteiro
+        decoder = _utf8_decoder()
+        with open(self.blob_path(content_hash), 'rb') as f:
+            codec_name, dict_id = f.readline().decode('ascii').split()
+            for chunk in self._codec(codec_name).decompress_stream(f, self._load_dictionary(dict_id)):
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+            text = decoder.decode(b'', final=True)
+            if text:
+                yield text
+
+    def read(self, content_hash):
+        return ''.join(self.open(content_hash))
+
+    def delete(self, content_hash):
+        try:
+            os.remove(self.blob_path(content_hash))
+        except FileNotFoundError:
+            pass
+
+    def hashes(self):
+        for prefix in os.listdir(self.path) if os.path.isdir(self.path) else ():
+            if len(prefix) != 2:
+                continue
+            for name in os.listdir(os.path.join(self.path, prefix)):
+                if not name.startswith('.'):
+                    yield prefix + name
+
+    def stats(self):
+        with self.lock:
+            return {'blobs_gravados': self.written, 'blobs_deduplicados': self.deduplicated,
+                    'bytes_originais': self.bytes_in, 'bytes_comprimidos': self.bytes_out}
+
+    def _codec(self, name):
+        if name not in self.codecs:
+            self.codecs[name] = create_codec(name, self.level)
+        return self.codecs[name]
+
+    def _dictionary_for(self, domain, data):
+        # Id do dicionário do domínio; enquanto ele não existe, guarda a página como amostra e
+        # treina quando juntar dict_samples delas (as primeiras páginas vão sem dicionário)
+        if not domain or self.dict_samples <= 0:
+            return ''
+        with self.lock:
+            if domain not in self.domain_dicts:
+                self.domain_dicts[domain] = self._read_domain_pointer(domain)
+            dict_id = self.domain_dicts[domain]
+            if dict_id is not None:
+                return dict_id
+            samples = self.samples.setdefault(domain, [])
+            # O template do site fica no começo e no fim da página: só isso é guardado como amostra
+            samples.append(data if len(data) <= SAMPLE_EDGE * 2 else data[:SAMPLE_EDGE] + b'\n' + data[-SAMPLE_EDGE:])
+            if len(samples) < self.dict_samples:
+                return ''
+            del self.samples[domain]
+            dict_id = self._train(domain, samples)
+            self.domain_dicts[domain] = dict_id
+            return dict_id
+
+    def _train(self, domain, samples):
+        try:
+            dictionary = self.codec.train(samples, self.dict_size)
+        except Exception as e:
+            logging.warning(f"Failed to train compression dictionary for {domain}: {e}")
+            dictionary = b''
+        dict_id = hashlib.sha256(dictionary).hexdigest()[:16] if dictionary else ''
+        if dictionary:
+            self.dictionaries[dict_id] = dictionary
+            self._write_atomic(os.path.join(self.path, 'dicts', dict_id), dictionary)
+        self._write_atomic(self._domain_pointer(domain), dict_id.encode('ascii'))
+        logging.info(f"Trained {len(dictionary)}-byte compression dictionary for {domain}")
+        return dict_id
+
+    def _load_dictionary(self, dict_id):
+        if dict_id == '-':
+            return None
+        with self.lock:
+            if dict_id not in self.dictionaries:
+                with open(os.path.join(self.path, 'dicts', dict_id), 'rb') as f:
+                    self.dictionaries[dict_id] = f.read()
+            return self.dictionaries[dict_id]
+
+    def _domain_pointer(self, domain):
+        return os.path.join(self.path, 'domains', domain.replace(':', '_').replace(os.sep, '_'))
+
+    def _read_domain_pointer(self, domain):
+        # O dicionário de um domínio pode ter sido treinado por outro processo (ou outra execução)
+        try:
+            with open(self._domain_pointer(domain), 'rb') as f:
+                dict_id = f.read().decode('ascii')
+        except FileNotFoundError:
+            return None
+        if dict_id:
+            with open(os.path.join(self.path, 'dicts', dict_id), 'rb') as f:
+                self.dictionaries[dict_id] = f.read()
+        return dict_id
+
+    def _write_atomic(self, path, data):
+        # Arquivo temporário + rename: leitores (e outros processos gravando o mesmo hash) nunca
+        # veem um blob pela metade
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+def _utf8_decoder():
+    return codecs.getincrementaldecoder('utf-8')('surrogatepass')
+
+
+blob_store = BlobStore()
@@ -0,0 +1,90 @@
+import re
+import threading
+from fnmatch import fnmatch
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from config import CANONICAL_STRIP_PARAMS, CANONICAL_STRIP_TRAILING_SLASH
+from .seen import ScalableBloomFilter
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+SESSION_PATH_PARAM = re.compile(r';(jsessionid|phpsessid|sid)=[^/?#]*', re.IGNORECASE)
+
+
+def remove_dot_segments(path):
+    # RFC 3986, seção 5.2.4
+    segments = path.split('/')
+    output = []
+    for segment in segments:
+        if segment == '.':
+            continue
+        if segment == '..':
+            if len(output) > 1:
+                output.pop()
+            continue
+        output.append(segment)
+    if segments[-1] in ('.', '..'):
+        output.append('')
+    return '/'.join(output)
+
+
+# Canonicalização aplicada antes da checagem de visitadas e do armazenamento: esquema/host em
+# minúsculas, sem porta padrão, sem fragmento, dot-segments resolvidos, query ordenada e sem
+# parâmetros de rastreamento/sessão (padrões fnmatch configuráveis por base de conhecimento).
+class UrlCanonicalizer:
+    def __init__(self, strip_params=CANONICAL_STRIP_PARAMS, strip_trailing_slash=CANONICAL_STRIP_TRAILING_SLASH):
+        self.strip_params = [pattern.lower() for pattern in strip_params]
+        self.strip_trailing_slash = strip_trailing_slash
+        # Fetches evitados: URLs brutas novas cuja forma canônica já era conhecida. Só as variantes
+        # alteradas pela canonicalização são lembradas, num Bloom filter (um falso positivo deixa de
+        # contar um fetch evitado, nada além disso)
+        self.fetches_saved = 0
+        self._raw_variants = ScalableBloomFilter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_configuracoes(cls, configuracoes):
+        configuracoes = configuracoes or {}
+        return cls(strip_params=configuracoes.get('strip_params', CANONICAL_STRIP_PARAMS),
+                   strip_trailing_slash=configuracoes.get('strip_trailing_slash', CANONICAL_STRIP_TRAILING_SLASH))
+
+    def is_stripped(self, name):
+        name = name.lower()
+        return any(fnmatch(name, pattern) for pattern in self.strip_params)
+
+    def canonicalize(self, url):
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        if scheme not in DEFAULT_PORTS:
+            return url
+        try:
+            port = parts.port
+        except ValueError:
+            return url
+
+        host = (parts.hostname or '').rstrip('.')
+        if ':' in host:
+            host = f"[{host}]"
+        netloc = host if port is None or port == DEFAULT_PORTS[scheme] else f"{host}:{port}"
+        if parts.username:
+            netloc = f"{parts.username}{':' + parts.password if parts.password else ''}@{netloc}"
+
+        path = remove_dot_segments(SESSION_PATH_PARAM.sub('', parts.path)) or '/'
+        if self.strip_trailing_slash and len(path) > 1 and path.endswith('/'):
+            path = path.rstrip('/') or '/'
+
+        params = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                  if not self.is_stripped(name)]
+        query = urlencode(sorted(params))
+
+        return urlunsplit((scheme, netloc, path, query, ''))
+
+    def record(self, raw_url, canonical_url, canonical_known):
+        # Conta um fetch evitado quando a URL bruta é inédita mas a canônica já estava na fronteira
+        if raw_url == canonical_url:
+            return
+        with self._lock:
+            if raw_url in self._raw_variants:
+                return
+            self._raw_variants.add(raw_url)
+            if canonical_known:
+                self.fetches_saved += 1
@@ -1,147 +1,495 @@
+from collections import namedtuple
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import urllib.robotparser
+from urllib.parse import urlparse, urldefrag
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 import threading
 import logging
 
-from models.history import History
-from .storage import Storage
-from config import MAX_LINKS_PER_PAGE, DELAY, ALLOWED_FILE_TYPES, MAX_WORKERS  # Importar configurações
-from ml.predict import classify_text
+from .storage import Storage, PageWriter, hash_content
+from .frontier import Frontier
+from .politeness import host_scheduler
+from .seen import create_seen_urls
+from .canonical import UrlCanonicalizer
+from .parsers import parse_html
+from .pipeline import ParseStage, StageStats
+from .robots import robots_cache
+from .dedup import NearDuplicateIndex, simhash
+from .download import BodyReader, BodyLimitExceeded, is_html, check_declared_length, read_response
+from .search import get_search_index
+from .sitemaps import SitemapParser, iter_sitemaps, read_sitemap, sitemap_locations
+from .metrics import (InstrumentedHTTPAdapter, start_fetch_timings, host_label, status_class, PAGES_FETCHED,
+                      HOST_REQUESTS, HOST_BYTES, ROBOTS_BLOCKED, NEAR_DUPLICATES, FETCH_PHASE_SECONDS, PARSE_SECONDS,
+                      ROBOTS_CHECK_SECONDS, SITEMAPS_FETCHED, SITEMAP_URLS)
+from config import MAX_LINKS_PER_PAGE, DELAY, ALLOWED_FILE_TYPES, MAX_WORKERS, REQUEST_TIMEOUT, WRITE_BATCH_SIZE, HTML_PARSER, PARSE_PROCESSES, PARSE_QUEUE_SIZE, MAX_BODY_SIZE, READ_DEADLINE, NEAR_DUPLICATE_DETECTION, NEAR_DUPLICATE_MAX_DISTANCE, NEAR_DUPLICATE_MIN_WORDS, SEARCH_INDEX_ENABLED, SITEMAP_DISCOVERY, SITEMAP_BATCH_SIZE, SITEMAP_MAX_URLS  # Importar configurações
 from app.state import update_status
 
-# Configurar logging para console e arquivo
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s',
-                    handlers=[
-                        logging.StreamHandler(),  # Exibir logs no console
-                        logging.FileHandler('crawler.log', mode='w')  # Salvar logs em um arquivo
-                    ])
-    
+# Resultado de um fetch: conteúdo HTML (ou None), status HTTP, validadores para o próximo GET condicional
+# e a URL final da resposta (depois dos redirecionamentos), base dos links relativos da página
+FetchResult = namedtuple('FetchResult', ['content', 'status_code', 'etag', 'last_modified', 'url'], defaults=[None])
+
+NOT_MODIFIED = 304
+
 class WebCrawler:
-    visited_urls = set()
     lock = threading.Lock()  # Lock para sincronização de threads
 
-    def __init__(self, base_url, depth, allowed_file_types=ALLOWED_FILE_TYPES, max_workers=MAX_WORKERS):
+    def __init__(self, base_url, depth, allowed_file_types=ALLOWED_FILE_TYPES, max_workers=MAX_WORKERS,
+                 politeness=host_scheduler, configuracoes=None, frontier=None, robots=robots_cache, nome=None):
         self.base_url = base_url
         self.depth = depth
-        self.current_depth = 0
+        self.nome = nome  # Base de conhecimento dona do crawl, para o progresso por base
+        self.metrics_base = nome or ''  # Label "base" das métricas
+        self.configuracoes = configuracoes or {}
         self.storage = Storage()
+        # Páginas de uma base de conhecimento também entram no índice de busca, pelo mesmo writer
+        search_index = get_search_index() if nome and self.configuracoes.get('search_index', SEARCH_INDEX_ENABLED) else None
+        self.writer = PageWriter(self.storage, batch_size=self.configuracoes.get('write_batch_size', WRITE_BATCH_SIZE),
+                                 search_index=search_index, base=nome)
         self.allowed_file_types = allowed_file_types
-        self.urls_to_visit = [(base_url, 0)]
-        self.domain = urlparse(base_url).netloc
-        self.robot_parser = self._init_robot_parser(base_url)
         self.max_links_per_page = MAX_LINKS_PER_PAGE
         self.delay = DELAY
         self.max_workers = max_workers
+        self.politeness = politeness
         self.processed_urls = []
+        self.pages_unchanged = 0  # Recrawl incremental: 304 ou hash igual ao já armazenado
+        self.incremental = self.configuracoes.get('incremental', True)
+        self.stop_requested = False  # Pausa/cancelamento: os workers param de puxar URLs da fronteira
+        self.max_body_size = self.configuracoes.get('max_body_size', MAX_BODY_SIZE)
+        self.read_deadline = self.configuracoes.get('read_deadline', READ_DEADLINE)
+        self.canonicalizer = UrlCanonicalizer.from_configuracoes(self.configuracoes)
+        self.parser_backend = self.configuracoes.get('parser', HTML_PARSER)
+        # Quase-duplicatas: a gravação de uma página nova espera o parse (SimHash do texto) e
+        # páginas parecidas demais com uma já vista não são gravadas nem expandidas
+        self.near_duplicates = None
+        self.min_words = None
+        self.pending_pages = {}
+        if self.configuracoes.get('near_duplicates', NEAR_DUPLICATE_DETECTION):
+            self.near_duplicates = NearDuplicateIndex(self.configuracoes.get('near_duplicate_max_distance', NEAR_DUPLICATE_MAX_DISTANCE))
+            self.min_words = self.configuracoes.get('near_duplicate_min_words', NEAR_DUPLICATE_MIN_WORDS)
+        # Pipeline: as threads de I/O só baixam; o parse roda num pool de processos (fora do GIL)
+        self.fetch_stats = StageStats()
+        self.parse_stage = None
+        if self.configuracoes.get('parse_processes', PARSE_PROCESSES) != 0:
+            self.parse_stage = ParseStage(self.parser_backend, self.configuracoes.get('parse_queue_size', PARSE_QUEUE_SIZE),
+                                          min_words=self.min_words,
+                                          stats=StageStats(PARSE_SECONDS, (self.metrics_base,)))
+        # A fronteira pode vir de um crawl anterior (PersistentFrontier): as sementes já
+        # registradas nela continuam definindo os domínios permitidos.
+        # Ela guarda as URLs vistas da instância (uma por base de conhecimento), na estrutura
+        # configurada, e é a única: uma URL entra uma vez e sai da fronteira uma vez
+        self.frontier = frontier if frontier is not None else Frontier(depth, seen=create_seen_urls(self.configuracoes))
+        self.writer.on_flush = self.frontier.mark_visited
+        # Sitemaps dos hosts semeados, lidos em segundo plano a partir do início do crawl (crawler/sitemaps.py)
+        self.sitemaps_enabled = self.configuracoes.get('sitemaps', SITEMAP_DISCOVERY) and depth > 0
+        self.sitemap_started = False
+        self.sitemap_roots = set()
+        self.on_sitemap_batch = None
+        self.sitemap_urls_queued = 0
+        self.sitemap_urls_unchanged = 0
+        self.domains = set()
+        # robots.txt vem do cache do processo (compartilhado entre crawls); aqui só lembramos
+        # quais hosts já tiveram o Crawl-delay repassado ao escalonador de polidez
+        self.robots = robots
+        self.configured_hosts = set()
+        self.domain = urlparse(base_url).netloc
+        for seed in self.frontier.seeds():
+            self.domains.add(urlparse(seed).netloc)
+        self.add_seed(base_url)
+        # Sessão com pool de conexões keep-alive compartilhado pelas threads
+        self.session = requests.Session()
+        # O adapter instrumentado mede DNS e conexão de cada conexão nova (crawler/metrics.py)
+        adapter = InstrumentedHTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get_robots(self, url):
+        rules = self.robots.get(url)
+        host = urlparse(url).netloc
+        if host not in self.configured_hosts:
+            self.politeness.configure_host(host, crawl_delay=rules.delay())
+            with self.lock:
+                self.configured_hosts.add(host)
+        return rules
+
+    def add_seed(self, url):
+        # Novas sementes entram na fronteira de um crawl em andamento (ex.: /add-urls)
+        fetch_url = urldefrag(url.strip())[0]
+        url = self.canonicalizer.canonicalize(url)
+        self.get_robots(url)
+        with self.lock:
+            self.domains.add(urlparse(url).netloc)
+        added = self.frontier.put(url, 0, fetch_url=fetch_url)
+        if self.sitemap_started:
+            self.discover_sitemaps(url)
+        return added
+
+    def start_sitemap_discovery(self, on_batch=None):
+        # Um leitor de sitemaps por host semeado. on_batch avisa quem espera por URLs novas fora da
+        # fronteira (os workers ociosos do motor async)
+        if not self.sitemaps_enabled:
+            return
+        self.on_sitemap_batch = on_batch
+        self.sitemap_started = True
+        for seed in self.frontier.seeds():
+            self.discover_sitemaps(seed)
+
+    def discover_sitemaps(self, url):
+        parts = urlparse(url)
+        root = f"{parts.scheme}://{parts.netloc}"
+        with self.lock:
+            if root in self.sitemap_roots:
+                return
+            self.sitemap_roots.add(root)
+        # A fronteira só termina depois que os sitemaps do host forem lidos
+        self.frontier.hold()
+        threading.Thread(target=self.read_sitemaps, args=(root,), name=f"sitemaps-{parts.netloc}", daemon=True).start()
+
+    def read_sitemaps(self, root):
+        # Os sitemaps são lidos em streaming; as URLs vão para a fronteira em lotes de SITEMAP_BATCH_SIZE
+        try:
+            batch, queued = {}, 0
+            for entry in iter_sitemaps(sitemap_locations(root, self.get_robots(root)), self.fetch_sitemap,
+                                       should_stop=lambda: self.stop_requested):
+                url = self.canonicalizer.canonicalize(entry.url)
+                # URLs já na fronteira (sementes, links) seguem o caminho normal
+                if url not in self.frontier and urlparse(url).netloc in self.domains and self.is_allowed_file_type(url):
+                    batch[url] = entry
+                if len(batch) >= SITEMAP_BATCH_SIZE:
+                    queued += self.enqueue_sitemap_urls(batch)
+                    batch = {}
+                    if queued >= SITEMAP_MAX_URLS or self.stop_requested:
+                        break
+            if batch and not self.stop_requested:
+                self.enqueue_sitemap_urls(batch)
+        except Exception as e:
+            logging.error(f"Failed to read the sitemaps of {root}: {e}")
+        finally:
+            self.frontier.task_done()
+            if self.on_sitemap_batch is not None:
+                self.on_sitemap_batch()
 
+    def fetch_sitemap(self, url):
+        # Sitemaps seguem a cortesia das páginas (Crawl-delay, recuo em 429/503) e entram nas métricas por
+        # host. A thread de leitura é só dos sitemaps, então ela espera a vaga do host em vez de adiar a URL
+        host = urlparse(url).netloc
+        while wait := self.politeness.reserve(host):
+            if self.stop_requested:
+                return
+            time.sleep(min(wait, 1))
+        status_code, retry_after = None, None
+        parser = SitemapParser()
+        start = time.monotonic()
+        try:
+            with self.session.get(url, timeout=REQUEST_TIMEOUT, stream=True) as response:
+                status_code, retry_after = response.status_code, response.headers.get('Retry-After')
+                if status_code != 200:
+                    logging.debug("No sitemap at %s: status %s", url, status_code)
+                    return
+                yield from read_sitemap(response, parser)
+        finally:
+            self.politeness.release(host, status_code, time.monotonic() - start, retry_after)
+            SITEMAPS_FETCHED.inc(self.metrics_base, str(status_code) if status_code else 'error')
+            self.record_host_fetch(url, status_code, parser.received)
 
-    def _init_robot_parser(self, base_url):
-        logging.debug(f"Initializing robot parser for {base_url}")
-        robot_parser = urllib.robotparser.RobotFileParser()
-        robots_url = urljoin(base_url, "/robots.txt")
-        robot_parser.set_url(robots_url)
-        robot_parser.read()
-        return robot_parser
+    def enqueue_sitemap_urls(self, entries):
+        # {URL canônica: SitemapEntry}. Recrawl: URLs cuja cópia armazenada é mais nova que o lastmod
+        # nem são baixadas. As demais entram na profundidade 1, as de lastmod mais recente primeiro
+        lastmods = {url: entry.lastmod for url, entry in entries.items()}
+        unchanged = self.storage.get_unchanged_since(lastmods) if self.incremental else set()
+        queued = 0
+        for url, entry in entries.items():
+            lastmod = entry.lastmod
+            if url in unchanged:
+                self.frontier.mark_seen(url)
+                with WebCrawler.lock:
+                    self.pages_unchanged += 1
+                    self.sitemap_urls_unchanged += 1
+                SITEMAP_URLS.inc(self.metrics_base, 'unchanged')
+            elif self.frontier.put(url, 1, -lastmod.timestamp() if lastmod else 0, fetch_url=entry.url):
+                queued += 1
+        with WebCrawler.lock:
+            self.sitemap_urls_queued += queued
+        SITEMAP_URLS.inc(self.metrics_base, 'queued', amount=queued)
+        if self.on_sitemap_batch is not None:
+            self.on_sitemap_batch()
+        return queued
 
     def can_fetch(self, url):
-        user_agent = "*" 
-        can_fetch = self.robot_parser.can_fetch(user_agent, url)
-        return can_fetch
+        start = time.perf_counter()
+        allowed = self.get_robots(url).can_fetch(url)
+        ROBOTS_CHECK_SECONDS.observe(time.perf_counter() - start, self.metrics_base)
+        if not allowed:
+            ROBOTS_BLOCKED.inc(self.metrics_base)
+        return allowed
 
     def is_allowed_file_type(self, url):
         if not self.can_fetch(url):
-            logging.info(f"Blocked by robots.txt: {url}")
+            logging.debug("Blocked by robots.txt: %s", url)
             return False
         parsed_url = urlparse(url)
         path = parsed_url.path
         is_allowed = any(path.endswith(ext) for ext in self.allowed_file_types)
-        logging.debug(f"Is allowed file type {url}: {is_allowed}")
+        logging.debug("Is allowed file type %s: %s", url, is_allowed)
         return is_allowed
 
-    def fetch_url(self, url):
+    def fetch(self, url, previous=None, fetch_url=None):
+        # A vaga do host já foi reservada pelo worker; aqui ela é liberada com o feedback da resposta.
+        # url é a forma canônica (host da polidez e das métricas); o GET vai para fetch_url, se houver
+        status_code, retry_after = None, None
+        reader, headers_at, read_at = None, None, None
+        timings = start_fetch_timings()
+        start = time.monotonic()
         try:
-            logging.info(f"Fetching URL: {url}")
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            if 'text/html' in response.headers['Content-Type']:
-                return response.text
+            logging.debug("Fetching URL: %s", url)
+            # stream=True: os cabeçalhos chegam antes do corpo, que só é lido se for HTML
+            with self.session.get(fetch_url or url, timeout=REQUEST_TIMEOUT, headers=self.conditional_headers(previous),
+                                  stream=True) as response:
+                headers_at = time.monotonic()
+                status_code, retry_after = response.status_code, response.headers.get('Retry-After')
+                if status_code == NOT_MODIFIED:
+                    # O 304 pode trazer validadores novos; os que faltarem continuam os armazenados
+                    return FetchResult(None, status_code, response.headers.get('ETag', previous.etag),
+                                       response.headers.get('Last-Modified', previous.last_modified), response.url)
+                response.raise_for_status()
+                etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+                if not is_html(response.headers):
+                    return FetchResult(None, status_code, etag, last_modified, response.url)
+                check_declared_length(response.headers, self.max_body_size)
+                reader = BodyReader(response.encoding, self.max_body_size, self.read_deadline)
+                read_response(response, reader)
+                read_at = time.monotonic()
+                return FetchResult(reader.text(), status_code, etag, last_modified, response.url)
+        except BodyLimitExceeded as e:
+            logging.warning(f"Discarding {url}: {e}")
         except requests.exceptions.RequestException as e:
             logging.error(f"Failed to fetch {url}: {e}")
-        return None
+        finally:
+            elapsed = time.monotonic() - start
+            self.fetch_stats.record(elapsed)
+            self.politeness.release(urlparse(url).netloc, status_code, elapsed, retry_after)
+            self.record_fetch(url, status_code, timings, start, headers_at, read_at, reader.size if reader else 0)
+        return FetchResult(None, status_code, None, None)
+
+    def record_fetch(self, url, status_code, timings, start, headers_at, read_at, body_bytes):
+        # Contadores por base e por host e latência por fase; o TTFB desconta DNS e conexão novos
+        PAGES_FETCHED.inc(self.metrics_base, str(status_code) if status_code else 'error')
+        self.record_host_fetch(url, status_code, body_bytes)
+        if timings.dns:
+            FETCH_PHASE_SECONDS.observe(timings.dns, self.metrics_base, 'dns')
+        if timings.connect:
+            FETCH_PHASE_SECONDS.observe(timings.connect, self.metrics_base, 'connect')
+        if headers_at is not None:
+            ttfb = max(headers_at - start - timings.dns - timings.connect, 0.0)
+            FETCH_PHASE_SECONDS.observe(ttfb, self.metrics_base, 'ttfb')
+        if read_at is not None:
+            FETCH_PHASE_SECONDS.observe(read_at - headers_at, self.metrics_base, 'download')
+
+    @staticmethod
+    def record_host_fetch(url, status_code, body_bytes):
+        # Páginas e sitemaps contam igual para o host
+        host = host_label(urlparse(url).netloc)
+        HOST_REQUESTS.inc(host, status_class(status_code))
+        if body_bytes:
+            HOST_BYTES.inc(host, amount=body_bytes)
+
+    @staticmethod
+    def conditional_headers(previous):
+        headers = {}
+        if previous is not None:
+            if previous.etag:
+                headers['If-None-Match'] = previous.etag
+            if previous.last_modified:
+                headers['If-Modified-Since'] = previous.last_modified
+        return headers
 
     def crawl(self):
         logging.info("Starting crawl")
-        # Processar a URL inicial
-        initial_url, initial_depth = self.urls_to_visit.pop(0)
-        if initial_url not in self.visited_urls:
-            new_urls = self.process_and_extract(initial_url, initial_depth)
-            self.urls_to_visit.extend(new_urls)
-            self.visited_urls.add(initial_url)
-            update_status(pages_extracted=len(self.visited_urls))
-
-            while self.current_depth <= self.depth and self.urls_to_visit:
-                self.process_in_threads()
-                self.current_depth += 1
-        
-        self.save_processed_urls()
-        
-    def process_in_threads(self):
+        self.writer.start()
+        self.start_sitemap_discovery()
+        # Pool de workers de vida longa: cada worker puxa da fronteira assim que um link é
+        # descoberto, sem esperar a URL mais lenta de cada nível de profundidade
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            urls_to_process = [(url, url_depth) for url, url_depth in self.urls_to_visit if url_depth <= self.depth and url not in self.visited_urls]
-            self.urls_to_visit = [item for item in self.urls_to_visit if item not in urls_to_process]
-            
-            futures = {executor.submit(self.process_and_extract, url, depth): url for url, depth in urls_to_process}
-                
-            for future in as_completed(futures):
-                url = futures.pop(future)
-                try:
-                    new_urls = future.result()
-                    self.urls_to_visit.extend(new_urls)
-                except Exception as e:
-                    print(f"URL failed: {url} with exception {e}")
-                finally:
-                    update_status(pages_extracted=len(self.visited_urls))
-
-    def process_and_extract(self, url, current_depth):
-        new_urls = []
+            workers = [executor.submit(self.worker) for _ in range(self.max_workers)]
+            for worker in workers:
+                worker.result()
+
+        self.save_processed_urls()
+
+    def worker(self):
+        while not self.stop_requested:
+            item = self.frontier.get()
+            if item is None:
+                return
+            self.process_item(*item)
+
+    def process_item(self, url, url_depth, fetch_url=None):
+        # Processa uma URL já retirada da fronteira; também usado pelo escalonador central (app/scheduler.py)
+        handed_off = False
         try:
-            content = self.fetch_url(url)
-            self.processed_urls.append((url, content))
-            self.visited_urls.add(url)
-            
-            if current_depth < self.depth:
-                new_urls = self.extract_links(content, current_depth)
+            # Host em espera: a URL volta para a fronteira e o worker segue com outros hosts
+            wait = self.politeness.reserve(urlparse(url).netloc)
+            if wait:
+                self.frontier.defer(url, url_depth, wait, fetch_url)
+                return
+            content, page_url = self.fetch_and_store(url, fetch_url)
+            if content and self.needs_parse(url_depth):
+                if self.parse_stage is not None:
+                    # A URL só sai da fronteira (task_done) quando o parse terminar
+                    self.parse_stage.submit(content, page_url, lambda page, error, url=url, url_depth=url_depth:
+                                            self.on_parsed(url, url_depth, page, error))
+                    handed_off = True
+                else:
+                    self.handle_page(url, url_depth, self.parse_page(content, page_url))
         except Exception as e:
-            print(f"Failed to fetch {url}: {e}")
-        return new_urls
-    
-    def extract_links(self, html, current_depth):
-        logging.info(f"Extracting links at depth: {current_depth}")
-        soup = BeautifulSoup(html, 'html.parser')
+            logging.error(f"URL failed: {url} with exception {e}")
+            self.flush_pending(url)
+        finally:
+            if not handed_off:
+                self.frontier.task_done()
+            update_status(pages_extracted=len(self.processed_urls), nome=self.nome)
+
+    def on_parsed(self, url, url_depth, page, error):
+        try:
+            if error is not None:
+                logging.error(f"Failed to parse {url}: {error}")
+                self.flush_pending(url)
+            else:
+                self.handle_page(url, url_depth, page)
+        except Exception as e:
+            logging.error(f"URL failed: {url} with exception {e}")
+        finally:
+            self.frontier.task_done()
+
+    def fetch_and_store(self, url, fetch_url=None):
+        # Devolve o conteúdo e a URL contra a qual os links da página são resolvidos: a da resposta,
+        # depois dos redirecionamentos, e não a forma canônica (que pode ter perdido a barra final)
+        previous = self.load_previous_version(url)
+        result = self.fetch(url, previous, fetch_url)
+        return self.store_result(url, result, previous), result.url or fetch_url or url
+
+    def get_previous_version(self, url):
+        return self.storage.get_validators(url) if self.incremental else None
+
+    def load_previous_version(self, url):
+        # Chamado com a vaga do host já reservada, antes do fetch() que a libera: se a leitura falhar,
+        # a vaga é liberada aqui, senão o host ficaria bloqueado pelo resto do crawl
+        try:
+            return self.get_previous_version(url)
+        except Exception:
+            self.politeness.release(urlparse(url).netloc)
+            raise
+
+    def store_result(self, url, result, previous):
+        # Só páginas novas ou com hash diferente vão para o banco; num 304 os links saem da cópia armazenada.
+        # Páginas inalteradas passam pelo writer só com os validadores (e são marcadas como visitadas)
+        if result.status_code == NOT_MODIFIED:
+            self.record_unchanged(url, result)
+            content = self.storage.get_content(url)
+        elif result.content is None and previous is not None:
+            # Recrawl sem corpo (5xx, timeout, corpo descartado): a linha e o blob armazenados continuam valendo
+            content = None
+        else:
+            content = result.content
+            content_hash = hash_content(content)
+            if previous is not None and previous.content_hash == content_hash:
+                self.record_unchanged(url, result)
+            elif content and self.near_duplicates is not None:
+                # Gravação adiada até o parse dizer se a página é uma quase-duplicata
+                self.pending_pages[url] = (content, result.etag, result.last_modified, content_hash)
+            else:
+                self.writer.put(url, content, result.etag, result.last_modified, content_hash)
+        self.processed_urls.append(url)
+        return content
+
+    def record_unchanged(self, url, result):
+        with self.lock:
+            self.pages_unchanged += 1
+        self.writer.put_validators(url, result.etag, result.last_modified)
+
+    def needs_parse(self, current_depth):
+        # Com a deduplicação ou o índice de busca ligados, páginas na profundidade máxima também passam pelo parse
+        return current_depth < self.depth or self.near_duplicates is not None or self.writer.search_index is not None
+
+    def handle_page(self, url, current_depth, page):
+        if self.accept_page(url, page) and current_depth < self.depth:
+            self.expand(page, current_depth)
+
+    def accept_page(self, url, page):
+        # Grava a página adiada e indexa o texto, a menos que ela seja quase-duplicata de uma já vista
+        if self.near_duplicates is not None:
+            fingerprint = page.simhash if page.simhash is not None else simhash(page.main_text, self.min_words)
+            original = self.near_duplicates.check(url, fingerprint) if fingerprint is not None else None
+            if original is not None:
+                logging.debug("Near-duplicate of %s: %s", original, url)
+                NEAR_DUPLICATES.inc(self.metrics_base)
+                self.pending_pages.pop(url, None)
+                self.frontier.mark_visited([url])
+                return False
+            self.flush_pending(url)
+        self.writer.put_text(url, page.text)
+        return True
+
+    def flush_pending(self, url):
+        pending = self.pending_pages.pop(url, None)
+        if pending is not None:
+            self.writer.put(url, *pending)
+
+    def expand(self, page, current_depth):
+        for new_url, new_depth, fetch_url in self.filter_links(page.links, current_depth):
+            self.frontier.put(new_url, new_depth, fetch_url=fetch_url)
+
+    def parse_page(self, html, page_url):
+        # Links (respeitando <base href>) e texto visível numa única passada do parser configurado
+        start = time.process_time()
+        page = parse_html(html, page_url, self.parser_backend)
+        PARSE_SECONDS.observe(time.process_time() - start, self.metrics_base)
+        return page
+
+    def filter_links(self, hrefs, current_depth):
+        logging.debug("Extracting links at depth: %s", current_depth)
         links = []
         links_extracted = 0
-        for link in soup.find_all('a', href=True):
+        for raw_href in hrefs:
             if links_extracted >= self.max_links_per_page:
                 break
-            href = urljoin(self.base_url, link['href'])
+            href = self.canonicalizer.canonicalize(raw_href)
             parsed_href = urlparse(href)
-            if parsed_href.netloc == self.domain and self.is_allowed_file_type(href):
-                with WebCrawler.lock:
-                    if href not in WebCrawler.visited_urls:
-                        links.append((href, current_depth+1))
-                        links_extracted += 1
-        logging.info(f"Extracted {links_extracted} links")
+            if parsed_href.netloc in self.domains and self.is_allowed_file_type(href):
+                known = href in self.frontier
+                self.canonicalizer.record(raw_href, href, known)
+                if not known:
+                    links.append((href, current_depth+1, urldefrag(raw_href)[0]))
+                    links_extracted += 1
+        logging.debug("Extracted %s links", links_extracted)
         return links
 
     def save_processed_urls(self):
-        logging.info("Saving processed URLs to the database")
-        for url, content in self.processed_urls:
-            self.storage.save_page(url, content)
+        # As páginas já foram gravadas em lotes durante o crawl; aqui só entregamos os parses
+        # pendentes e esvaziamos o buffer
+        if self.parse_stage is not None:
+            self.parse_stage.close()
+        logging.info("Flushing pending pages to the database")
+        self.writer.close()
 
     def get_total_links_extracted(self):
         return len(self.processed_urls)
+
+    def get_stage_stats(self):
+        stats = {'fetch': self.fetch_stats.snapshot(), 'robots': self.robots.stats()}
+        if self.parse_stage is not None:
+            stats['parse'] = dict(self.parse_stage.stats.snapshot(), queue_depth=self.parse_stage.queue_depth(),
+                                  queue_size=self.parse_stage.queue_size)
+        return stats
+
+    def get_pages_unchanged(self):
+        return self.pages_unchanged
+
+    def get_fetches_saved(self):
+        return self.canonicalizer.fetches_saved
+
+    def get_sitemap_report(self):
+        return {'urls_enfileiradas': self.sitemap_urls_queued, 'urls_inalteradas': self.sitemap_urls_unchanged}
+
+    def get_duplicate_report(self):
+        return self.near_duplicates.report() if self.near_duplicates is not None else None
     
\ No newline at end of file
@@ -0,0 +1,90 @@
+import hashlib
+import threading
+from collections import Counter
+
+import numpy as np
+
+from config import (NEAR_DUPLICATE_MAX_DISTANCE, NEAR_DUPLICATE_MIN_WORDS, NEAR_DUPLICATE_SHINGLE_SIZE,
+                    NEAR_DUPLICATE_REPORT_LIMIT)
+
+FINGERPRINT_BITS = 64
+
+
+def simhash(text, min_words=NEAR_DUPLICATE_MIN_WORDS, shingle_size=NEAR_DUPLICATE_SHINGLE_SIZE):
+    # SimHash de 64 bits sobre shingles de palavras pesados pela frequência: textos parecidos
+    # diferem em poucos bits. Textos curtos demais (menus, páginas de erro) devolvem None e não
+    # entram na deduplicação.
+    words = text.lower().split()
+    if len(words) < max(min_words, 1):
+        return None
+    features = Counter(' '.join(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1)))
+    hashes = np.fromiter((int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+                          for feature in features), dtype=np.uint64, count=len(features))
+    weights = np.fromiter(features.values(), dtype=np.int64, count=len(features))
+    # Cada bit do fingerprint é o sinal da soma dos pesos a favor (bit 1) e contra (bit 0)
+    bits = np.unpackbits(hashes.view(np.uint8)).reshape(-1, FINGERPRINT_BITS).astype(np.int64)
+    votes = (bits * 2 - 1).T @ weights > 0
+    return int.from_bytes(np.packbits(votes).tobytes(), 'big')
+
+
+# Índice de fingerprints para busca por distância de Hamming: com até max_distance bits de
+# diferença, dois fingerprints coincidem em pelo menos um de max_distance + 1 blocos (princípio
+# da casa dos pombos), então cada consulta só compara os candidatos que batem em algum bloco.
+class NearDuplicateIndex:
+    def __init__(self, max_distance=NEAR_DUPLICATE_MAX_DISTANCE):
+        self.max_distance = max_distance
+        blocks = max_distance + 1
+        widths = [FINGERPRINT_BITS // blocks + (1 if i < FINGERPRINT_BITS % blocks else 0) for i in range(blocks)]
+        self.blocks = []
+        shift = 0
+        for width in widths:
+            self.blocks.append((shift, (1 << width) - 1))
+            shift += width
+        self.tables = [{} for _ in self.blocks]
+        self.clusters = {}  # URL original -> [(URL duplicada, distância)]
+        self.duplicates = 0
+        self.lock = threading.Lock()
+
+    def keys(self, fingerprint):
+        # Valor do fingerprint em cada bloco, na ordem dos blocos
+        return [(fingerprint >> shift) & mask for shift, mask in self.blocks]
+
+    def check(self, url, fingerprint):
+        # Devolve a URL original se a página é quase-duplicata de uma já vista; senão a indexa
+        keys = self.keys(fingerprint)
+        with self.lock:
+            for table, key in zip(self.tables, keys):
+                for other_fingerprint, other_url in table.get(key, ()):
+                    distance = (fingerprint ^ other_fingerprint).bit_count()
+                    if distance <= self.max_distance:
+                        self.clusters.setdefault(other_url, []).append((url, distance))
+                        self.duplicates += 1
+                        return other_url
+            for table, key in zip(self.tables, keys):
+                table.setdefault(key, []).append((fingerprint, url))
+            return None
+
+    def report(self, limit=NEAR_DUPLICATE_REPORT_LIMIT):
+        with self.lock:
+            return duplicate_report(self.clusters, self.duplicates, limit)
+
+
+def duplicate_report(clusters, duplicates, limit=NEAR_DUPLICATE_REPORT_LIMIT):
+    # Relatório por base: total de duplicatas e os maiores clusters (original + quase-duplicatas).
+    # clusters: URL original -> [(URL duplicada, distância)]
+    clusters = sorted(clusters.items(), key=lambda cluster: len(cluster[1]), reverse=True)
+    return {
+        'paginas_duplicadas': duplicates,
+        'clusters': [{'url': url, 'duplicadas': [duplicate for duplicate, _ in cluster]}
+                     for url, cluster in clusters[:limit]],
+    }
+
+
+def merge_duplicate_reports(total, report, limit=NEAR_DUPLICATE_REPORT_LIMIT):
+    # Soma os relatórios de dois trechos do mesmo crawl (pausado e retomado); clusters do mesmo original são unidos
+    if total is None or report is None:
+        return report if total is None else total
+    clusters = {}
+    for cluster in total['clusters'] + report['clusters']:
+        clusters.setdefault(cluster['url'], []).extend((url, None) for url in cluster['duplicadas'])
+    return duplicate_report(clusters, total['paginas_duplicadas'] + report['paginas_duplicadas'], limit)
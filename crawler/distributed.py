@@ -0,0 +1,532 @@
+import abc
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from urllib.parse import urlparse, urldefrag
+
+from config import (SHARED_FRONTIER_BACKEND, SHARED_FRONTIER_PATH, DISTRIBUTED_LEASE_SIZE, DISTRIBUTED_LEASE_SECONDS,
+                    DISTRIBUTED_POLL_INTERVAL, NEAR_DUPLICATE_REPORT_LIMIT, WRITE_BATCH_SIZE, SEARCH_INDEX_ENABLED)
+from .canonical import UrlCanonicalizer
+from .core import WebCrawler
+from .dedup import FINGERPRINT_BITS, NearDuplicateIndex, duplicate_report
+from .frontier import Frontier, add_missing_column
+from .log import configure_logging
+
+# URL cedida a um worker: base de conhecimento, URL canônica, profundidade e a URL a baixar
+Lease = namedtuple('Lease', ['kb', 'url', 'depth', 'fetch_url'])
+
+
+FINGERPRINT_MASK = (1 << FINGERPRINT_BITS) - 1
+
+
+def _signed(fingerprint):
+    # O INTEGER do SQLite tem sinal: fingerprints de 64 bits são guardados em complemento de dois
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >> (FINGERPRINT_BITS - 1) else fingerprint
+
+
+# Fronteira compartilhada entre o coordenador (API) e os workers, que podem estar em outros
+# processos ou máquinas. Também é o registro de deduplicação: cada (base, URL) entra uma vez só.
+# Os workers arrendam lotes de URLs de um único host por vez; um arrendamento vencido (worker
+# que morreu ou travou) devolve as URLs para a fila. As páginas baixadas voltam ao coordenador
+# por ela, junto com os links, e os fingerprints de quase-duplicatas são compartilhados entre
+# os workers: nenhum worker grava no próprio storage.db.
+class SharedFrontier(abc.ABC):
+    @abc.abstractmethod
+    def submit(self, kb, seeds, max_depth, configuracoes=None):
+        pass
+
+    @abc.abstractmethod
+    def knowledge_base(self, kb):
+        pass
+
+    @abc.abstractmethod
+    def lease(self, worker_id, max_items=DISTRIBUTED_LEASE_SIZE, lease_seconds=DISTRIBUTED_LEASE_SECONDS):
+        pass
+
+    @abc.abstractmethod
+    def heartbeat(self, worker_id, lease_seconds=DISTRIBUTED_LEASE_SECONDS):
+        pass
+
+    @abc.abstractmethod
+    def complete(self, worker_id, kb, url, links, pages=()):
+        # pages: itens do ReportingPageWriter, entregues na mesma transação que marca a URL como feita
+        pass
+
+    @abc.abstractmethod
+    def enqueue(self, kb, links):
+        # Lado do coordenador (sitemaps): links (URL canônica, profundidade, URL a baixar, prioridade);
+        # devolve quantas URLs eram novas. Prioridade menor sai antes dentro da mesma profundidade
+        pass
+
+    @abc.abstractmethod
+    def contains(self, kb, url):
+        pass
+
+    @abc.abstractmethod
+    def mark_unchanged(self, kb, urls):
+        # URLs que não precisam ser baixadas (cópia armazenada mais nova que o lastmod do sitemap)
+        pass
+
+    @abc.abstractmethod
+    def take_pages(self, kb, limit=WRITE_BATCH_SIZE):
+        # Lado do coordenador: retira até limit páginas entregues pelos workers
+        pass
+
+    @abc.abstractmethod
+    def check_near_duplicate(self, kb, url, fingerprint, keys, max_distance):
+        # Mesmo contrato de NearDuplicateIndex.check, com os valores do fingerprint por bloco já calculados
+        pass
+
+    @abc.abstractmethod
+    def near_duplicate_report(self, kb, limit=NEAR_DUPLICATE_REPORT_LIMIT):
+        pass
+
+    @abc.abstractmethod
+    def progress(self, kb):
+        pass
+
+    @abc.abstractmethod
+    def finished(self, kb=None):
+        pass
+
+    @abc.abstractmethod
+    def clear(self, kb):
+        pass
+
+
+class SQLiteSharedFrontier(SharedFrontier):
+    def __init__(self, path=SHARED_FRONTIER_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS shared_kbs (
+                                kb TEXT PRIMARY KEY,
+                                seeds TEXT NOT NULL,
+                                max_depth INTEGER NOT NULL,
+                                configuracoes TEXT NOT NULL)""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS shared_urls (
+                                kb TEXT NOT NULL,
+                                url TEXT NOT NULL,
+                                depth INTEGER NOT NULL,
+                                host TEXT NOT NULL,
+                                state TEXT NOT NULL DEFAULT 'pending',
+                                owner TEXT,
+                                expires REAL,
+                                fetch_url TEXT,
+                                priority REAL NOT NULL DEFAULT 0,
+                                PRIMARY KEY (kb, url))""")
+            add_missing_column(conn, 'shared_urls', 'fetch_url', 'TEXT')
+            add_missing_column(conn, 'shared_urls', 'priority', 'REAL NOT NULL DEFAULT 0')
+            conn.execute("CREATE INDEX IF NOT EXISTS shared_urls_state_host ON shared_urls (state, host)")
+            conn.execute("""CREATE TABLE IF NOT EXISTS host_leases (
+                                host TEXT PRIMARY KEY,
+                                owner TEXT NOT NULL,
+                                expires REAL NOT NULL)""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS shared_pages (
+                                kb TEXT NOT NULL,
+                                page TEXT NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS shared_pages_kb ON shared_pages (kb)")
+            conn.execute("""CREATE TABLE IF NOT EXISTS shared_fingerprints (
+                                kb TEXT NOT NULL,
+                                block INTEGER NOT NULL,
+                                key INTEGER NOT NULL,
+                                fingerprint INTEGER NOT NULL,
+                                url TEXT NOT NULL,
+                                PRIMARY KEY (kb, block, key, url))""")
+            conn.execute("""CREATE TABLE IF NOT EXISTS shared_duplicates (
+                                kb TEXT NOT NULL,
+                                url TEXT NOT NULL,
+                                original TEXT NOT NULL,
+                                distance INTEGER NOT NULL,
+                                PRIMARY KEY (kb, url))""")
+
+    def _connection(self):
+        # Uma conexão por thread, em autocommit: as transações são abertas explicitamente
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _rows(kb, links):
+        # (URL canônica, profundidade[, URL como foi encontrada]); a última só é guardada se difere
+        rows = []
+        for url, depth, *fetch_url in links:
+            fetch_url = fetch_url[0] if fetch_url and fetch_url[0] != url else None
+            rows.append((kb, url, depth, urlparse(url).netloc, fetch_url))
+        return rows
+
+    def submit(self, kb, seeds, max_depth, configuracoes=None):
+        # As sementes entram canonicalizadas, como no crawl local, e são baixadas como foram informadas
+        canonicalizer = UrlCanonicalizer.from_configuracoes(configuracoes)
+        links = [(canonicalizer.canonicalize(seed), 0, urldefrag(seed.strip())[0]) for seed in seeds]
+        with self._transaction() as conn:
+            row = conn.execute("SELECT seeds FROM shared_kbs WHERE kb = ?", (kb,)).fetchone()
+            all_seeds = json.loads(row[0]) if row else []
+            all_seeds += [seed for seed in seeds if seed not in all_seeds]
+            conn.execute("INSERT OR REPLACE INTO shared_kbs (kb, seeds, max_depth, configuracoes) VALUES (?, ?, ?, ?)",
+                         (kb, json.dumps(all_seeds), max_depth, json.dumps(configuracoes or {})))
+            conn.executemany("INSERT OR IGNORE INTO shared_urls (kb, url, depth, host, fetch_url) VALUES (?, ?, ?, ?, ?)",
+                             self._rows(kb, links))
+
+    def knowledge_base(self, kb):
+        row = self._connection().execute("SELECT seeds, max_depth, configuracoes FROM shared_kbs WHERE kb = ?",
+                                         (kb,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], json.loads(row[2])
+
+    def lease(self, worker_id, max_items=DISTRIBUTED_LEASE_SIZE, lease_seconds=DISTRIBUTED_LEASE_SECONDS):
+        now = time.time()
+        with self._transaction() as conn:
+            # Arrendamentos vencidos voltam para a fila
+            conn.execute("""UPDATE shared_urls SET state = 'pending', owner = NULL, expires = NULL
+                            WHERE state = 'leased' AND expires < ?""", (now,))
+            conn.execute("DELETE FROM host_leases WHERE expires < ?", (now,))
+            # Um host fica com um worker por vez: a cortesia por host vale entre processos
+            row = conn.execute("""SELECT host FROM shared_urls
+                                  WHERE state = 'pending'
+                                    AND host NOT IN (SELECT host FROM host_leases WHERE owner != ?)
+                                  ORDER BY depth, priority, rowid LIMIT 1""", (worker_id,)).fetchone()
+            if row is None:
+                return []
+            host, expires = row[0], now + lease_seconds
+            conn.execute("INSERT OR REPLACE INTO host_leases (host, owner, expires) VALUES (?, ?, ?)",
+                         (host, worker_id, expires))
+            leases = [Lease(*lease) for lease in conn.execute(
+                """SELECT kb, url, depth, COALESCE(fetch_url, url) FROM shared_urls WHERE state = 'pending' AND host = ?
+                   ORDER BY depth, priority, rowid LIMIT ?""", (host, max_items))]
+            conn.executemany("UPDATE shared_urls SET state = 'leased', owner = ?, expires = ? WHERE kb = ? AND url = ?",
+                             [(worker_id, expires, lease.kb, lease.url) for lease in leases])
+            return leases
+
+    def heartbeat(self, worker_id, lease_seconds=DISTRIBUTED_LEASE_SECONDS):
+        expires = time.time() + lease_seconds
+        with self._transaction() as conn:
+            conn.execute("UPDATE shared_urls SET expires = ? WHERE state = 'leased' AND owner = ?", (expires, worker_id))
+            conn.execute("UPDATE host_leases SET expires = ? WHERE owner = ?", (expires, worker_id))
+
+    def complete(self, worker_id, kb, url, links, pages=()):
+        # Marca a URL como processada, guarda as páginas para o coordenador, enfileira os links
+        # descobertos e, se era a última URL arrendada daquele host, libera o host para outros workers
+        host = urlparse(url).netloc
+        with self._transaction() as conn:
+            conn.execute("UPDATE shared_urls SET state = 'done', owner = NULL, expires = NULL WHERE kb = ? AND url = ?",
+                         (kb, url))
+            conn.executemany("INSERT INTO shared_pages (kb, page) VALUES (?, ?)",
+                             [(kb, json.dumps(page)) for page in pages])
+            conn.executemany("INSERT OR IGNORE INTO shared_urls (kb, url, depth, host, fetch_url) VALUES (?, ?, ?, ?, ?)",
+                             self._rows(kb, links))
+            conn.execute("""DELETE FROM host_leases WHERE host = ? AND owner = ? AND NOT EXISTS
+                            (SELECT 1 FROM shared_urls WHERE host = ? AND owner = ? AND state = 'leased')""",
+                         (host, worker_id, host, worker_id))
+
+    def enqueue(self, kb, links):
+        rows = [(kb, url, depth, urlparse(url).netloc, fetch_url if fetch_url != url else None, priority)
+                for url, depth, fetch_url, priority in links]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO shared_urls (kb, url, depth, host, fetch_url, priority) "
+                             "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return conn.total_changes - before
+
+    def contains(self, kb, url):
+        return self._connection().execute("SELECT 1 FROM shared_urls WHERE kb = ? AND url = ?",
+                                          (kb, url)).fetchone() is not None
+
+    def mark_unchanged(self, kb, urls):
+        # Registradas como 'unchanged': os links dos workers para elas são ignorados, e elas não contam como baixadas
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO shared_urls (kb, url, depth, host, state) VALUES (?, ?, 1, ?, 'unchanged')",
+                             [(kb, url, urlparse(url).netloc) for url in urls])
+
+    def take_pages(self, kb, limit=WRITE_BATCH_SIZE):
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT rowid, page FROM shared_pages WHERE kb = ? ORDER BY rowid LIMIT ?",
+                                (kb, limit)).fetchall()
+            conn.executemany("DELETE FROM shared_pages WHERE rowid = ?", [(rowid,) for rowid, _ in rows])
+        return [json.loads(page) for _, page in rows]
+
+    def check_near_duplicate(self, kb, url, fingerprint, keys, max_distance):
+        # Consulta e inserção na mesma transação: dois workers não indexam duas cópias da mesma página
+        with self._transaction() as conn:
+            for block, key in enumerate(keys):
+                for other_fingerprint, other_url in conn.execute(
+                        "SELECT fingerprint, url FROM shared_fingerprints WHERE kb = ? AND block = ? AND key = ?",
+                        (kb, block, key)):
+                    distance = (fingerprint ^ (other_fingerprint & FINGERPRINT_MASK)).bit_count()
+                    # A própria URL já indexada (arrendamento vencido e refeito) não conta
+                    if other_url != url and distance <= max_distance:
+                        conn.execute("INSERT OR IGNORE INTO shared_duplicates (kb, url, original, distance) "
+                                     "VALUES (?, ?, ?, ?)", (kb, url, other_url, distance))
+                        return other_url
+            conn.executemany("INSERT OR IGNORE INTO shared_fingerprints (kb, block, key, fingerprint, url) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             [(kb, block, key, _signed(fingerprint), url) for block, key in enumerate(keys)])
+            return None
+
+    def near_duplicate_report(self, kb, limit=NEAR_DUPLICATE_REPORT_LIMIT):
+        clusters = {}
+        rows = self._connection().execute(
+            "SELECT original, url, distance FROM shared_duplicates WHERE kb = ? ORDER BY rowid", (kb,)).fetchall()
+        for original, url, distance in rows:
+            clusters.setdefault(original, []).append((url, distance))
+        return duplicate_report(clusters, len(rows), limit)
+
+    def progress(self, kb):
+        counts = dict(self._connection().execute(
+            "SELECT state, COUNT(*) FROM shared_urls WHERE kb = ? GROUP BY state", (kb,)).fetchall())
+        return {state: counts.get(state, 0) for state in ('pending', 'leased', 'done')}
+
+    def finished(self, kb=None):
+        query = "SELECT 1 FROM shared_urls WHERE state IN ('pending', 'leased')"
+        params = ()
+        if kb is not None:
+            query += " AND kb = ?"
+            params = (kb,)
+        return self._connection().execute(query + " LIMIT 1", params).fetchone() is None
+
+    def clear(self, kb):
+        with self._transaction() as conn:
+            for table in ('shared_urls', 'shared_kbs', 'shared_pages', 'shared_fingerprints', 'shared_duplicates'):
+                conn.execute(f"DELETE FROM {table} WHERE kb = ?", (kb,))
+
+
+SHARED_FRONTIER_BACKENDS = {
+    'sqlite': SQLiteSharedFrontier,
+}
+
+
+def create_shared_frontier(backend=SHARED_FRONTIER_BACKEND, path=SHARED_FRONTIER_PATH):
+    if backend not in SHARED_FRONTIER_BACKENDS:
+        raise ValueError(f"Fronteira compartilhada '{backend}' não reconhecida")
+    return SHARED_FRONTIER_BACKENDS[backend](path)
+
+
+def submit_knowledge_base(frontier, kb, urls, profundidade, configuracoes=None):
+    # Lado do coordenador
+    frontier.submit(kb, urls, profundidade, configuracoes)
+
+
+# Fronteira compartilhada de uma base vista com a interface da Frontier usada pela leitura de sitemaps
+# do WebCrawler (crawler/core.py). hold()/task_done() contam as leituras em andamento: o coordenador
+# só encerra a base quando elas terminam
+class SharedSitemapFrontier:
+    def __init__(self, frontier, kb):
+        self.frontier = frontier
+        self.kb = kb
+        self._lock = threading.Lock()
+        self._holds = 0
+
+    def seeds(self):
+        return self.frontier.knowledge_base(self.kb)[0]
+
+    def put(self, url, depth, priority=0, fetch_url=None):
+        return self.frontier.enqueue(self.kb, [(url, depth, fetch_url, priority)]) > 0
+
+    def mark_seen(self, url):
+        self.frontier.mark_unchanged(self.kb, [url])
+
+    def mark_visited(self, urls):
+        pass
+
+    def hold(self):
+        with self._lock:
+            self._holds += 1
+
+    def task_done(self):
+        with self._lock:
+            self._holds -= 1
+
+    @property
+    def in_flight(self):
+        with self._lock:
+            return self._holds
+
+    def __contains__(self, url):
+        return self.frontier.contains(self.kb, url)
+
+
+def start_sitemap_discovery(frontier, kb):
+    # Lado do coordenador: os sitemaps das sementes são lidos uma vez, aqui, e as URLs vão para a fronteira
+    # compartilhada (profundidade 1, lastmod mais recente primeiro). As cópias ficam no storage do
+    # coordenador, então é ele quem sabe quais URLs não mudaram desde o último download.
+    # Devolve o crawler da leitura (get_sitemap_report) ou None se a base não lê sitemaps
+    seeds, max_depth, configuracoes = frontier.knowledge_base(kb)
+    configuracoes = dict(configuracoes, parse_processes=0, search_index=False)
+    crawler = WebCrawler(base_url=seeds[0], depth=max_depth, configuracoes=configuracoes,
+                         frontier=SharedSitemapFrontier(frontier, kb), nome=kb)
+    if not crawler.sitemaps_enabled:
+        return None
+    crawler.start_sitemap_discovery()
+    return crawler
+
+
+def ingest_pages(frontier, kb, writer):
+    # Lado do coordenador: as páginas entregues pelos workers entram no storage e no índice de busca dele
+    while pages := frontier.take_pages(kb):
+        for page in pages:
+            if 'text' in page:
+                writer.put_text(page['url'], page['text'])
+            elif page.pop('unchanged', False):
+                writer.put_validators(**page)
+            else:
+                writer.put(**page)
+
+
+# Writer do worker: no lugar do PageWriter, guarda as páginas e os textos da URL arrendada até o
+# complete() entregá-los ao coordenador, que é quem grava e indexa
+class ReportingPageWriter:
+    def __init__(self, index_text=False):
+        self.search_index = True if index_text else None  # O crawler só confere se há índice
+        self.pages = []
+
+    def start(self):
+        return self
+
+    def put(self, url, content, etag=None, last_modified=None, content_hash=None):
+        self.pages.append({'url': url, 'content': content, 'etag': etag, 'last_modified': last_modified,
+                           'content_hash': content_hash})
+
+    def put_validators(self, url, etag=None, last_modified=None):
+        self.pages.append({'url': url, 'etag': etag, 'last_modified': last_modified, 'unchanged': True})
+
+    def put_text(self, url, text):
+        if self.search_index is not None:
+            self.pages.append({'url': url, 'text': text})
+
+    def full(self):
+        return False
+
+    def drain(self):
+        pages, self.pages = self.pages, []
+        return pages
+
+    def close(self):
+        pass
+
+
+# Índice de quase-duplicatas do worker: a consulta vai para a fronteira compartilhada, então uma
+# página é comparada com as já vistas por todos os workers da base
+class SharedNearDuplicateIndex(NearDuplicateIndex):
+    def __init__(self, frontier, kb, max_distance):
+        super().__init__(max_distance)
+        self.frontier = frontier
+        self.kb = kb
+
+    def check(self, url, fingerprint):
+        return self.frontier.check_near_duplicate(self.kb, url, fingerprint, self.keys(fingerprint), self.max_distance)
+
+    def report(self, limit=NEAR_DUPLICATE_REPORT_LIMIT):
+        return self.frontier.near_duplicate_report(self.kb, limit)
+
+
+# Worker de crawl distribuído: arrenda URLs da fronteira compartilhada, baixa e faz o parse
+# localmente (com as regras de filtro de um WebCrawler da base) e devolve as páginas e os links novos
+class DistributedWorker:
+    def __init__(self, frontier, worker_id=None, lease_size=DISTRIBUTED_LEASE_SIZE,
+                 lease_seconds=DISTRIBUTED_LEASE_SECONDS, poll_interval=DISTRIBUTED_POLL_INTERVAL):
+        self.frontier = frontier
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_size = lease_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.crawlers = {}
+        self.pages_processed = 0
+
+    def crawler_for(self, kb):
+        crawler = self.crawlers.get(kb)
+        if crawler is None:
+            seeds, max_depth, configuracoes = self.frontier.knowledge_base(kb)
+            # O próprio processo worker é a unidade de paralelismo: parse inline, sem pool. As cópias
+            # armazenadas ficam com o coordenador, então o worker não faz requisições condicionais
+            # Os sitemaps são lidos pelo coordenador (start_sitemap_discovery)
+            index_text = configuracoes.get('search_index', SEARCH_INDEX_ENABLED)
+            configuracoes = dict(configuracoes, parse_processes=0, incremental=False, search_index=False, sitemaps=False)
+            crawler = WebCrawler(base_url=seeds[0], depth=max_depth, configuracoes=configuracoes,
+                                 frontier=Frontier(max_depth), nome=kb)
+            for seed in seeds[1:]:
+                crawler.add_seed(seed)
+            crawler.writer = ReportingPageWriter(index_text)
+            if crawler.near_duplicates is not None:
+                crawler.near_duplicates = SharedNearDuplicateIndex(self.frontier, kb, crawler.near_duplicates.max_distance)
+            self.crawlers[kb] = crawler
+        return crawler
+
+    def process(self, lease):
+        links = []
+        try:
+            crawler = self.crawler_for(lease.kb)
+            host = urlparse(lease.url).netloc
+            wait = crawler.politeness.reserve(host)
+            while wait:
+                time.sleep(wait)
+                wait = crawler.politeness.reserve(host)
+            content, page_url = crawler.fetch_and_store(lease.url, lease.fetch_url)
+            if content and crawler.needs_parse(lease.depth):
+                page = crawler.parse_page(content, page_url)
+                if crawler.accept_page(lease.url, page) and lease.depth < crawler.depth:
+                    links = crawler.filter_links(page.links, lease.depth)
+        except Exception as e:
+            logging.error(f"URL failed: {lease.url} with exception {e}")
+        pages = []
+        crawler = self.crawlers.get(lease.kb)
+        if crawler is not None:
+            crawler.flush_pending(lease.url)  # Página adiada cujo parse falhou: é gravada mesmo assim
+            pages = crawler.writer.drain()
+        self.frontier.complete(self.worker_id, lease.kb, lease.url, links, pages)
+        self.pages_processed += 1
+
+    def run(self, stop_when_idle=False):
+        logging.info(f"Distributed worker {self.worker_id} started")
+        try:
+            while True:
+                leases = self.frontier.lease(self.worker_id, self.lease_size, self.lease_seconds)
+                if not leases:
+                    if stop_when_idle and self.frontier.finished():
+                        return
+                    time.sleep(self.poll_interval)
+                    continue
+                for lease in leases:
+                    self.process(lease)
+                    self.frontier.heartbeat(self.worker_id, self.lease_seconds)
+        finally:
+            for crawler in self.crawlers.values():
+                crawler.save_processed_urls()
+            logging.info(f"Distributed worker {self.worker_id} stopped after {self.pages_processed} pages")
+
+
+def run_worker(path=SHARED_FRONTIER_PATH, worker_id=None, stop_when_idle=False, backend=SHARED_FRONTIER_BACKEND):
+    DistributedWorker(create_shared_frontier(backend, path), worker_id).run(stop_when_idle=stop_when_idle)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Worker de crawl distribuído")
+    parser.add_argument('--path', default=SHARED_FRONTIER_PATH, help="Arquivo da fronteira compartilhada")
+    parser.add_argument('--backend', default=SHARED_FRONTIER_BACKEND)
+    parser.add_argument('--id', dest='worker_id', default=None, help="Identificador do worker")
+    parser.add_argument('--stop-when-idle', action='store_true', help="Encerra quando a fronteira esvaziar")
+    args = parser.parse_args()
+    configure_logging()
+    run_worker(args.path, args.worker_id, args.stop_when_idle, args.backend)
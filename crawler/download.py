@@ -0,0 +1,82 @@
+import codecs
+import socket
+import time
+
+import requests
+from urllib3.exceptions import ReadTimeoutError, ProtocolError, DecodeError
+
+from config import MAX_BODY_SIZE, READ_DEADLINE, REQUEST_TIMEOUT
+
+CHUNK_SIZE = 64 * 1024
+
+
+class BodyLimitExceeded(Exception):
+    pass
+
+
+def is_html(headers):
+    return 'text/html' in headers.get('Content-Type', '')
+
+
+def check_declared_length(headers, max_body_size):
+    # Content-Length acima do limite: descarta antes de ler o primeiro byte do corpo
+    length = headers.get('Content-Length')
+    if length and length.isdigit() and int(length) > max_body_size:
+        raise BodyLimitExceeded(f"Content-Length {length} exceeds {max_body_size} bytes")
+
+
+# Lê o corpo em pedaços (já descomprimidos pelo cliente HTTP), decodificando de forma incremental
+# e abortando assim que o tamanho máximo ou o prazo de leitura forem ultrapassados
+class BodyReader:
+    def __init__(self, encoding=None, max_body_size=MAX_BODY_SIZE, read_deadline=READ_DEADLINE):
+        try:
+            decoder = codecs.getincrementaldecoder(encoding or 'utf-8')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')
+        self.decoder = decoder(errors='replace')
+        self.max_body_size = max_body_size
+        self.deadline = time.monotonic() + read_deadline
+        self.size = 0
+        self.chunks = []
+
+    def feed(self, chunk):
+        self.size += len(chunk)
+        if self.size > self.max_body_size:
+            raise BodyLimitExceeded(f"Body exceeds {self.max_body_size} bytes")
+        self.check_deadline()
+        self.chunks.append(self.decoder.decode(chunk))
+
+    def remaining(self):
+        return self.deadline - time.monotonic()
+
+    def check_deadline(self):
+        if self.remaining() <= 0:
+            raise BodyLimitExceeded(f"Read deadline exceeded after {self.size} bytes")
+
+    def text(self):
+        self.chunks.append(self.decoder.decode(b'', final=True))
+        return ''.join(self.chunks)
+
+
+def read_response(response, reader, chunk_size=CHUNK_SIZE):
+    # Corpo de uma resposta do requests (stream=True). read1 devolve o que já chegou, sem esperar o
+    # pedaço encher, e o timeout do socket é o que resta do prazo: um servidor que manda um byte de
+    # cada vez é cortado no prazo, e não quando completar 64 KiB
+    raw = response.raw
+    while True:
+        reader.check_deadline()
+        sock = getattr(raw.connection, 'sock', None)
+        if sock is not None:
+            sock.settimeout(min(REQUEST_TIMEOUT, max(reader.remaining(), 0.01)))
+        try:
+            chunk = raw.read1(chunk_size, decode_content=True)
+        except (ReadTimeoutError, socket.timeout) as e:
+            reader.check_deadline()
+            raise requests.exceptions.ConnectionError(e)
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e)
+        if not chunk:
+            return
+        reader.feed(chunk)
@@ -0,0 +1,226 @@
+import heapq
+import itertools
+import sqlite3
+import threading
+import time
+
+from config import CRAWL_STATE_PATH, FRONTIER_COMMIT_EVERY
+from .seen import UrlSet
+
+
+def _differs(fetch_url, url):
+    return fetch_url if fetch_url and fetch_url != url else None
+
+
+def add_missing_column(conn, table, column, column_type):
+    # CREATE TABLE IF NOT EXISTS não altera tabelas de versões anteriores
+    if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+# Fronteira de crawl: fila de prioridade por profundidade com deduplicação O(1).
+# Os workers puxam URLs continuamente; get() só devolve None quando a fila está vazia
+# e nenhuma URL está em processamento (nenhum worker pode mais descobrir links).
+# URLs adiadas (ex.: host em espera de cortesia) voltam à fila quando o prazo vence.
+# Dentro de uma profundidade, priority menor sai antes (ex.: URLs de sitemap com lastmod recente).
+# url é a forma canônica (deduplicação e armazenamento); fetch_url, a URL como foi encontrada, que é
+# a baixada. Ela só é guardada quando difere da canônica, e get() devolve (url, depth, fetch_url).
+class Frontier:
+    def __init__(self, max_depth, seen=None):
+        self.max_depth = max_depth
+        self._heap = []
+        self._delayed = []
+        self._seen = seen if seen is not None else UrlSet()  # Estrutura plugável (crawler/seen.py)
+        self._seeds = []
+        self._counter = itertools.count()  # Desempate FIFO dentro da mesma profundidade
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    def put(self, url, depth, priority=0, fetch_url=None):
+        with self._condition:
+            if depth > self.max_depth or url in self._seen:
+                return False
+            self._seen.add(url)
+            if depth == 0:
+                self._seeds.append(url)
+            heapq.heappush(self._heap, (depth, priority, next(self._counter), url, _differs(fetch_url, url)))
+            self._condition.notify()
+            return True
+
+    def mark_seen(self, url):
+        # URL que não precisa ser baixada (ex.: o sitemap diz que não mudou): put() passa a ignorá-la
+        with self._condition:
+            self._seen.add(url)
+
+    def defer(self, url, depth, delay, fetch_url=None):
+        # Reagenda uma URL já retirada (o worker ainda chama task_done normalmente)
+        with self._condition:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, depth, next(self._counter), url,
+                                           _differs(fetch_url, url)))
+            self._condition.notify()
+
+    def hold(self):
+        # Um produtor fora dos workers (ex.: leitura de sitemaps) conta como uma URL em processamento:
+        # a fronteira não termina enquanto ele não chamar task_done()
+        with self._condition:
+            self._in_flight += 1
+
+    def get(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                self._promote_delayed()
+                if self._heap:
+                    return self._pop()
+                if self._in_flight == 0 and not self._delayed:
+                    return None
+                wait = self._next_ready_in()
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._condition.wait(wait)
+
+    def get_nowait(self):
+        with self._condition:
+            self._promote_delayed()
+            if not self._heap:
+                return None
+            return self._pop()
+
+    def next_ready_in(self):
+        with self._condition:
+            return self._next_ready_in()
+
+    def _next_ready_in(self):
+        if not self._delayed:
+            return None
+        return max(0.0, self._delayed[0][0] - time.monotonic())
+
+    def _promote_delayed(self):
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, depth, order, url, fetch_url = heapq.heappop(self._delayed)
+            heapq.heappush(self._heap, (depth, 0, order, url, fetch_url))
+
+    def _pop(self):
+        depth, _, _, url, fetch_url = heapq.heappop(self._heap)
+        self._in_flight += 1
+        return url, depth, fetch_url or url
+
+    def task_done(self):
+        with self._condition:
+            self._in_flight -= 1
+            if self._in_flight == 0 and not self._heap and not self._delayed:
+                self._condition.notify_all()
+
+    @property
+    def finished(self):
+        with self._condition:
+            return not self._heap and not self._delayed and self._in_flight == 0
+
+    @property
+    def in_flight(self):
+        with self._condition:
+            return self._in_flight
+
+    def mark_visited(self, urls):
+        # Chamado quando as páginas já foram gravadas; só a fronteira persistente precisa disso
+        pass
+
+    def seeds(self):
+        with self._condition:
+            return list(self._seeds)
+
+    def clear(self):
+        with self._condition:
+            self._heap.clear()
+            self._delayed.clear()
+            self._seen.clear()
+            self._seeds.clear()
+
+    def close(self):
+        pass
+
+    def __contains__(self, url):
+        with self._condition:
+            return url in self._seen
+
+    def __len__(self):
+        with self._condition:
+            return len(self._heap) + len(self._delayed)
+
+
+# Fronteira persistida incrementalmente num SQLite ao lado do storage.db: cada URL enfileirada
+# vira uma linha e é marcada como visitada quando sua página é gravada. Reabrir a fronteira de
+# uma base retoma as URLs pendentes sem refazer as já visitadas.
+class PersistentFrontier(Frontier):
+    def __init__(self, name, max_depth, path=None, seen=None):
+        super().__init__(max_depth, seen=seen)
+        self.name = name
+        # URLs enfileiradas ainda não gravadas: nenhuma transação fica aberta entre os commits,
+        # então várias bases (e o registro de bases) podem escrever no mesmo arquivo
+        self._pending = []
+        self._conn = sqlite3.connect(path or CRAWL_STATE_PATH, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS frontier (
+                                  kb TEXT NOT NULL,
+                                  url TEXT NOT NULL,
+                                  depth INTEGER NOT NULL,
+                                  visited INTEGER NOT NULL DEFAULT 0,
+                                  fetch_url TEXT,
+                                  PRIMARY KEY (kb, url))""")
+        add_missing_column(self._conn, 'frontier', 'fetch_url', 'TEXT')
+        self._conn.commit()
+        self._load()
+
+    def _load(self):
+        rows = self._conn.execute("SELECT url, depth, visited, fetch_url FROM frontier WHERE kb = ? ORDER BY rowid",
+                                  (self.name,))
+        with self._condition:
+            for url, depth, visited, fetch_url in rows:
+                self._seen.add(url)
+                if depth == 0:
+                    self._seeds.append(url)
+                if not visited:
+                    # A prioridade não é persistida: ao retomar, as pendentes seguem a ordem de inserção
+                    heapq.heappush(self._heap, (depth, 0, next(self._counter), url, fetch_url))
+
+    def put(self, url, depth, priority=0, fetch_url=None):
+        with self._condition:
+            added = super().put(url, depth, priority, fetch_url)
+            if added:
+                self._pending.append((self.name, url, depth, _differs(fetch_url, url)))
+                if len(self._pending) >= FRONTIER_COMMIT_EVERY:
+                    self._commit()
+            return added
+
+    def mark_visited(self, urls):
+        with self._condition:
+            self._write_pending()
+            self._conn.executemany("UPDATE frontier SET visited = 1 WHERE kb = ? AND url = ?",
+                                   [(self.name, url) for url in urls])
+            self._conn.commit()
+
+    def clear(self):
+        with self._condition:
+            super().clear()
+            self._pending.clear()
+            self._conn.execute("DELETE FROM frontier WHERE kb = ?", (self.name,))
+            self._conn.commit()
+
+    def close(self):
+        with self._condition:
+            self._commit()
+            self._conn.close()
+
+    def _write_pending(self):
+        if self._pending:
+            self._conn.executemany("INSERT OR IGNORE INTO frontier (kb, url, depth, fetch_url) VALUES (?, ?, ?, ?)",
+                                   self._pending)
+            self._pending.clear()
+
+    def _commit(self):
+        self._write_pending()
+        self._conn.commit()
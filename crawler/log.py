@@ -0,0 +1,14 @@
+import logging
+
+from config import LOG_LEVEL, LOG_FILE
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+def configure_logging(level=LOG_LEVEL, log_file=LOG_FILE):
+    # Console + arquivo, acrescentando ao log anterior. Chamado pelos pontos de entrada (API,
+    # worker distribuído), nunca no import de um módulo
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, mode='a'))
+    logging.basicConfig(level=level, format=LOG_FORMAT, handlers=handlers)
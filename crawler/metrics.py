@@ -0,0 +1,256 @@
+import bisect
+import socket
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+
+from config import METRICS_LATENCY_BUCKETS, METRICS_MAX_HOSTS
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# Métricas no formato de texto do Prometheus, sem dependência externa. Cada métrica guarda um
+# valor por combinação de labels (passados na ordem de labelnames) atrás de um lock próprio:
+# registrar custa um lookup de dicionário, e a renderização só acontece quando /metrics é lido.
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with self.lock:
+            return self.values.get(labels, 0)
+
+    def samples(self):
+        with self.lock:
+            values = list(self.values.items())
+        return [(self.name, self.labelnames, labels, value) for labels, value in values]
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=METRICS_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}  # labels -> [contagem por bucket (+ o +Inf), soma, total]
+        self.lock = threading.Lock()
+
+    def observe(self, seconds, *labels):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += seconds
+            entry[2] += 1
+
+    def count(self, *labels):
+        with self.lock:
+            entry = self.values.get(labels)
+            return entry[2] if entry else 0
+
+    def sum(self, *labels):
+        with self.lock:
+            entry = self.values.get(labels)
+            return entry[1] if entry else 0.0
+
+    def samples(self):
+        with self.lock:
+            values = [(labels, list(entry[0]), entry[1], entry[2]) for labels, entry in self.values.items()]
+        names = self.labelnames + ('le',)
+        samples = []
+        for labels, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                samples.append((f'{self.name}_bucket', names, labels + (le,), cumulative))
+            samples.append((f'{self.name}_sum', self.labelnames, labels, total))
+            samples.append((f'{self.name}_count', self.labelnames, labels, count))
+        return samples
+
+
+# Gauge lido na hora da coleta: callback() devolve {labels: valor} (ex.: profundidade das filas)
+class GaugeCallback:
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames, callback):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self):
+        return [(self.name, self.labelnames, labels, value) for labels, value in self.callback().items()]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=METRICS_LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, labelnames, callback):
+        return self.register(GaugeCallback(name, documentation, labelnames, callback))
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labelnames, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labelnames, labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+PAGES_FETCHED = registry.counter('crawler_pages_fetched_total', 'Fetches per knowledge base and HTTP status',
+                                 ('base', 'status'))
+HOST_REQUESTS = registry.counter('crawler_host_requests_total', 'Fetches per host and HTTP status class',
+                                 ('host', 'status'))
+HOST_BYTES = registry.counter('crawler_host_bytes_total', 'Decompressed body bytes read per host', ('host',))
+ROBOTS_BLOCKED = registry.counter('crawler_robots_blocked_total', 'URLs blocked by robots.txt', ('base',))
+NEAR_DUPLICATES = registry.counter('crawler_near_duplicates_total', 'Pages skipped as near-duplicates', ('base',))
+PAGES_WRITTEN = registry.counter('crawler_db_pages_written_total', 'Pages written to storage.db', ('base',))
+PAGES_INDEXED = registry.counter('crawler_pages_indexed_total', 'Pages added to the search index', ('base',))
+SITEMAPS_FETCHED = registry.counter('crawler_sitemaps_fetched_total', 'Sitemap fetches per knowledge base and HTTP status',
+                                   ('base', 'status'))
+SITEMAP_URLS = registry.counter('crawler_sitemap_urls_total', 'Sitemap URLs queued or skipped as unchanged',
+                               ('base', 'outcome'))
+FETCH_PHASE_SECONDS = registry.histogram('crawler_fetch_phase_seconds',
+                                         'Fetch latency per phase: dns, connect, ttfb, download', ('base', 'phase'))
+PARSE_SECONDS = registry.histogram('crawler_parse_seconds', 'CPU time spent parsing a page', ('base',))
+ROBOTS_CHECK_SECONDS = registry.histogram('crawler_robots_check_seconds',
+                                          'robots.txt check latency, cache lookup or download', ('base',))
+CLASSIFY_SECONDS = registry.histogram('crawler_classify_seconds', 'Area classification latency per call')
+DB_WRITE_SECONDS = registry.histogram('crawler_db_write_seconds', 'Latency of a batched write',
+                                      ('base', 'target'))
+
+_hosts = set()
+_hosts_lock = threading.Lock()
+
+
+def host_label(host):
+    # Limita a cardinalidade: depois de METRICS_MAX_HOSTS hosts distintos, os novos viram "other"
+    if host in _hosts:
+        return host
+    with _hosts_lock:
+        if len(_hosts) < METRICS_MAX_HOSTS:
+            _hosts.add(host)
+            return host
+    return 'other'
+
+
+def status_class(status_code):
+    return f'{status_code // 100}xx' if status_code else 'error'
+
+
+# Tempo de DNS e de conexão de um fetch. Nas threads, as conexões novas abertas pelo requests
+# acumulam no objeto da thread corrente (start_fetch_timings zera no início de cada fetch); no
+# motor async, o TraceConfig do aiohttp preenche o objeto passado em trace_request_ctx.
+class FetchTimings:
+    __slots__ = ('dns', 'connect')
+
+    def __init__(self):
+        self.dns = 0.0
+        self.connect = 0.0
+
+
+_thread_timings = threading.local()
+
+
+def start_fetch_timings():
+    timings = _thread_timings.current = FetchTimings()
+    return timings
+
+
+class TimedConnectionMixin:
+    def _new_conn(self):
+        # Resolve o nome à parte para separar DNS de conexão; tenta cada endereço como o
+        # create_connection do urllib3 faria
+        timings = getattr(_thread_timings, 'current', None) or FetchTimings()
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(self._dns_host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved = time.perf_counter()
+        timings.dns += resolved - start
+        host = self._dns_host
+        error = None
+        try:
+            for address in dict.fromkeys(sockaddr[0] for *_, sockaddr in addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except NewConnectionError as e:
+                    error = e
+            raise error
+        finally:
+            self._dns_host = host
+            timings.connect += time.perf_counter() - resolved
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class InstrumentedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
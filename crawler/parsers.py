@@ -0,0 +1,165 @@
+from collections import namedtuple
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+from config import HTML_PARSER
+
+# Resultado do parse: links absolutos (na ordem do documento), texto visível da página, texto
+# principal (sem menus, cabeçalhos e rodapés do template, usado no SimHash) e, quando calculado
+# no estágio de parse, o SimHash do texto principal (crawler/dedup.py)
+ParsedPage = namedtuple('ParsedPage', ['links', 'text', 'main_text', 'simhash'], defaults=[None])
+
+INVISIBLE_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'head'}
+VISIBLE_HEAD_TAGS = {'title'}
+# Blocos de navegação/template repetidos em todas as páginas de um site: ficam no texto indexado,
+# mas fora do texto principal, para não aproximarem páginas distintas na deduplicação
+BOILERPLATE_TAGS = {'nav', 'header', 'footer', 'aside'}
+
+
+def _resolve(page_url, base_href, hrefs):
+    # <base href> vale para todos os links do documento, mesmo os que aparecem antes dele
+    base = urljoin(page_url, base_href) if base_href else page_url
+    return [urljoin(base, href.strip()) for href in hrefs]
+
+
+def _normalize_text(chunks):
+    return ' '.join(' '.join(chunks).split())
+
+
+# Alvo SAX do parser HTML do lxml: recebe os eventos enquanto o documento é alimentado, sem
+# construir a árvore, coletando hrefs, o primeiro <base href> e o texto visível numa só passada
+class _LxmlCollector:
+    def __init__(self):
+        self.hrefs = []
+        self.base_href = None
+        self.chunks = []
+        self.main_chunks = []
+        self._hidden = 0
+        self._visible_in_head = 0
+        self._boilerplate = 0
+
+    def start(self, tag, attrib):
+        if tag == 'a':
+            href = attrib.get('href')
+            if href:
+                self.hrefs.append(href)
+        elif tag == 'base' and self.base_href is None and attrib.get('href'):
+            self.base_href = attrib['href']
+        if tag in INVISIBLE_TAGS:
+            self._hidden += 1
+        elif tag in VISIBLE_HEAD_TAGS:
+            self._visible_in_head += 1
+        elif tag in BOILERPLATE_TAGS:
+            self._boilerplate += 1
+
+    def end(self, tag):
+        if tag in INVISIBLE_TAGS:
+            self._hidden -= 1
+        elif tag in VISIBLE_HEAD_TAGS:
+            self._visible_in_head -= 1
+        elif tag in BOILERPLATE_TAGS:
+            self._boilerplate -= 1
+
+    def data(self, data):
+        if not self._hidden or self._visible_in_head:
+            self.chunks.append(data)
+            if not self._boilerplate:
+                self.main_chunks.append(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return self
+
+
+class LxmlStreamParser:
+    def __init__(self, page_url):
+        self.page_url = page_url
+        self.collector = _LxmlCollector()
+        self.parser = etree.HTMLParser(target=self.collector)
+
+    def feed(self, chunk):
+        self.parser.feed(chunk)
+
+    def close(self):
+        try:
+            self.parser.close()
+        except etree.LxmlError:
+            pass  # Documento vazio ou truncado: fica o que já foi coletado
+        collector = self.collector
+        return ParsedPage(_resolve(self.page_url, collector.base_href, collector.hrefs), _normalize_text(collector.chunks),
+                          _normalize_text(collector.main_chunks))
+
+
+# Backend original (BeautifulSoup + html.parser): monta a árvore inteira no close()
+class SoupParser:
+    features = 'html.parser'
+
+    def __init__(self, page_url):
+        self.page_url = page_url
+        self.chunks = []
+
+    def feed(self, chunk):
+        self.chunks.append(chunk)
+
+    def close(self):
+        html = ''.join(chunk.decode('utf-8', 'replace') if isinstance(chunk, bytes) else chunk for chunk in self.chunks)
+        soup = BeautifulSoup(html, self.features)
+        base = soup.find('base', href=True)
+        hrefs = [link['href'] for link in soup.find_all('a', href=True)]
+        for tag in soup.find_all(INVISIBLE_TAGS - {'head'}):
+            tag.decompose()
+        text = _normalize_text([soup.get_text(' ')])
+        for tag in soup.find_all(BOILERPLATE_TAGS):
+            tag.decompose()
+        return ParsedPage(_resolve(self.page_url, base['href'] if base else None, hrefs), text,
+                          _normalize_text([soup.get_text(' ')]))
+
+
+class SelectolaxParser:
+    def __init__(self, page_url):
+        from selectolax.parser import HTMLParser  # Dependência opcional
+        self.html_parser = HTMLParser
+        self.page_url = page_url
+        self.chunks = []
+
+    def feed(self, chunk):
+        self.chunks.append(chunk)
+
+    def close(self):
+        html = ''.join(chunk.decode('utf-8', 'replace') if isinstance(chunk, bytes) else chunk for chunk in self.chunks)
+        tree = self.html_parser(html)
+        base = tree.css_first('base[href]')
+        hrefs = [node.attributes['href'] for node in tree.css('a[href]') if node.attributes.get('href')]
+        tree.strip_tags(list(INVISIBLE_TAGS - {'head'}))
+        title = tree.css_first('title')
+        text = tree.body.text(separator=' ') if tree.body else ''
+        tree.strip_tags(list(BOILERPLATE_TAGS))
+        main_text = tree.body.text(separator=' ') if tree.body else ''
+        chunks, main_chunks = ([title.text(), text], [title.text(), main_text]) if title else ([text], [main_text])
+        return ParsedPage(_resolve(self.page_url, base.attributes['href'] if base else None, hrefs), _normalize_text(chunks),
+                          _normalize_text(main_chunks))
+
+
+PARSER_BACKENDS = {
+    'lxml': LxmlStreamParser,
+    'html.parser': SoupParser,
+    'selectolax': SelectolaxParser,
+}
+
+
+def create_parser(page_url, backend=HTML_PARSER):
+    # Parser incremental: feed() aceita pedaços (str ou bytes) e close() devolve o ParsedPage
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Parser HTML '{backend}' não reconhecido")
+    return PARSER_BACKENDS[backend](page_url)
+
+
+def parse_html(html, page_url, backend=HTML_PARSER):
+    parser = create_parser(page_url, backend)
+    if html:
+        parser.feed(html)
+    return parser.close()
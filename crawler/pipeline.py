@@ -0,0 +1,137 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import PARSE_PROCESSES
+from .parsers import parse_html
+from .dedup import simhash
+
+
+def parse_job(html, page_url, backend, min_words=None):
+    # Executado nos processos do pool: devolve o ParsedPage (com o SimHash do texto principal,
+    # se min_words for informado) e o tempo de CPU gasto
+    start = time.process_time()
+    page = parse_html(html, page_url, backend)
+    if min_words is not None:
+        page = page._replace(simhash=simhash(page.main_text, min_words))
+    return page, time.process_time() - start
+
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    # Pool de parse único por processo, dimensionado pela quantidade de CPUs: crawls simultâneos
+    # dividem os mesmos núcleos em vez de cada um criar o seu. 'spawn' evita herdar as threads
+    # de I/O do processo pai.
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=PARSE_PROCESSES or os.cpu_count(),
+                                              mp_context=multiprocessing.get_context('spawn'))
+        return _parse_pool
+
+
+# Vazão de um estágio; com histogram, cada item também entra no histograma de latência (métricas)
+class StageStats:
+    def __init__(self, histogram=None, labels=()):
+        self.histogram = histogram
+        self.labels = labels
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.items += 1
+            self.busy_seconds += seconds
+        if self.histogram is not None:
+            self.histogram.observe(seconds, *self.labels)
+
+    def snapshot(self):
+        with self.lock:
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            return {
+                'items': self.items,
+                'items_per_second': self.items / elapsed,
+                'busy_seconds': self.busy_seconds,
+            }
+
+
+_STOP = object()
+
+
+# Estágio de parse entre a fila de páginas baixadas e o pool de processos. submit() bloqueia o
+# fetcher quando há queue_size páginas aguardando parse ou entrega (fila limitada = backpressure no I/O).
+# A thread de callbacks do pool é compartilhada por todos os crawls: ela só enfileira o resultado,
+# e uma thread consumidora do próprio estágio (um por crawl) chama on_parsed.
+class ParseStage:
+    def __init__(self, backend, queue_size, pool=None, min_words=None, stats=None):
+        self.backend = backend
+        self.min_words = min_words
+        self.pool = pool or get_parse_pool()
+        self.slots = threading.BoundedSemaphore(queue_size)
+        self.queue_size = queue_size
+        self.pending = 0
+        self.stats = stats or StageStats()
+        self.lock = threading.Lock()
+        self.results = queue.Queue()
+        self.consumer = None
+
+    def submit(self, html, page_url, on_parsed):
+        # on_parsed(page, error) roda na thread consumidora deste estágio, iniciada no primeiro parse
+        self.slots.acquire()
+        with self.lock:
+            self.pending += 1
+            if self.consumer is None:
+                self.consumer = threading.Thread(target=self._consume, name="parse-results", daemon=True)
+                self.consumer.start()
+        future = self.pool.submit(parse_job, html, page_url, self.backend, self.min_words)
+        future.add_done_callback(lambda f: self.results.put((f, on_parsed)))
+
+    def _consume(self):
+        closing = False
+        while True:
+            item = self.results.get()
+            if item is _STOP:
+                closing = True
+            else:
+                try:
+                    self._deliver(*item)
+                except Exception as e:
+                    logging.error(f"Failed to handle a parsed page: {e}")
+                finally:
+                    with self.lock:
+                        self.pending -= 1
+                    self.slots.release()
+            if closing:
+                with self.lock:
+                    if self.pending == 0:
+                        return
+
+    def _deliver(self, future, on_parsed):
+        try:
+            page, cpu_seconds = future.result()
+        except Exception as e:
+            on_parsed(None, e)
+            return
+        self.stats.record(cpu_seconds)
+        on_parsed(page, None)
+
+    def close(self):
+        # Entrega os parses ainda pendentes e encerra a thread consumidora
+        with self.lock:
+            consumer, self.consumer = self.consumer, None
+        if consumer is not None:
+            self.results.put(_STOP)
+            consumer.join()
+
+    def queue_depth(self):
+        with self.lock:
+            return self.pending
@@ -0,0 +1,94 @@
+import threading
+import time
+import logging
+from email.utils import parsedate_to_datetime
+
+from config import (DELAY, MAX_CONNECTIONS_PER_HOST, BACKOFF_INITIAL_DELAY, BACKOFF_MAX_DELAY,
+                    HEALTHY_LATENCY, BACKOFF_RECOVERY_FACTOR)
+
+BACKOFF_STATUS_CODES = (429, 503)
+SLOT_POLL_INTERVAL = 0.05  # Espera sugerida quando todas as conexões do host estão ocupadas
+
+
+def parse_retry_after(value):
+    # Retry-After pode vir em segundos ou como data HTTP
+    if not value:
+        return 0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return 0
+
+
+class HostState:
+    def __init__(self, base_delay, max_connections):
+        self.base_delay = base_delay
+        self.delay = base_delay
+        self.max_connections = max_connections
+        self.active = 0
+        self.next_allowed = 0.0
+
+
+# Escalonador de cortesia por host: respeita Crawl-delay/Request-rate do robots.txt, limita as
+# conexões simultâneas por host e recua em 429/503 (ou Retry-After), voltando a acelerar quando
+# a latência está saudável. reserve() nunca bloqueia, então um host em espera não segura workers
+# que poderiam estar buscando outros hosts.
+class PolitenessScheduler:
+    def __init__(self, default_delay=DELAY, max_connections=MAX_CONNECTIONS_PER_HOST):
+        self.default_delay = default_delay
+        self.max_connections = max_connections
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = HostState(self.default_delay, self.max_connections)
+        return state
+
+    def configure_host(self, host, crawl_delay=None, max_connections=None):
+        with self.lock:
+            state = self._state(host)
+            if crawl_delay is not None:
+                state.base_delay = max(float(crawl_delay), self.default_delay)
+                state.delay = max(state.delay, state.base_delay)
+            if max_connections is not None:
+                state.max_connections = max_connections
+
+    def reserve(self, host):
+        # Retorna 0 se a requisição pode sair agora (e reserva a vaga) ou quantos segundos esperar
+        with self.lock:
+            state = self._state(host)
+            now = time.monotonic()
+            if now < state.next_allowed:
+                return state.next_allowed - now
+            if state.active >= state.max_connections:
+                return SLOT_POLL_INTERVAL
+            state.active += 1
+            state.next_allowed = now + state.delay
+            return 0
+
+    def release(self, host, status_code=None, latency=None, retry_after=None):
+        with self.lock:
+            state = self._state(host)
+            state.active = max(0, state.active - 1)
+            if status_code in BACKOFF_STATUS_CODES:
+                retry_after = parse_retry_after(retry_after)
+                state.delay = min(BACKOFF_MAX_DELAY, max(state.delay * 2, BACKOFF_INITIAL_DELAY, retry_after))
+                state.next_allowed = max(state.next_allowed, time.monotonic() + max(state.delay, retry_after))
+                logging.warning(f"Backing off {host}: status {status_code}, delay {state.delay:.2f}s")
+            elif latency is not None and latency <= HEALTHY_LATENCY and state.delay > state.base_delay:
+                delay = state.delay * BACKOFF_RECOVERY_FACTOR
+                state.delay = delay if delay >= max(state.base_delay, BACKOFF_INITIAL_DELAY) else state.base_delay
+
+    def get_delay(self, host):
+        with self.lock:
+            return self._state(host).delay
+
+
+# Instância do processo: crawls simultâneos do mesmo host compartilham o mesmo orçamento
+host_scheduler = PolitenessScheduler()
@@ -0,0 +1,186 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from urllib.parse import urlsplit, unquote
+
+import requests
+
+from config import ROBOTS_TTL, ROBOTS_ERROR_TTL, ROBOTS_CACHE_SIZE, ROBOTS_TIMEOUT
+
+RequestRate = namedtuple('RequestRate', ['requests', 'seconds'])
+
+
+def _compile_pattern(path):
+    # Regra literal vira um prefixo (startswith); '*' e '$' (RFC 9309) viram uma regex compilada
+    if '*' not in path and not path.endswith('$'):
+        return path, None
+    anchored = path.endswith('$')
+    body = re.escape(path[:-1] if anchored else path).replace(r'\*', '.*')
+    return path, re.compile(body + ('$' if anchored else ''))
+
+
+# Regras de um robots.txt compiladas uma única vez. can_fetch() aplica a regra mais específica
+# (maior padrão) que casar com o caminho, com Allow vencendo empates, como na RFC 9309.
+class RobotsRules:
+    def __init__(self, rules=(), crawl_delay=None, request_rate=None, sitemaps=(), allow_all=False, disallow_all=False):
+        self.rules = sorted(((len(path), allow, path, regex) for path, regex, allow in rules), key=lambda r: (-r[0], not r[1]))
+        self.crawl_delay = crawl_delay
+        self.request_rate = request_rate
+        self.sitemaps = list(sitemaps)
+        self.allow_all = allow_all
+        self.disallow_all = disallow_all
+
+    @classmethod
+    def parse(cls, text, user_agent='*'):
+        groups = []  # [(agentes, linhas)]
+        agents, lines, sitemaps = [], [], []
+        for raw_line in text.splitlines():
+            line = raw_line.split('#', 1)[0].strip()
+            if ':' not in line:
+                continue
+            key, value = (part.strip() for part in line.split(':', 1))
+            key = key.lower()
+            if key == 'sitemap':
+                sitemaps.append(value)
+            elif key == 'user-agent':
+                if lines:
+                    groups.append((agents, lines))
+                    agents, lines = [], []
+                agents.append(value.lower())
+            elif agents:
+                lines.append((key, value))
+        if agents:
+            groups.append((agents, lines))
+
+        # Grupo do user-agent informado; senão o grupo '*'
+        user_agent = user_agent.lower()
+        selected = [lines for agents, lines in groups if user_agent != '*' and user_agent in agents]
+        if not selected:
+            selected = [lines for agents, lines in groups if '*' in agents]
+
+        rules, crawl_delay, request_rate = [], None, None
+        for lines in selected:
+            for key, value in lines:
+                if key in ('allow', 'disallow'):
+                    if value:
+                        path, regex = _compile_pattern(unquote(value))
+                        rules.append((path, regex, key == 'allow'))
+                elif key == 'crawl-delay':
+                    try:
+                        crawl_delay = float(value)
+                    except ValueError:
+                        pass
+                elif key == 'request-rate':
+                    numbers = value.split('/')
+                    if len(numbers) == 2 and numbers[0].strip().isdigit() and numbers[1].strip().isdigit():
+                        request_rate = RequestRate(int(numbers[0]), int(numbers[1]))
+        return cls(rules, crawl_delay, request_rate, sitemaps)
+
+    def can_fetch(self, url):
+        if self.disallow_all:
+            return False
+        if self.allow_all:
+            return True
+        parts = urlsplit(url)
+        path = unquote(parts.path or '/') + ('?' + parts.query if parts.query else '')
+        if path == '/robots.txt':
+            return True
+        for _, allow, pattern, regex in self.rules:
+            if regex.match(path) if regex is not None else path.startswith(pattern):
+                return allow
+        return True
+
+    def delay(self):
+        # Crawl-delay tem precedência; Request-rate (n requisições a cada s segundos) vira s/n
+        if self.crawl_delay is not None:
+            return self.crawl_delay
+        if self.request_rate and self.request_rate.requests:
+            return self.request_rate.seconds / self.request_rate.requests
+        return None
+
+
+def fetch_robots_txt(robots_url):
+    # Devolve (status, texto); status None indica erro de rede
+    try:
+        response = requests.get(robots_url, timeout=ROBOTS_TIMEOUT)
+        return response.status_code, response.text
+    except requests.exceptions.RequestException as e:
+        logging.warning(f"Failed to fetch {robots_url}: {e}")
+        return None, ''
+
+
+def rules_from_response(status, text):
+    if status is None or status >= 500:
+        return RobotsRules(disallow_all=True), ROBOTS_ERROR_TTL  # Servidor indisponível: tenta de novo depois
+    if status in (401, 403):
+        return RobotsRules(disallow_all=True), ROBOTS_TTL
+    if status >= 400:
+        return RobotsRules(allow_all=True), ROBOTS_TTL
+    return RobotsRules.parse(text), ROBOTS_TTL
+
+
+# Cache de robots.txt do processo, por esquema+host, com TTL e despejo LRU. Cada robots.txt é
+# baixado sob demanda uma única vez mesmo com várias threads pedindo o mesmo host ao mesmo tempo.
+class RobotsCache:
+    def __init__(self, max_size=ROBOTS_CACHE_SIZE, fetcher=fetch_robots_txt):
+        self.max_size = max_size
+        self.fetcher = fetcher
+        self.entries = OrderedDict()  # chave -> (regras, expira_em)
+        self.loading = {}  # chave -> threading.Event de quem está baixando
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+    def get(self, url):
+        key = self.key(url)
+        while True:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None and entry[1] > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                loading = self.loading.get(key)
+                if loading is None:
+                    self.misses += 1
+                    loading = self.loading[key] = threading.Event()
+                    break
+            loading.wait()  # Outra thread já está baixando este robots.txt
+
+        try:
+            rules, ttl = rules_from_response(*self.fetcher(key + '/robots.txt'))
+            with self.lock:
+                self.entries[key] = (rules, time.monotonic() + ttl)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+            return rules
+        finally:
+            with self.lock:
+                del self.loading[key]
+            loading.set()
+
+    def is_cached(self, url):
+        # True se get() responde do cache, sem baixar o robots.txt
+        with self.lock:
+            entry = self.entries.get(self.key(url))
+            return entry is not None and entry[1] > time.monotonic()
+
+    def can_fetch(self, url):
+        return self.get(url).can_fetch(url)
+
+    def stats(self):
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': len(self.entries)}
+
+
+robots_cache = RobotsCache()
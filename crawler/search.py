@@ -0,0 +1,119 @@
+import html
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from config import SEARCH_INDEX_PATH, SEARCH_MAX_CHARS, SEARCH_SNIPPET_TOKENS, SEARCH_PAGE_SIZE
+
+
+# O FTS5 marca os termos do trecho com caracteres de controle (retirados do texto ao indexar); o
+# trecho é escapado e só então as marcas viram <b>, então o texto da página nunca chega como HTML
+HIGHLIGHT_START, HIGHLIGHT_END = '\x02', '\x03'
+_STRIP_MARKS = str.maketrans('', '', HIGHLIGHT_START + HIGHLIGHT_END)
+
+
+def highlight(snippet):
+    return html.escape(snippet).replace(HIGHLIGHT_START, '<b>').replace(HIGHLIGHT_END, '</b>')
+
+
+def match_expression(query):
+    # Cada palavra da consulta vira um termo entre aspas (E implícito): a entrada do usuário
+    # nunca é interpretada como sintaxe do FTS5
+    terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+    return ' '.join(terms)
+
+
+# Índice de texto completo (SQLite FTS5) num arquivo ao lado do storage.db. Uma URL pode estar em
+# várias bases, então cada documento é (base, url); search_documents dá o rowid estável do par e
+# search_text guarda o texto visível extraído pelo parse do crawl.
+class SearchIndex:
+    def __init__(self, path=SEARCH_INDEX_PATH, max_chars=SEARCH_MAX_CHARS):
+        self.path = path
+        self.max_chars = max_chars
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS search_documents (
+                                id INTEGER PRIMARY KEY,
+                                base TEXT NOT NULL,
+                                url TEXT NOT NULL,
+                                UNIQUE (base, url))""")
+            conn.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS search_text
+                            USING fts5(body, tokenize='unicode61 remove_diacritics 2')""")
+
+    def _connection(self):
+        # Uma conexão por thread (writers dos crawls e leituras da API), em autocommit
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def add_documents(self, base, documents):
+        # Lote de (url, texto) numa transação; reindexar uma URL substitui o texto anterior
+        with self._transaction() as conn:
+            for url, text in documents:
+                doc_id = conn.execute("""INSERT INTO search_documents (base, url) VALUES (?, ?)
+                                         ON CONFLICT (base, url) DO UPDATE SET url = excluded.url
+                                         RETURNING id""", (base, url)).fetchone()[0]
+                conn.execute("DELETE FROM search_text WHERE rowid = ?", (doc_id,))
+                conn.execute("INSERT INTO search_text (rowid, body) VALUES (?, ?)", (doc_id, text[:self.max_chars].translate(_STRIP_MARKS)))
+
+    def search(self, query, base=None, page=1, per_page=SEARCH_PAGE_SIZE):
+        # Resultados ordenados por BM25, com trecho destacado; base=None busca em todas as bases
+        expression = match_expression(query)
+        if not expression:
+            return {'total': 0, 'resultados': []}
+        where = "search_text MATCH ?" + (" AND d.base = ?" if base is not None else "")
+        params = (expression, base) if base is not None else (expression,)
+        conn = self._connection()
+        total = conn.execute(f"""SELECT count(*) FROM search_text JOIN search_documents d ON d.id = search_text.rowid
+                                 WHERE {where}""", params).fetchone()[0]
+        rows = conn.execute(f"""SELECT d.base, d.url,
+                                       snippet(search_text, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…',
+                                               {int(SEARCH_SNIPPET_TOKENS)}),
+                                       bm25(search_text) AS score
+                                FROM search_text JOIN search_documents d ON d.id = search_text.rowid
+                                WHERE {where} ORDER BY score LIMIT ? OFFSET ?""",
+                            params + (per_page, (page - 1) * per_page)).fetchall()
+        return {
+            'total': total,
+            'resultados': [{'base': row[0], 'url': row[1], 'trecho': highlight(row[2]), 'relevancia': round(-row[3], 6)}
+                           for row in rows],
+        }
+
+    def count(self, base=None):
+        conn = self._connection()
+        if base is None:
+            return conn.execute("SELECT count(*) FROM search_documents").fetchone()[0]
+        return conn.execute("SELECT count(*) FROM search_documents WHERE base = ?", (base,)).fetchone()[0]
+
+    def delete_base(self, base):
+        with self._transaction() as conn:
+            conn.execute("""DELETE FROM search_text WHERE rowid IN
+                            (SELECT id FROM search_documents WHERE base = ?)""", (base,))
+            conn.execute("DELETE FROM search_documents WHERE base = ?", (base,))
+
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+
+def get_search_index():
+    # Índice do processo, aberto no primeiro uso (o arquivo só é criado quando algo é indexado ou buscado)
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex()
+        return _search_index
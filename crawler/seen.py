@@ -0,0 +1,179 @@
+import hashlib
+import math
+import threading
+from array import array
+
+from config import SEEN_URLS_BACKEND, BLOOM_ERROR_RATE, BLOOM_INITIAL_CAPACITY
+
+
+def url_fingerprint(url):
+    # Fingerprint de 64 bits; 0 fica reservado como marcador de posição vazia
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+
+# Conjunto exato de strings (comportamento original do WebCrawler)
+class UrlSet:
+    def __init__(self):
+        self._urls = set()
+
+    def add(self, url):
+        self._urls.add(url)
+
+    def __contains__(self, url):
+        return url in self._urls
+
+    def __len__(self):
+        return len(self._urls)
+
+    def clear(self):
+        self._urls.clear()
+
+    def memory_bytes(self):
+        return self._urls.__sizeof__() + sum(url.__sizeof__() for url in self._urls)
+
+
+# Conjunto de fingerprints de 64 bits numa tabela hash de endereçamento aberto sobre array('Q'):
+# ~11 bytes por URL contra ~100+ de um set de strings. Colisões de 64 bits são desprezíveis
+# na escala de um crawl.
+class FingerprintSet:
+    MAX_LOAD = 0.7
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        size = 1 << max(4, math.ceil(math.log2(self.capacity / self.MAX_LOAD)))
+        self._table = array('Q', bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def _slot(self, table, mask, fingerprint):
+        index = fingerprint & mask
+        while True:
+            current = table[index]
+            if current == 0 or current == fingerprint:
+                return index
+            index = (index + 1) & mask
+
+    def add(self, url):
+        fingerprint = url_fingerprint(url)
+        with self._lock:
+            index = self._slot(self._table, self._mask, fingerprint)
+            if self._table[index] == 0:
+                self._table[index] = fingerprint
+                self._count += 1
+                if self._count > self.MAX_LOAD * len(self._table):
+                    self._grow()
+
+    def _grow(self):
+        old = self._table
+        self._table = array('Q', bytes(16 * len(old)))
+        self._mask = len(self._table) - 1
+        for fingerprint in old:
+            if fingerprint:
+                self._table[self._slot(self._table, self._mask, fingerprint)] = fingerprint
+
+    def __contains__(self, url):
+        fingerprint = url_fingerprint(url)
+        with self._lock:
+            return self._table[self._slot(self._table, self._mask, fingerprint)] == fingerprint
+
+    def __len__(self):
+        return self._count
+
+    def memory_bytes(self):
+        return self._table.itemsize * len(self._table)
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, h1, h2):
+        # Double hashing (Kirsch-Mitzenmacher): k posições a partir de dois hashes
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, h1, h2):
+        for position in self._positions(h1, h2):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def contains(self, h1, h2):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(h1, h2))
+
+
+# Bloom filter escalável (Almeida et al.): quando um filtro enche, um novo com o dobro da
+# capacidade e taxa de erro mais apertada é empilhado, mantendo a taxa total abaixo de error_rate.
+# Pode dar falso positivo (uma URL nova é tratada como vista), nunca falso negativo.
+class ScalableBloomFilter:
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity=BLOOM_INITIAL_CAPACITY, error_rate=BLOOM_ERROR_RATE):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.filters = []
+        self._count = 0
+        self._add_filter()
+
+    def _add_filter(self):
+        stage = len(self.filters)
+        capacity = self.initial_capacity * self.GROWTH ** stage
+        error_rate = self.error_rate * (1 - self.TIGHTENING) * self.TIGHTENING ** stage
+        self.filters.append(BloomFilter(capacity, error_rate))
+
+    @staticmethod
+    def _hashes(url):
+        digest = hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+    def add(self, url):
+        h1, h2 = self._hashes(url)
+        with self._lock:
+            if any(bloom.contains(h1, h2) for bloom in self.filters):
+                return
+            current = self.filters[-1]
+            if current.count >= current.capacity:
+                self._add_filter()
+                current = self.filters[-1]
+            current.add(h1, h2)
+            self._count += 1
+
+    def __contains__(self, url):
+        h1, h2 = self._hashes(url)
+        with self._lock:
+            return any(bloom.contains(h1, h2) for bloom in self.filters)
+
+    def __len__(self):
+        return self._count
+
+    def memory_bytes(self):
+        return sum(len(bloom.bits) for bloom in self.filters)
+
+
+SEEN_URLS_BACKENDS = {
+    'set': UrlSet,
+    'fingerprint': FingerprintSet,
+    'bloom': ScalableBloomFilter,
+}
+
+
+def create_seen_urls(configuracoes=None):
+    # Cada base de conhecimento escolhe sua estrutura em 'configuracoes'
+    configuracoes = configuracoes or {}
+    backend = configuracoes.get('seen_backend', SEEN_URLS_BACKEND)
+    if backend not in SEEN_URLS_BACKENDS:
+        raise ValueError(f"Estrutura de URLs vistas '{backend}' não reconhecida")
+    if backend == 'bloom':
+        return ScalableBloomFilter(error_rate=configuracoes.get('bloom_error_rate', BLOOM_ERROR_RATE))
+    return SEEN_URLS_BACKENDS[backend]()
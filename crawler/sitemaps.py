@@ -0,0 +1,150 @@
+import logging
+import zlib
+from collections import deque, namedtuple
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import requests
+from lxml import etree
+
+from .download import CHUNK_SIZE
+from config import REQUEST_TIMEOUT, SITEMAP_MAX_BYTES, SITEMAP_MAX_FILES
+
+# URL de um sitemap (<url>) ou de um sitemap filho de um índice (<sitemap>), com o lastmod em UTC ingênuo
+SitemapEntry = namedtuple('SitemapEntry', ['url', 'lastmod'])
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class SitemapTooLarge(Exception):
+    pass
+
+
+def _localname(tag):
+    # '{http://www.sitemaps.org/schemas/sitemap/0.9}url' -> 'url'
+    return tag.rpartition('}')[2]
+
+
+def parse_lastmod(value):
+    # W3C Datetime: AAAA, AAAA-MM, AAAA-MM-DD ou data e hora com fuso; inválido vira None
+    if not value:
+        return None
+    value = value.strip()
+    for parse in (datetime.fromisoformat, lambda v: datetime.strptime(v, '%Y-%m'), lambda v: datetime.strptime(v, '%Y')):
+        try:
+            lastmod = parse(value)
+            break
+        except ValueError:
+            continue
+    else:
+        return None
+    if lastmod.tzinfo is not None:
+        lastmod = lastmod.astimezone(timezone.utc).replace(tzinfo=None)
+    return lastmod
+
+
+def sitemap_locations(root, rules):
+    # Sitemaps declarados no robots.txt e o /sitemap.xml padrão do host, sem repetição
+    return list(dict.fromkeys(list(rules.sitemaps) + [f"{root}/sitemap.xml"]))
+
+
+# Parse incremental de um sitemap (urlset) ou índice (sitemapindex), alimentado com os pedaços do
+# download: cada entrada sai assim que o elemento fecha e é descartada da árvore, então a memória
+# não cresce com o tamanho do arquivo. Sitemaps .gz são reconhecidos pelos bytes iniciais, porque
+# nem todo servidor os marca no Content-Type.
+class SitemapParser:
+    def __init__(self, max_bytes=SITEMAP_MAX_BYTES):
+        self.parser = etree.XMLPullParser(events=('end',), tag=('{*}url', '{*}sitemap'), resolve_entities=False,
+                                          no_network=True)
+        self.decompressor = None
+        self.started = False
+        self.max_bytes = max_bytes
+        self.size = 0  # Bytes de XML, já descomprimidos
+        self.received = 0  # Bytes do corpo HTTP
+
+    def feed(self, chunk):
+        self.received += len(chunk)
+        if not self.started:
+            self.started = True
+            if chunk.startswith(GZIP_MAGIC):
+                self.decompressor = zlib.decompressobj(wbits=31)
+        if self.decompressor is None:
+            self._feed_xml(chunk)
+        else:
+            # Descompressão limitada a CHUNK_SIZE por vez: um .gz pequeno não estoura a memória
+            data = self.decompressor.decompress(chunk, CHUNK_SIZE)
+            self._feed_xml(data)
+            while self.decompressor.unconsumed_tail:
+                self._feed_xml(self.decompressor.decompress(self.decompressor.unconsumed_tail, CHUNK_SIZE))
+        return self._entries()
+
+    def close(self):
+        if self.decompressor is not None:
+            self._feed_xml(self.decompressor.flush())
+        self.parser.close()
+        return self._entries()
+
+    def _feed_xml(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise SitemapTooLarge(f"Sitemap larger than {self.max_bytes} bytes")
+        self.parser.feed(data)
+
+    def _entries(self):
+        entries = []
+        for _, element in self.parser.read_events():
+            kind = _localname(element.tag)
+            loc = lastmod = None
+            for child in element:
+                if not isinstance(child.tag, str):
+                    continue  # Comentários e instruções de processamento
+                name = _localname(child.tag)
+                if name == 'loc' and child.text:
+                    loc = child.text.strip()
+                elif name == 'lastmod':
+                    lastmod = parse_lastmod(child.text)
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+            if loc:
+                entries.append((kind, SitemapEntry(loc, lastmod)))
+        return entries
+
+
+def read_sitemap(response, parser):
+    # Gera (tipo, SitemapEntry) conforme o corpo de uma resposta aberta com stream=True chega
+    for chunk in response.iter_content(CHUNK_SIZE):
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+def fetch_sitemap(url, session, max_bytes=SITEMAP_MAX_BYTES):
+    # Download direto, sem cortesia por host; o crawler usa WebCrawler.fetch_sitemap. Um sitemap ausente não gera nada
+    with session.get(url, timeout=REQUEST_TIMEOUT, stream=True) as response:
+        if response.status_code != 200:
+            logging.debug("No sitemap at %s: status %s", url, response.status_code)
+            return
+        yield from read_sitemap(response, SitemapParser(max_bytes))
+
+
+def iter_sitemaps(locations, fetch, max_files=SITEMAP_MAX_FILES, should_stop=None):
+    # Percorre os sitemaps e os índices em largura, cada arquivo uma vez, e gera as URLs de página.
+    # fetch(url) gera as entradas de um arquivo (ex.: functools.partial(fetch_sitemap, session=...)).
+    # Sitemaps filhos de outro host são ignorados, como manda o protocolo
+    queue = deque(dict.fromkeys(locations))
+    seen = set(queue)
+    files = 0
+    while queue and files < max_files:
+        if should_stop is not None and should_stop():
+            return
+        url = queue.popleft()
+        files += 1
+        try:
+            for kind, entry in fetch(url):
+                if kind == 'url':
+                    yield entry
+                elif entry.url not in seen and urlsplit(entry.url).netloc == urlsplit(url).netloc:
+                    seen.add(entry.url)
+                    queue.append(entry.url)
+        except (requests.exceptions.RequestException, etree.XMLSyntaxError, SitemapTooLarge) as e:
+            logging.warning(f"Failed to read sitemap {url}: {e}")
@@ -1,29 +1,156 @@
+import argparse
+import hashlib
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from sqlalchemy import bindparam, update
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from models.page import Page
 from models.database import SessionLocal
+from crawler.blobs import blob_store
+from crawler.metrics import DB_WRITE_SECONDS, PAGES_WRITTEN, PAGES_INDEXED
+from config import WRITE_BATCH_SIZE, WRITE_BUFFER_SIZE, WRITE_FLUSH_INTERVAL
 
+def utc_now():
+    # SQLite guarda DateTime sem fuso: usamos UTC ingênuo
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def hash_content(content):
+    if content is None:
+        return None
+    return hashlib.sha256(content.encode('utf-8', 'surrogatepass')).hexdigest()
+
+# Metadados das páginas ficam na tabela pages; os corpos vão para o BlobStore, pelo content_hash.
+# Linhas antigas com o corpo na coluna content continuam legíveis (e migram com migrate_inline_content)
 class Storage:
-    def __init__(self):
-        self.db = SessionLocal()
+    def __init__(self, db=None, blobs=None):
+        self.db = db or SessionLocal()
+        self.blobs = blobs or blob_store
 
     def save_page(self, url, content):
         existing_page = self.get_page_by_url(url)
         if existing_page:
             print(f"URL já existe no banco de dados: {url}")
             return existing_page
-        
-        page = Page(url=url, content=content, crawled=True)
+
+        content_hash = hash_content(content)
+        if content is not None:
+            self.blobs.put(content_hash, content, url)
+        page = Page(url=url, crawled=True, content_hash=content_hash, fetched_at=utc_now())
         self.db.add(page)
         self.db.commit()
         self.db.refresh(page)
         return page
 
+    def save_pages(self, pages):
+        # Upsert em lote numa única transação: URLs novas são inseridas e as existentes só são
+        # reescritas quando o hash do conteúdo mudou (sem SELECT por linha). Uma página sem corpo
+        # (fetch que falhou) não substitui a cópia armazenada
+        if not pages:
+            return
+        pages = [self.store_body(page) for page in pages]
+        statement = sqlite_insert(Page)
+        statement = statement.on_conflict_do_update(
+            index_elements=['url'],
+            set_={column: statement.excluded[column]
+                  for column in ('content', 'crawled', 'etag', 'last_modified', 'content_hash', 'fetched_at')},
+            where=Page.content_hash.is_distinct_from(statement.excluded.content_hash)
+            & statement.excluded.content_hash.is_not(None))
+        try:
+            self.db.execute(statement, pages)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def refresh_validators(self, pages):
+        # Página inalterada (304 ou mesmo hash): só os validadores e o fetched_at são regravados, num
+        # UPDATE em lote. Sem isso um ETag trocado pelo servidor nunca mais daria 304, e o lastmod dos
+        # sitemaps seria comparado com a data do primeiro download
+        if not pages:
+            return
+        statement = (update(Page.__table__).where(Page.__table__.c.url == bindparam('page_url'))
+                     .values(etag=bindparam('etag'), last_modified=bindparam('last_modified'),
+                             fetched_at=bindparam('fetched_at')))
+        try:
+            self.db.execute(statement, [{'page_url': page['url'], 'etag': page['etag'], 'last_modified': page['last_modified'],
+                                         'fetched_at': page['fetched_at']} for page in pages])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+    def store_body(self, page):
+        # Corpo no BlobStore (gravado uma vez por hash) e a linha só com os metadados
+        if page.get('content') is None:
+            return page
+        content_hash = page.get('content_hash') or hash_content(page['content'])
+        self.blobs.put(content_hash, page['content'], page['url'])
+        return {**page, 'content': None, 'content_hash': content_hash}
+
     def get_all_pages(self):
         return self.db.query(Page).all()
 
     def get_page_by_url(self, url):
         return self.db.query(Page).filter(Page.url == url).first()
 
+    # Leituras feitas pelas threads de fetch usam sessões próprias: self.db pertence ao PageWriter
+    def get_validators(self, url):
+        with Session(bind=self.db.get_bind()) as db:
+            return db.query(Page.etag, Page.last_modified, Page.content_hash).filter(Page.url == url).first()
+
+    def get_unchanged_since(self, lastmods):
+        # URLs (de {url: lastmod}) cuja cópia armazenada foi baixada depois do lastmod, numa consulta por lote
+        urls = [url for url, lastmod in lastmods.items() if lastmod is not None]
+        if not urls:
+            return set()
+        with Session(bind=self.db.get_bind()) as db:
+            rows = db.query(Page.url, Page.fetched_at).filter(Page.url.in_(urls), Page.content_hash.isnot(None),
+                                                             Page.fetched_at.isnot(None)).all()
+        return {url for url, fetched_at in rows if fetched_at >= lastmods[url]}
+
+    def get_content(self, url):
+        chunks = self.open_content(url)
+        return None if chunks is None else ''.join(chunks)
+
+    def open_content(self, url):
+        # Corpo da página em pedaços de texto, lidos sob demanda do BlobStore; None se não há corpo
+        with Session(bind=self.db.get_bind()) as db:
+            row = db.query(Page.content, Page.content_hash).filter(Page.url == url).first()
+        if row is None or (row.content is None and row.content_hash is None):
+            return None
+        if row.content is not None:
+            return iter([row.content])
+        if not self.blobs.exists(row.content_hash):
+            logging.warning(f"Missing body blob {row.content_hash} for {url}")
+            return None
+        return self.blobs.open(row.content_hash)
+
+    def migrate_inline_content(self, batch_size=WRITE_BATCH_SIZE):
+        # Move para o BlobStore os corpos de bancos antigos guardados na coluna content
+        moved = 0
+        while True:
+            rows = self.db.query(Page.id, Page.url, Page.content).filter(Page.content.isnot(None)).limit(batch_size).all()
+            if not rows:
+                return moved
+            for row in rows:
+                content_hash = hash_content(row.content)
+                self.blobs.put(content_hash, row.content, row.url)
+                self.db.query(Page).filter(Page.id == row.id).update({'content': None, 'content_hash': content_hash})
+            self.db.commit()
+            moved += len(rows)
+
+    def prune_blobs(self):
+        # Apaga os blobs que nenhuma página referencia mais (ex.: depois de clear_all_pages)
+        referenced = {content_hash for content_hash, in self.db.query(Page.content_hash).distinct()}
+        orphaned = [content_hash for content_hash in self.blobs.hashes() if content_hash not in referenced]
+        for content_hash in orphaned:
+            self.blobs.delete(content_hash)
+        return len(orphaned)
+
     def get_status(self):
         total_pages = self.db.query(Page).count()
         crawled_pages = self.db.query(Page).filter(Page.crawled == True).count()
@@ -38,4 +165,114 @@ class Storage:
         self.db.commit()
         self.db.refresh(history)
         return history
-        
\ No newline at end of file
+
+
+_STOP = object()
+
+
+# Gravação write-behind: os fetchers enfileiram páginas num buffer limitado (put() bloqueia quando
+# ele enche, aplicando backpressure) e uma thread grava em lotes de batch_size. Páginas inalteradas
+# entram com put_validators(), que só atualiza os metadados da linha.
+# on_flush recebe as URLs de cada lote já gravado (ex.: para marcá-las como visitadas na fronteira).
+# Com search_index, o texto extraído das páginas (put_text) é indexado nos mesmos lotes, sob a base
+class PageWriter:
+    def __init__(self, storage, batch_size=WRITE_BATCH_SIZE, buffer_size=WRITE_BUFFER_SIZE,
+                 flush_interval=WRITE_FLUSH_INTERVAL, on_flush=None, search_index=None, base=None):
+        self.storage = storage
+        self.on_flush = on_flush
+        self.search_index = search_index
+        self.base = base
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = queue.Queue(maxsize=buffer_size)
+        self.pages_written = 0
+        self.pages_indexed = 0
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def put(self, url, content, etag=None, last_modified=None, content_hash=None):
+        self.buffer.put({'url': url, 'content': content, 'crawled': True, 'etag': etag,
+                         'last_modified': last_modified,
+                         'content_hash': content_hash if content_hash is not None else hash_content(content),
+                         'fetched_at': utc_now()})
+
+    def put_validators(self, url, etag=None, last_modified=None):
+        self.buffer.put({'url': url, 'etag': etag, 'last_modified': last_modified, 'fetched_at': utc_now(),
+                         'unchanged': True})
+
+    def put_text(self, url, text):
+        if self.search_index is not None:
+            self.buffer.put({'url': url, 'text': text})
+
+    def full(self):
+        return self.buffer.full()
+
+    def close(self):
+        if self.thread is not None:
+            self.buffer.put(_STOP)
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        batch = []
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.buffer.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                self._flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+            if len(batch) >= self.batch_size or (batch and time.monotonic() - last_flush >= self.flush_interval):
+                self._flush(batch)
+                batch = []
+                last_flush = time.monotonic()
+
+    def _flush(self, batch):
+        pages = [item for item in batch if 'text' not in item and 'unchanged' not in item]
+        unchanged = [item for item in batch if 'unchanged' in item]
+        documents = [(item['url'], item['text']) for item in batch if 'text' in item]
+        base = self.base or ''
+        if documents:
+            try:
+                start = time.perf_counter()
+                self.search_index.add_documents(self.base, documents)
+                DB_WRITE_SECONDS.observe(time.perf_counter() - start, base, 'search')
+                PAGES_INDEXED.inc(base, amount=len(documents))
+                self.pages_indexed += len(documents)
+            except Exception as e:
+                logging.error(f"Failed to index batch of {len(documents)} pages: {e}")
+        if not pages and not unchanged:
+            return
+        try:
+            start = time.perf_counter()
+            self.storage.save_pages(pages)
+            self.storage.refresh_validators(unchanged)
+            DB_WRITE_SECONDS.observe(time.perf_counter() - start, base, 'pages')
+            PAGES_WRITTEN.inc(base, amount=len(pages))
+            self.pages_written += len(pages)
+            logging.debug("Flushed %s pages (%s unchanged) to the database", len(pages), len(unchanged))
+        except Exception as e:
+            logging.error(f"Failed to save batch of {len(pages) + len(unchanged)} pages: {e}")
+            return
+        if self.on_flush is not None:
+            self.on_flush([page['url'] for page in pages + unchanged])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Manutenção do armazenamento de páginas")
+    parser.add_argument('--migrate', action='store_true', help="Move os corpos da coluna content para o BlobStore")
+    parser.add_argument('--prune', action='store_true', help="Apaga blobs sem página")
+    args = parser.parse_args()
+    storage = Storage()
+    if args.migrate:
+        print(f"{storage.migrate_inline_content()} páginas migradas para {storage.blobs.path}")
+    if args.prune:
+        print(f"{storage.prune_blobs()} blobs órfãos apagados")
@@ -1,30 +1,20 @@
-import pandas as pd
-from sqlalchemy.orm import sessionmaker
-from models.database import engine, SessionLocal
-from models.history import History
+# Importa um histórico de crawls (CSV ou Parquet com url, profundidade, paginas_extraidas e
+# area_atuacao) para a tabela history, em lotes:
+#
+#   python import_data.py history_sample.csv
+#   python import_data.py historico.parquet --chunk-size 100000
+import argparse
 
-# Caminho para o arquivo CSV
-file_path = 'history_sample.csv'
+from models.database import init_db
+from ml.history import import_history
+from config import HISTORY_CHUNK_SIZE
 
-# Ler o arquivo CSV
-df = pd.read_csv(file_path)
+parser = argparse.ArgumentParser(description="Importa o histórico de crawls para o banco de dados")
+parser.add_argument('path', nargs='?', default='history_sample.csv', help="Arquivo CSV ou Parquet")
+parser.add_argument('--chunk-size', type=int, default=HISTORY_CHUNK_SIZE, help="Linhas lidas e gravadas por vez")
+args = parser.parse_args()
 
-# Conectar ao banco de dados
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-session = SessionLocal()
+init_db()
+imported, skipped = import_history(args.path, args.chunk_size)
 
-# Importar os dados para o banco de dados
-for index, row in df.iterrows():
-    history_entry = History(
-        url=row['url'],
-        profundidade=row['profundidade'],
-        paginas_extraidas=row['paginas_extraidas'],
-        area_atuacao=row['area_atuacao']
-    )
-    session.add(history_entry)
-
-# Commit e fechar a sessão
-session.commit()
-session.close()
-
-print(f"Dados importados com sucesso de {file_path} para o banco de dados.")
+print(f"{imported} linhas importadas de {args.path} para o banco de dados ({skipped} inválidas descartadas).")
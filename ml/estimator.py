@@ -0,0 +1,61 @@
+import numpy as np
+
+# Definir as áreas de atuação suportadas
+SUPPORTED_AREAS = [
+    'technology', 'health', 'finance', 'education', 'entertainment',
+    'ecommerce', 'social_media', 'news', 'travel', 'public_services', 'blogs'
+]
+AREA_INDEX = {area: i for i, area in enumerate(SUPPORTED_AREAS)}
+
+
+# Regressão linear do estimador de páginas pré-compilada: os coeficientes do modelo treinado
+# viram um peso para a profundidade, um para a média histórica e um vetor com o peso de cada
+# área, então uma previsão é intercepto + três termos (e um lote, operações vetoriais do NumPy).
+# Não depende do scikit-learn nem do pandas em tempo de inferência.
+class PagePredictor:
+    def __init__(self, columns, coef, intercept, area_means=None):
+        weights = dict(zip(columns, np.asarray(coef, dtype=np.float64).tolist()))
+        self.columns = list(columns)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.depth_weight = weights.get('profundidade', 0.0)
+        self.mean_weight = weights.get('media_paginas_extraidas', 0.0)
+        self.area_weights = np.array([weights.get(f'area_atuacao_{area}', 0.0) for area in SUPPORTED_AREAS])
+        # Média de páginas extraídas por (área, profundidade) no histórico de treino; 0 se não houver
+        self.area_means = dict(area_means or {})
+
+    @classmethod
+    def from_model(cls, model, columns, area_means=None):
+        return cls(columns, model.coef_, model.intercept_, area_means)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            area_means = {(str(area), int(depth)): float(value) for area, depth, value
+                          in zip(data['mean_areas'], data['mean_depths'], data['mean_values'])}
+            return cls(data['columns'].tolist(), data['coef'], data['intercept'], area_means)
+
+    def save(self, path):
+        keys = list(self.area_means)
+        np.savez(path, columns=np.array(self.columns), coef=self.coef, intercept=np.float64(self.intercept),
+                 mean_areas=np.array([area for area, _ in keys], dtype=str),
+                 mean_depths=np.array([depth for _, depth in keys], dtype=np.int64),
+                 mean_values=np.array([self.area_means[key] for key in keys], dtype=np.float64))
+
+    def predict_batch(self, areas, depths):
+        # Previsões para pares (área, profundidade) de uma vez
+        areas = list(areas)
+        unknown = [area for area in areas if area not in AREA_INDEX]
+        if unknown:
+            raise ValueError(f"Área de atuação '{unknown[0]}' não reconhecida")
+        area_index = np.fromiter((AREA_INDEX[area] for area in areas), dtype=np.intp, count=len(areas))
+        depths = np.asarray(depths, dtype=np.float64)
+        predictions = self.intercept + self.depth_weight * depths + self.area_weights[area_index]
+        if self.area_means and self.mean_weight:
+            means = np.fromiter((self.area_means.get((area, int(depth)), 0.0) for area, depth in zip(areas, depths)),
+                                dtype=np.float64, count=len(areas))
+            predictions += self.mean_weight * means
+        return predictions
+
+    def predict(self, area, depth):
+        return float(self.predict_batch([area], [depth])[0])
@@ -0,0 +1,96 @@
+import logging
+import os
+
+import numpy as np
+from sqlalchemy.exc import SQLAlchemyError
+
+from models.database import engine
+from models.history import History
+from ml.estimator import SUPPORTED_AREAS
+from config import HISTORY_CHUNK_SIZE
+
+HISTORY_COLUMNS = ['url', 'profundidade', 'paginas_extraidas', 'area_atuacao']
+
+# Área como código numérico (índice em SUPPORTED_AREAS) direto no SQL: as linhas saem só com
+# números e viram um array do NumPy sem passar por objetos por coluna
+_AREA_CODE = "CASE area_atuacao " + " ".join(f"WHEN '{area}' THEN {i}" for i, area in enumerate(SUPPORTED_AREAS)) + " END"
+_TRAINABLE = (f"area_atuacao IN ({', '.join(repr(area) for area in SUPPORTED_AREAS)}) "
+              "AND profundidade IS NOT NULL AND paginas_extraidas IS NOT NULL")
+
+
+def append_history(url, profundidade, paginas_extraidas, area_atuacao, bind=engine):
+    # Uma execução concluída vira uma linha de histórico, usada no próximo treino do estimador
+    try:
+        with bind.begin() as conn:
+            conn.execute(History.__table__.insert(), {'url': url, 'profundidade': profundidade,
+                                                      'paginas_extraidas': paginas_extraidas,
+                                                      'area_atuacao': area_atuacao})
+    except SQLAlchemyError as e:
+        logging.error(f"Failed to record history for {url}: {e}")
+
+
+def read_history_file(path, chunk_size=HISTORY_CHUNK_SIZE):
+    # Lotes (DataFrames) de um CSV ou Parquet, sem carregar o arquivo inteiro
+    import pandas as pd
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        import pyarrow.parquet as pq  # Dependência opcional
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=HISTORY_COLUMNS):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=HISTORY_COLUMNS, chunksize=chunk_size)
+
+
+def clean_history_chunk(df):
+    # Descarta linhas sem URL, profundidade ou páginas (ou com números inválidos) e normaliza os tipos
+    import pandas as pd
+    df = df.assign(profundidade=pd.to_numeric(df['profundidade'], errors='coerce'),
+                   paginas_extraidas=pd.to_numeric(df['paginas_extraidas'], errors='coerce'))
+    df = df.dropna(subset=['url', 'profundidade', 'paginas_extraidas'])
+    area = df['area_atuacao'].astype(object).where(df['area_atuacao'].notna(), None)
+    return list(zip(df['url'].astype(str), df['profundidade'].astype(np.int64).tolist(),
+                    df['paginas_extraidas'].astype(np.int64).tolist(), area.tolist()))
+
+
+def import_history(path, chunk_size=HISTORY_CHUNK_SIZE, bind=engine):
+    # Cada lote é gravado num executemany dentro de uma transação; devolve (importadas, descartadas)
+    imported = skipped = 0
+    connection = bind.raw_connection()
+    try:
+        for chunk in read_history_file(path, chunk_size):
+            rows = clean_history_chunk(chunk)
+            connection.cursor().executemany(
+                "INSERT INTO history (url, profundidade, paginas_extraidas, area_atuacao) VALUES (?, ?, ?, ?)", rows)
+            connection.commit()
+            imported += len(rows)
+            skipped += len(chunk) - len(rows)
+            logging.info(f"Imported {imported} history rows")
+    finally:
+        connection.close()
+    return imported, skipped
+
+
+def history_means(bind=engine):
+    # Média de páginas extraídas por (área, profundidade), agregada pelo próprio SQLite
+    with bind.connect() as conn:
+        rows = conn.exec_driver_sql(f"SELECT area_atuacao, profundidade, AVG(paginas_extraidas) FROM history "
+                                    f"WHERE {_TRAINABLE} GROUP BY area_atuacao, profundidade").fetchall()
+    return {(area, int(depth)): float(mean) for area, depth, mean in rows}
+
+
+def iter_history_arrays(chunk_size=HISTORY_CHUNK_SIZE, where=None, bind=engine):
+    # Lotes do histórico treinável como arrays colunares (código da área, profundidade, páginas).
+    # O cursor do driver é usado direto: converter linhas do SQLAlchemy em arrays é bem mais lento
+    sql = (f"SELECT {_AREA_CODE}, profundidade, paginas_extraidas FROM history WHERE {_TRAINABLE}"
+           + (f" AND ({where})" if where else ""))
+    connection = bind.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(sql)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            block = np.array(rows, dtype=np.float64)
+            yield block[:, 0].astype(np.intp), block[:, 1], block[:, 2]
+    finally:
+        connection.close()
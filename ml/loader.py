@@ -0,0 +1,56 @@
+import logging
+import threading
+import time
+
+_MISSING = object()
+
+
+# Recurso pesado (modelo, pipeline de NLP) carregado no primeiro get(), uma única vez mesmo com
+# várias threads pedindo ao mesmo tempo. O módulo que o define não paga a importação da biblioteca:
+# o import fica dentro da factory.
+class LazyResource:
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self._value = _MISSING
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._value is not _MISSING
+
+    def get(self):
+        if self._value is _MISSING:
+            with self._lock:
+                if self._value is _MISSING:
+                    start = time.perf_counter()
+                    self._value = self.factory()
+                    logging.info(f"Loaded {self.name} in {time.perf_counter() - start:.2f}s")
+        return self._value
+
+
+_resources = {}
+
+
+def lazy_resource(name, factory):
+    # Registra o recurso no loader compartilhado, para que warm_up() possa pré-carregá-lo
+    resource = LazyResource(name, factory)
+    _resources[name] = resource
+    return resource
+
+
+def warm_up(names=None, background=True):
+    # Carrega os recursos registrados (todos ou os nomeados); em segundo plano, a chamada volta na hora
+    def load():
+        for name in names or list(_resources):
+            try:
+                _resources[name].get()
+            except Exception as e:
+                logging.error(f"Failed to warm up {name}: {e}")
+
+    if not background:
+        load()
+        return None
+    thread = threading.Thread(target=load, name='ml-warm-up', daemon=True)
+    thread.start()
+    return thread
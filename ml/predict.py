@@ -1,42 +1,69 @@
-import joblib
-import pandas as pd
-import spacy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
 
-# Carregar o modelo treinado e as colunas
-model = joblib.load('ml/page_estimator_model.pkl')
-model_columns = joblib.load('ml/model_columns.pkl')
+from config import (CLASSIFY_MAX_CHARS, CLASSIFY_BATCH_SIZE, CLASSIFY_CACHE_SIZE, CLASSIFY_EXCLUDED_COMPONENTS,
+                    PREDICTOR_PATH, PAGE_MODEL_PATH, MODEL_COLUMNS_PATH, PREDICT_CACHE_SIZE)
+from ml.estimator import PagePredictor
+from ml.loader import lazy_resource
+from crawler.metrics import CLASSIFY_SECONDS
 
-# Carregar o modelo de linguagem spaCy
-nlp = spacy.load('en_core_web_sm')
 
-# Definir as áreas de atuação suportadas
-SUPPORTED_AREAS = [
-    'technology', 'health', 'finance', 'education', 'entertainment',
-    'ecommerce', 'social_media', 'news', 'travel', 'public_services', 'blogs'
-]
+def load_predictor():
+    # Coeficientes pré-compilados (.npz, só NumPy); sem eles, extraídos do modelo scikit-learn salvo
+    if os.path.exists(PREDICTOR_PATH):
+        return PagePredictor.load(PREDICTOR_PATH)
+    import joblib
+    return PagePredictor.from_model(joblib.load(PAGE_MODEL_PATH), joblib.load(MODEL_COLUMNS_PATH))
+
+
+def load_nlp():
+    # Carregar o modelo de linguagem spaCy só com o necessário para lematizar (sem parser e NER)
+    import spacy
+    return spacy.load('en_core_web_sm', exclude=CLASSIFY_EXCLUDED_COMPONENTS)
+
+
+# Carregados no primeiro uso (ou pelo warm_up da API): importar este módulo não carrega spaCy nem modelos
+predictor = lazy_resource('predictor', load_predictor)
+nlp = lazy_resource('nlp', load_nlp)
+
+AREA_KEYWORDS = {
+    "technology": {"technology", "tech", "software", "hardware", "tecnologia", "software", "hardware"},
+    "health": {"health", "medicine", "medical", "wellness", "saúde", "medicina", "médico", "bem-estar"},
+    "finance": {"finance", "banking", "investment", "money", "finanças", "banco", "investimento", "dinheiro"},
+    "education": {"education", "school", "university", "learning", "educação", "escola", "universidade", "aprendizado"},
+    "entertainment": {"entertainment", "movies", "music", "games", "entretenimento", "filmes", "música", "jogos"},
+    "ecommerce": {"e-commerce", "shopping", "store", "compras", "loja", "varejo"},
+    "social_media": {"social media", "community", "rede social", "comunidade"},
+    "news": {"news", "publications", "notícias", "publicações", "jornal", "revista"},
+    "travel": {"travel", "tourism", "viagens", "turismo", "destino", "hotel", "resort"},
+    "public_services": {"public services", "government", "portais", "serviços públicos", "governo"},
+    "blogs": {"blogs", "forums", "fóruns", "blog"}
+}
+
+# Índice único lema -> áreas, montado uma vez: cada token custa um lookup em vez de 11 testes
+LEMMA_AREAS = {}
+for _area, _keywords in AREA_KEYWORDS.items():
+    for _keyword in _keywords:
+        LEMMA_AREAS.setdefault(_keyword, []).append(_area)
+
+# Classificações já feitas, por hash do texto (LRU)
+_classifications = OrderedDict()
+_classifications_lock = threading.Lock()
 
-def classify_text(content: str) -> str:
-    doc = nlp(content)
-    areas = {
-        "technology": {"technology", "tech", "software", "hardware", "tecnologia", "software", "hardware"},
-        "health": {"health", "medicine", "medical", "wellness", "saúde", "medicina", "médico", "bem-estar"},
-        "finance": {"finance", "banking", "investment", "money", "finanças", "banco", "investimento", "dinheiro"},
-        "education": {"education", "school", "university", "learning", "educação", "escola", "universidade", "aprendizado"},
-        "entertainment": {"entertainment", "movies", "music", "games", "entretenimento", "filmes", "música", "jogos"},
-        "ecommerce": {"e-commerce", "shopping", "store", "compras", "loja", "varejo"},
-        "social_media": {"social media", "community", "rede social", "comunidade"},
-        "news": {"news", "publications", "notícias", "publicações", "jornal", "revista"},
-        "travel": {"travel", "tourism", "viagens", "turismo", "destino", "hotel", "resort"},
-        "public_services": {"public services", "government", "portais", "serviços públicos", "governo"},
-        "blogs": {"blogs", "forums", "fóruns", "blog"}
-    }
-
-    area_scores = {area: 0 for area in areas}
 
+def _text_key(content):
+    return hashlib.sha256(content.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def _score(doc):
+    area_scores = {area: 0 for area in AREA_KEYWORDS}
     for token in doc:
-        for area, keywords in areas.items():
-            if token.lemma_ in keywords:
-                area_scores[area] += 1
+        for area in LEMMA_AREAS.get(token.lemma_, ()):
+            area_scores[area] += 1
 
     # Determinar a área com a maior pontuação
     classified_area = max(area_scores, key=area_scores.get)
@@ -44,34 +71,46 @@ def classify_text(content: str) -> str:
         return "other"
     return classified_area
 
-def predict_pages(area_atuacao: str, profundidade: int) -> float:
-    # Verificar se a área de atuação é suportada
-    if area_atuacao not in SUPPORTED_AREAS:
-        raise ValueError(f"Área de atuação '{area_atuacao}' não reconhecida")
 
-    # Criar um DataFrame com os dados fornecidos
-    data = {
-        'profundidade': [profundidade],
-        'media_paginas_extraidas': [0]  # Placeholder, este valor será ajustado posteriormente
-    }
-    df = pd.DataFrame(data)
+def classify_texts(contents, batch_size=CLASSIFY_BATCH_SIZE):
+    # Classifica vários textos de uma vez: os já vistos saem do cache, o resto passa pelo nlp.pipe em lotes
+    start = time.perf_counter()
+    texts = [(content or '')[:CLASSIFY_MAX_CHARS] for content in contents]
+    keys = [_text_key(text) for text in texts]
+    results = {}
+    with _classifications_lock:
+        for key in keys:
+            if key in _classifications:
+                _classifications.move_to_end(key)
+                results[key] = _classifications[key]
 
-    # Adicionar colunas de área de atuação com valor 0
-    for area in SUPPORTED_AREAS:
-        df[f'area_atuacao_{area}'] = 0
+    pending = {key: text for key, text in zip(keys, texts) if key not in results}
+    if pending:
+        docs = nlp.get().pipe(pending.values(), batch_size=batch_size)
+        computed = {key: _score(doc) for key, doc in zip(pending, docs)}
+        results.update(computed)
+        with _classifications_lock:
+            _classifications.update(computed)
+            while len(_classifications) > CLASSIFY_CACHE_SIZE:
+                _classifications.popitem(last=False)
 
-    # Definir a coluna correspondente à área de atuação fornecida como 1
-    df[f'area_atuacao_{area_atuacao}'] = 1
+    CLASSIFY_SECONDS.observe(time.perf_counter() - start)
+    return [results[key] for key in keys]
 
-    # Garantir que todas as colunas estejam presentes no DataFrame
-    for col in model_columns:
-        if col not in df.columns:
-            df[col] = 0
 
-    # Reordenar as colunas para garantir que correspondam ao modelo
-    df = df[model_columns]
+def classify_text(content: str) -> str:
+    return classify_texts([content])[0]
+
+
+@lru_cache(maxsize=PREDICT_CACHE_SIZE)
+def predict_pages(area_atuacao: str, profundidade: int) -> float:
+    return predictor.get().predict(area_atuacao, profundidade)
 
-    # Fazer a previsão usando o modelo treinado
-    predicted_pages = model.predict(df)[0]
 
-    return predicted_pages
+def predict_pages_batch(pairs) -> list:
+    # Estimativas para vários pares (área de atuação, profundidade) numa única operação vetorial
+    pairs = list(pairs)
+    if not pairs:
+        return []
+    areas, depths = zip(*pairs)
+    return predictor.get().predict_batch(areas, depths).tolist()
@@ -1,75 +1,69 @@
+import argparse
 import sys
 import os
-from sqlalchemy.orm import sessionmaker
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
-import joblib
+import numpy as np
 
 # Adiciona o caminho do diretório raiz do projeto ao sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from models.database import engine, SessionLocal
-from models.history import History
-
-def train_model():
-    # Conectar ao banco de dados usando SQLAlchemy
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    session = SessionLocal()
-
-    # Carregar os dados
-    data = session.query(History).all()
-    session.close()
-
-    # Converter os dados para um DataFrame do pandas
-    df = pd.DataFrame([{
-        'url': d.url,
-        'profundidade': d.profundidade,
-        'paginas_extraidas': d.paginas_extraidas,
-        'area_atuacao': d.area_atuacao
-    } for d in data])
-
-    # Agrupar os dados por área de atuação e profundidade para calcular a média de páginas extraídas
-    area_depth_grouped = df.groupby(['area_atuacao', 'profundidade'])['paginas_extraidas'].mean().reset_index()
-    area_depth_grouped.columns = ['area_atuacao', 'profundidade', 'media_paginas_extraidas']
-
-    # Mesclar a média de páginas extraídas por área de atuação e profundidade de volta ao DataFrame original
-    df = pd.merge(df, area_depth_grouped, on=['area_atuacao', 'profundidade'], how='left')
-
-    # Codificar a característica de área de atuação
-    df = pd.get_dummies(df, columns=['area_atuacao'])
-
-    # Garantir que todas as colunas dummy estejam presentes
-    all_possible_areas = [
-        'technology', 'health', 'finance', 'education', 'entertainment',
-        'ecommerce', 'social_media', 'news', 'travel', 'public_services', 'blogs'
-    ]
-    for area in all_possible_areas:
-        if f'area_atuacao_{area}' not in df.columns:
-            df[f'area_atuacao_{area}'] = 0
-
-    # Separar os recursos e o alvo
-    X = df.drop(columns=['paginas_extraidas', 'url'])
-    y = df['paginas_extraidas']
-
-    # Dividir os dados em conjuntos de treinamento e teste
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    # Treinar o modelo de regressão linear
-    model = LinearRegression()
-    model.fit(X_train, y_train)
-
-    # Fazer previsões
-    y_pred = model.predict(X_test)
-
-    # Avaliar o modelo
-    mse = mean_squared_error(y_test, y_pred)
+from models.database import engine
+from ml.estimator import PagePredictor, SUPPORTED_AREAS
+from ml.history import history_means, iter_history_arrays
+from config import PREDICTOR_PATH, HISTORY_CHUNK_SIZE
+
+FEATURE_COLUMNS = ['profundidade', 'media_paginas_extraidas'] + [f'area_atuacao_{area}' for area in SUPPORTED_AREAS]
+# Uma em cada cinco linhas (pelo id) fica para o teste
+TEST_SPLIT = "id % 5 = 0"
+TRAIN_SPLIT = "id % 5 != 0"
+
+
+def design_matrix(areas, depths, mean_table):
+    # Intercepto, profundidade, média histórica da (área, profundidade) e a área em one-hot
+    X = np.zeros((len(areas), 3 + len(SUPPORTED_AREAS)))
+    X[:, 0] = 1.0
+    X[:, 1] = depths
+    X[:, 2] = mean_table[areas, depths.astype(np.intp)]
+    X[np.arange(len(areas)), 3 + areas] = 1.0
+    return X
+
+
+def train_model(chunk_size=HISTORY_CHUNK_SIZE, bind=engine, path=PREDICTOR_PATH):
+    # Regressão linear em streaming: o histórico é lido em lotes de arrays e só as somas XᵀX e Xᵀy
+    # (14x14 e 14) ficam em memória, então o treino não depende do tamanho da tabela
+
+    # 1ª passada (no SQLite): média de páginas extraídas por área e profundidade
+    area_means = history_means(bind)
+    if not area_means:
+        raise ValueError("Histórico vazio: nada para treinar")
+    mean_table = np.zeros((len(SUPPORTED_AREAS), max(depth for _, depth in area_means) + 1))
+    for (area, depth), mean in area_means.items():
+        mean_table[SUPPORTED_AREAS.index(area), depth] = mean
+
+    # 2ª passada: equações normais acumuladas sobre os lotes de treino
+    size = 3 + len(SUPPORTED_AREAS)
+    xtx, xty = np.zeros((size, size)), np.zeros(size)
+    for areas, depths, pages in iter_history_arrays(chunk_size, TRAIN_SPLIT, bind):
+        X = design_matrix(areas, depths, mean_table)
+        xtx += X.T @ X
+        xty += X.T @ pages
+    # lstsq dá a solução de norma mínima, como o LinearRegression, quando colunas são colineares
+    # (a média histórica e as áreas em one-hot costumam ser)
+    solution = np.linalg.lstsq(xtx, xty, rcond=None)[0]
+
+    # 3ª passada: erro quadrático médio nos lotes de teste
+    squared_error, count = 0.0, 0
+    for areas, depths, pages in iter_history_arrays(chunk_size, TEST_SPLIT, bind):
+        squared_error += float(np.sum((design_matrix(areas, depths, mean_table) @ solution - pages) ** 2))
+        count += len(pages)
+    mse = squared_error / count if count else float('nan')
     print(f'Mean Squared Error: {mse}')
 
-    # Salvar o modelo e as colunas
-    joblib.dump(model, 'ml/page_estimator_model.pkl')
-    joblib.dump(X.columns.tolist(), 'ml/model_columns.pkl')
+    PagePredictor(FEATURE_COLUMNS, solution[1:], solution[0], area_means).save(path)
+    return mse
+
 
 if __name__ == "__main__":
-    train_model()
+    parser = argparse.ArgumentParser(description="Treina o estimador de páginas com o histórico de crawls")
+    parser.add_argument('--chunk-size', type=int, default=HISTORY_CHUNK_SIZE, help="Linhas do histórico lidas por vez")
+    args = parser.parse_args()
+    train_model(args.chunk_size)
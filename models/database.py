@@ -1,19 +1,46 @@
+import importlib
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+import os, sys
 
 DATABASE_URL = "sqlite:///./storage.db"
 
 Base = declarative_base()
 
 engine = create_engine(DATABASE_URL)
+
+# WAL permite leituras da API concorrentes com as gravações em lote do crawler
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def upgrade_schema():
+    # create_all não altera tabelas existentes: adiciona as colunas novas dos modelos a bancos antigos
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+
 def init_db():
     # Importar os modelos aqui para que eles sejam registrados com o Base
-    import page
-    import history
+    for module in ('models.page', 'models.history'):
+        importlib.import_module(module)
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
 
 if __name__ == "__main__":
-    init_db()
+    # Executado como script: usar o módulo do pacote, que é o mesmo Base importado pelos modelos
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    importlib.import_module('models.database').init_db()
     
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
 import os, sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from models.database import Base
@@ -8,6 +8,10 @@ class Page(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String, unique=True, index=True)
-    content = Column(Text)
+    content = Column(Text)  # Só em bancos antigos: os corpos novos ficam no BlobStore (crawler/blobs.py)
     crawled = Column(Boolean, default=False)
-    
\ No newline at end of file
+    # Validadores HTTP e hash do conteúdo para recrawl incremental (GET condicional)
+    etag = Column(String)
+    last_modified = Column(String)
+    content_hash = Column(String(64))
+    fetched_at = Column(DateTime)
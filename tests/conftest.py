@@ -0,0 +1,32 @@
+import functools
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.scheduler
+import app.state
+import crawler.frontier
+import crawler.search
+import crawler.storage
+from crawler.blobs import BlobStore
+from crawler.search import SearchIndex
+from ml.history import append_history
+from models.database import Base
+from models.history import History
+from models.page import Page
+
+
+# Os crawls dos testes gravam num storage.db, blob store, índice de busca e estado de crawl
+# temporários, nunca nos arquivos de trabalho da raiz do repositório
+@pytest.fixture(autouse=True)
+def isolated_stores(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'storage.db'}")
+    Base.metadata.create_all(bind=engine, tables=[Page.__table__, History.__table__])
+    monkeypatch.setattr(crawler.storage, 'SessionLocal', sessionmaker(bind=engine))
+    monkeypatch.setattr(crawler.storage, 'blob_store', BlobStore(str(tmp_path / 'blobs')))
+    monkeypatch.setattr(crawler.search, '_search_index', SearchIndex(str(tmp_path / 'search_index.db')))
+    monkeypatch.setattr(crawler.frontier, 'CRAWL_STATE_PATH', str(tmp_path / 'crawl_state.db'))
+    monkeypatch.setattr(app.state, 'CRAWL_STATE_PATH', str(tmp_path / 'crawl_state.db'))
+    monkeypatch.setattr(app.scheduler, 'append_history', functools.partial(append_history, bind=engine))
+    return engine
@@ -0,0 +1,65 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base
+from models.page import Page
+from crawler.blobs import BlobStore
+from crawler.storage import Storage, hash_content
+
+
+def site_page(i):
+    header = "<html><head><link rel='stylesheet' href='/static/site.css'></head><body>\n" + \
+             "\n".join(f"<li><a href='/secao/{n}'>Seção número {n} do portal</a></li>" for n in range(40))
+    footer = "\n<footer>Todos os direitos reservados ao portal de notícias de exemplo</footer></body></html>"
+    return f"{header}\n<article><h1>Artigo {i}</h1><p>Conteúdo único do artigo {i} " + "ção " * i + f"</p></article>{footer}"
+
+
+def test_blob_round_trip_streams_and_deduplicates(tmp_path):
+    store = BlobStore(str(tmp_path), dict_samples=0)
+    content = "página com acentuação " * 20000
+    content_hash = hash_content(content)
+
+    assert store.put(content_hash, content, "http://a/1") is True
+    assert store.put(content_hash, content, "http://b/2") is False
+
+    chunks = list(store.open(content_hash))
+    assert len(chunks) > 1
+    assert ''.join(chunks) == content
+    assert list(store.hashes()) == [content_hash]
+    assert store.stats()['blobs_deduplicados'] == 1
+    assert store.stats()['bytes_comprimidos'] < store.stats()['bytes_originais'] / 10
+
+
+def test_domain_dictionary_is_trained_and_shrinks_later_pages(tmp_path):
+    store = BlobStore(str(tmp_path / 'with'), dict_samples=5)
+    plain = BlobStore(str(tmp_path / 'without'), dict_samples=0)
+    pages = [site_page(i) for i in range(10)]
+    for i, page in enumerate(pages):
+        store.put(hash_content(page), page, f"http://site.com/{i}")
+        plain.put(hash_content(page), page, f"http://site.com/{i}")
+
+    late = hash_content(pages[-1])
+    with open(store.blob_path(late), 'rb') as f:
+        assert not f.readline().endswith(b' -\n')
+    assert (tmp_path / 'with' / 'dicts').is_dir()
+    assert len(open(store.blob_path(late), 'rb').read()) < len(open(plain.blob_path(late), 'rb').read())
+
+    # Outro processo lê os blobs com o dicionário guardado em disco
+    assert BlobStore(str(tmp_path / 'with')).read(late) == pages[-1]
+
+
+def test_legacy_inline_content_is_migrated_and_orphans_pruned(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'storage.db'}")
+    Base.metadata.create_all(bind=engine)
+    storage = Storage(sessionmaker(bind=engine)(), BlobStore(str(tmp_path / 'blobs')))
+    storage.db.add(Page(url="http://a/old", content="corpo antigo", crawled=True))
+    storage.db.commit()
+    storage.save_page("http://a/new", "corpo novo")
+    storage.blobs.put(hash_content("órfão"), "órfão")
+
+    assert storage.get_content("http://a/old") == "corpo antigo"
+    assert storage.migrate_inline_content() == 1
+    assert storage.get_page_by_url("http://a/old").content is None
+    assert storage.get_content("http://a/old") == "corpo antigo"
+    assert storage.prune_blobs() == 1
+    assert sorted(storage.blobs.hashes()) == sorted([hash_content("corpo antigo"), hash_content("corpo novo")])
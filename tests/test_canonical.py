@@ -0,0 +1,41 @@
+import pytest
+
+from crawler.canonical import UrlCanonicalizer
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTP://Example.COM/page", "http://example.com/page"),
+    ("http://example.com:80/page", "http://example.com/page"),
+    ("https://example.com:443/page", "https://example.com/page"),
+    ("http://example.com:8080/page", "http://example.com:8080/page"),
+    ("http://example.com/page/", "http://example.com/page"),
+    ("http://example.com/page#top", "http://example.com/page"),
+    ("http://example.com/a/./b/../page", "http://example.com/a/page"),
+    ("http://example.com", "http://example.com/"),
+    ("http://example.com/page?b=2&a=1", "http://example.com/page?a=1&b=2"),
+    ("http://example.com/page?utm_source=x&id=3&fbclid=y", "http://example.com/page?id=3"),
+    ("http://example.com/page;jsessionid=ABC?PHPSESSID=1", "http://example.com/page"),
+    ("mailto:someone@example.com", "mailto:someone@example.com"),
+])
+def test_canonicalize(url, expected):
+    assert UrlCanonicalizer().canonicalize(url) == expected
+
+
+def test_strip_rules_come_from_configuracoes():
+    canonicalizer = UrlCanonicalizer.from_configuracoes({'strip_params': ['ref'], 'strip_trailing_slash': False})
+
+    assert canonicalizer.canonicalize("http://a.com/p/?ref=home&utm_source=x") == "http://a.com/p/?utm_source=x"
+
+
+def test_counts_fetches_saved_once_per_raw_variant():
+    canonicalizer = UrlCanonicalizer()
+
+    canonical = "http://a.com/page"
+
+    canonicalizer.record(canonical, canonical, canonical_known=False)
+    canonicalizer.record("http://a.com/page/", canonical, canonical_known=True)
+    canonicalizer.record("http://a.com/page/", canonical, canonical_known=True)
+    canonicalizer.record("http://a.com/page#top", canonical, canonical_known=True)
+    canonicalizer.record(canonical, canonical, canonical_known=True)
+
+    assert canonicalizer.fetches_saved == 2
@@ -0,0 +1,52 @@
+import pytest
+import spacy
+from spacy.language import Language
+
+from ml import predict
+from ml.loader import LazyResource
+
+
+@Language.component("lower_lemma")
+def lower_lemma(doc):
+    for token in doc:
+        token.lemma_ = token.lower_
+    return doc
+
+
+@pytest.fixture
+def nlp(monkeypatch):
+    # Pipeline mínimo e determinístico no lugar do en_core_web_sm, contando os textos processados
+    nlp = spacy.blank("en")
+    nlp.add_pipe("lower_lemma")
+    processed = []
+    original_pipe = nlp.pipe
+
+    def pipe(texts, **kwargs):
+        texts = list(texts)
+        processed.extend(texts)
+        return original_pipe(texts, **kwargs)
+
+    monkeypatch.setattr(nlp, "pipe", pipe, raising=False)
+    monkeypatch.setattr(predict, "nlp", LazyResource("nlp", lambda: nlp))
+    monkeypatch.setattr(predict, "_classifications", predict.OrderedDict())
+    return processed
+
+
+def test_classify_texts_in_batch(nlp):
+    areas = predict.classify_texts(["Software and hardware news", "A hotel resort for travel", "nothing here"])
+
+    assert areas == ["technology", "travel", "other"]
+
+
+def test_classifications_are_memoized_by_content(nlp):
+    predict.classify_text("School and university")
+    assert predict.classify_text("School and university") == "education"
+    assert predict.classify_texts(["School and university", "Banking money"]) == ["education", "finance"]
+
+    assert nlp == ["School and university", "Banking money"]
+
+
+def test_long_texts_are_truncated(nlp, monkeypatch):
+    monkeypatch.setattr(predict, "CLASSIFY_MAX_CHARS", 10)
+
+    assert predict.classify_text("nothing.. " + "health " * 100) == "other"
@@ -1,5 +1,6 @@
 import pytest
 from crawler.core import WebCrawler
+from crawler.async_core import AsyncWebCrawler
 import logging
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -22,33 +23,107 @@ def test_crawler_with_local_server(crawler):
     logging.debug(f"Total links extracted: {total_links_extracted}")
     assert total_links_extracted == 3
 
-def test_crawler_with_non_html_page(crawler, base_url):
-    crawler.base_url = base_url + "/page7.html"
-    crawler.visited_urls = set()
+@pytest.mark.parametrize("seed, crawler_cls", [("/docs/", WebCrawler), ("/docs", WebCrawler), ("/docs/", AsyncWebCrawler)])
+def test_links_resolve_against_the_fetched_url(base_url, seed, crawler_cls):
+    # A forma canônica perde a barra final; /docs é redirecionada para /docs/ pelo servidor
+    crawler = crawler_cls(base_url + seed, 1, allowed_file_types=['.html', ''])
+
+    crawler.crawl()
+
+    assert crawler.processed_urls == [base_url + "/docs", base_url + "/docs/intro.html"]
+
+def test_crawler_with_non_html_page(base_url):
+    crawler = WebCrawler(base_url=base_url + "/page7.html", depth=1, allowed_file_types=['.html', ''], max_workers=1)
 
     crawler.crawl()
 
     total_links_extracted = crawler.get_total_links_extracted()
     logging.debug(f"Total links extracted: {total_links_extracted}")
-    assert total_links_extracted == 1
+    assert total_links_extracted == 2  # page7.html + nonhtml.txt (buscado, mas sem conteúdo HTML)
+
+def test_fetch_discards_bodies_above_max_size(base_url):
+    crawler = WebCrawler(base_url=base_url, depth=1, max_workers=1, configuracoes={'max_body_size': 100})
+
+    result = crawler.fetch(base_url + "/index.html")
+
+    assert result.status_code == 200
+    assert result.content is None
 
-def test_crawler_with_blocked_by_robots(crawler, base_url):
-    crawler.base_url = base_url + "/page1.html"
-    crawler.visited_urls = set()
+def test_crawler_with_blocked_by_robots(base_url):
+    crawler = WebCrawler(base_url=base_url + "/page1.html", depth=1, allowed_file_types=['.html', ''], max_workers=1)
 
     crawler.crawl()
 
     total_links_extracted = crawler.get_total_links_extracted()
     logging.debug(f"Total links extracted: {total_links_extracted}")
-    assert total_links_extracted == 1  # Blocked by robots.txt
+    assert total_links_extracted == 3  # page1, page3 e page4; blocked.html é barrada pelo robots.txt
+    assert base_url + "/blocked.html" not in crawler.processed_urls
 
-def test_crawler_with_slow_response(crawler, base_url):
-    crawler.base_url = f"{base_url}/slowpage.html"
-    crawler.visited_urls = set()
+def test_crawler_with_slow_response(base_url):
+    crawler = WebCrawler(base_url=f"{base_url}/slowpage.html", depth=1, allowed_file_types=['.html', ''], max_workers=1)
 
     crawler.crawl()
 
     total_links_extracted = crawler.get_total_links_extracted()
     logging.debug(f"Total links extracted: {total_links_extracted}")
 
-    assert total_links_extracted == 1, "Expected to extract exactly 1 link"
+    assert total_links_extracted == 2, "Expected the slow page and its single link"
+
+def test_visited_urls_are_not_shared_between_crawlers(crawler, base_url):
+    crawler.crawl()
+    second = WebCrawler(base_url=base_url, depth=1, allowed_file_types=['.html', ''], max_workers=1,
+                        configuracoes={'seen_backend': 'fingerprint'})
+
+    second.crawl()
+
+    assert second.get_total_links_extracted() == 3
+
+@pytest.mark.parametrize("parse_processes", [0, 2])
+def test_parse_stage_runs_inline_or_in_process_pool(base_url, parse_processes):
+    crawler = WebCrawler(base_url=base_url, depth=2, allowed_file_types=['.html', ''], max_workers=4,
+                         configuracoes={'parse_processes': parse_processes})
+
+    crawler.crawl()
+
+    stats = crawler.get_stage_stats()
+    assert crawler.get_total_links_extracted() == 7
+    assert stats['fetch']['items'] == 7
+    if parse_processes:
+        assert stats['parse']['items'] == 3  # Sem deduplicação nem índice de busca, a profundidade máxima não passa pelo parse
+        assert stats['parse']['queue_depth'] == 0
+    else:
+        assert 'parse' not in stats
+
+def test_near_duplicates_are_not_stored(base_url):
+    crawler = WebCrawler(base_url=base_url + "/duplicates.html", depth=1, max_workers=1,
+                         configuracoes={'parse_processes': 0, 'incremental': False, 'near_duplicates': True})
+    crawler.storage.clear_all_pages()
+
+    crawler.crawl()
+
+    report = crawler.get_duplicate_report()
+    assert crawler.get_total_links_extracted() == 3
+    assert report == {'paginas_duplicadas': 1,
+                      'clusters': [{'url': base_url + "/article.html", 'duplicadas': [base_url + "/article-print.html"]}]}
+    assert crawler.storage.get_page_by_url(base_url + "/article.html") is not None
+    assert crawler.storage.get_page_by_url(base_url + "/article-print.html") is None
+
+def test_recrawl_uses_conditional_get(base_url):
+    WebCrawler(base_url=base_url, depth=1, allowed_file_types=['.html', ''], max_workers=2).crawl()
+    recrawl = WebCrawler(base_url=base_url, depth=1, allowed_file_types=['.html', ''], max_workers=2)
+
+    recrawl.crawl()
+
+    # O servidor local responde 304 ao If-Modified-Since; os links saem da cópia armazenada
+    assert recrawl.get_total_links_extracted() == 3
+    assert recrawl.get_pages_unchanged() == 3
+
+def test_async_crawler_with_local_server(base_url):
+    crawler = AsyncWebCrawler(base_url=base_url, depth=2, allowed_file_types=['.html', ''], max_concurrency=20)
+
+    crawler.crawl()
+
+    crawled = set(crawler.processed_urls)
+    assert crawler.get_total_links_extracted() == 7
+    assert base_url + "/blocked.html" not in crawled
+    assert base_url + "/page5.html" in crawled
@@ -0,0 +1,58 @@
+from crawler.dedup import simhash, NearDuplicateIndex, merge_duplicate_reports
+
+ARTICLE = ("Web crawlers visit pages by following links from a set of seed addresses. Each fetched page is "
+           "parsed, its visible text is stored and every new link found on it is added to the crawl frontier. "
+           "Catalog sites often serve the same article under several addresses, such as print views, paginated "
+           "copies or session variants, which wastes fetches and storage when they are crawled again and again "
+           "without any kind of near duplicate detection. A crawler that recognises these copies stores each "
+           "article once, keeps the frontier focused on new content and spends its politeness budget on pages "
+           "that actually add information to the knowledge base.")
+OTHER = ("The scheduler divides a fixed budget of worker threads between the active knowledge bases. Each base "
+         "receives a share proportional to its priority, queued bases wait until a slot frees up, and paused "
+         "bases keep their pending addresses on disk so that they can resume later without losing any work.")
+# Páginas de catálogo com o mesmo vocabulário em outra combinação: iguais como palavras isoladas
+CATALOG_ITEM = ("Blue cotton shirt size small price ten dollars red wool sweater size large price twenty dollars "
+                "green linen trousers size medium price thirty dollars in stock ships today free returns")
+OTHER_ITEM = ("Red cotton shirt size large price thirty dollars green wool sweater size small price ten dollars "
+              "blue linen trousers size medium price twenty dollars in stock ships today free returns")
+
+
+def test_similar_texts_have_close_fingerprints():
+    original = simhash(ARTICLE, min_words=10)
+
+    assert (original ^ simhash(ARTICLE + " Print", min_words=10)).bit_count() <= 3
+    assert (original ^ simhash(OTHER, min_words=10)).bit_count() > 3
+    assert simhash("Home About Contact", min_words=10) is None
+
+
+def test_word_shingles_tell_catalog_pages_apart():
+    assert simhash(CATALOG_ITEM, min_words=10, shingle_size=1) == simhash(OTHER_ITEM, min_words=10, shingle_size=1)
+    assert (simhash(CATALOG_ITEM, min_words=10) ^ simhash(OTHER_ITEM, min_words=10)).bit_count() > 3
+
+
+def test_index_finds_near_duplicates_within_distance():
+    index = NearDuplicateIndex(max_distance=3)
+
+    assert index.check("http://a.com/1", 0b1011 << 40) is None
+    assert index.check("http://a.com/2", (0b1011 << 40) ^ 0b111) == "http://a.com/1"
+    assert index.check("http://a.com/3", (0b1011 << 40) ^ 0b1111) is None
+    assert index.check("http://a.com/4", 0b1011 << 40) == "http://a.com/1"
+
+
+def test_report_lists_largest_clusters_first():
+    index = NearDuplicateIndex(max_distance=0)
+    for url, fingerprint in [("a", 1), ("b", 2), ("a-print", 1), ("b-print", 2), ("b-page2", 2)]:
+        index.check(url, fingerprint)
+
+    assert index.report(limit=1) == {'paginas_duplicadas': 3,
+                                     'clusters': [{'url': "b", 'duplicadas': ["b-print", "b-page2"]}]}
+
+
+def test_reports_of_a_resumed_crawl_are_merged():
+    first = {'paginas_duplicadas': 1, 'clusters': [{'url': "a", 'duplicadas': ["a-print"]}]}
+    second = {'paginas_duplicadas': 2, 'clusters': [{'url': "b", 'duplicadas': ["b-print"]},
+                                                    {'url': "a", 'duplicadas': ["a-page2"]}]}
+
+    assert merge_duplicate_reports(None, second) == second
+    assert merge_duplicate_reports(first, second) == {'paginas_duplicadas': 3, 'clusters': [
+        {'url': "a", 'duplicadas': ["a-print", "a-page2"]}, {'url': "b", 'duplicadas': ["b-print"]}]}
@@ -0,0 +1,151 @@
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from benchmarks.synthetic_site import SiteSpec, make_server
+from crawler.distributed import (DistributedWorker, SharedFrontier, SQLiteSharedFrontier, SharedNearDuplicateIndex,
+                                 ingest_pages, start_sitemap_discovery, submit_knowledge_base, run_worker)
+from crawler.search import SearchIndex
+from crawler.storage import PageWriter
+from tests.test_storage import make_storage
+
+BASE_URL = "http://localhost:8081"
+
+
+def test_leases_are_partitioned_by_host(tmp_path):
+    frontier = SQLiteSharedFrontier(str(tmp_path / "shared.db"))
+    frontier.submit('kb', ["http://a.com/1", "http://a.com/2", "http://b.com/1"], 1)
+
+    first = frontier.lease('worker-1')
+    second = frontier.lease('worker-2')
+
+    assert [lease.url for lease in first] == ["http://a.com/1", "http://a.com/2"]
+    assert [lease.url for lease in second] == ["http://b.com/1"]
+    assert frontier.lease('worker-3') == []
+
+
+def test_completed_urls_release_the_host_and_enqueue_links(tmp_path):
+    frontier = SQLiteSharedFrontier(str(tmp_path / "shared.db"))
+    frontier.submit('kb', ["http://a.com/1"], 1)
+
+    [lease] = frontier.lease('worker-1')
+    frontier.complete('worker-1', 'kb', lease.url, [("http://a.com/2", 1), ("http://a.com/1", 1)])
+
+    assert frontier.progress('kb') == {'pending': 1, 'leased': 0, 'done': 1}
+    assert [lease.url for lease in frontier.lease('worker-2')] == ["http://a.com/2"]
+
+
+def test_sitemap_urls_are_leased_by_priority_and_unchanged_ones_are_skipped(tmp_path):
+    frontier = SQLiteSharedFrontier(str(tmp_path / "shared.db"))
+    frontier.submit('kb', ["http://a.com/"], 1)
+
+    assert frontier.enqueue('kb', [("http://a.com/old", 1, "http://a.com/old", 0),
+                                   ("http://a.com/new", 1, "http://a.com/new", -10),
+                                   ("http://a.com/", 1, "http://a.com/", 0)]) == 2
+    frontier.mark_unchanged('kb', ["http://a.com/same"])
+    [seed, *leases] = frontier.lease('worker-1')
+
+    assert [lease.url for lease in leases] == ["http://a.com/new", "http://a.com/old"]
+    assert frontier.contains('kb', "http://a.com/same")
+    for lease in [seed, *leases]:
+        frontier.complete('worker-1', 'kb', lease.url, [("http://a.com/same", 1)])
+    assert frontier.finished('kb')
+    assert frontier.progress('kb') == {'pending': 0, 'leased': 0, 'done': 3}
+
+
+def test_expired_leases_are_requeued(tmp_path):
+    frontier = SQLiteSharedFrontier(str(tmp_path / "shared.db"))
+    frontier.submit('kb', ["http://a.com/1"], 1)
+
+    assert frontier.lease('worker-1', lease_seconds=0.1)
+    assert frontier.lease('worker-2') == []
+    time.sleep(0.2)
+
+    assert [lease.url for lease in frontier.lease('worker-2')] == ["http://a.com/1"]
+    assert not frontier.finished('kb')
+
+
+def test_worker_processes_crawl_the_local_server(tmp_path):
+    path = str(tmp_path / "shared.db")
+    frontier = SQLiteSharedFrontier(path)
+    submit_knowledge_base(frontier, 'kb-distribuida', [BASE_URL], 2)
+
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=run_worker, args=(path, f"worker-{i}", True)) for i in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+
+    assert all(worker.exitcode == 0 for worker in workers)
+    assert frontier.finished('kb-distribuida')
+    assert frontier.progress('kb-distribuida')['done'] == 7  # Mesmo resultado do crawl local com profundidade 2
+
+    # As páginas chegam ao storage e ao índice do coordenador, não aos dos workers
+    storage, search_index = make_storage(tmp_path), SearchIndex(str(tmp_path / "search_index.db"))
+    writer = PageWriter(storage, search_index=search_index, base='kb-distribuida').start()
+    ingest_pages(frontier, 'kb-distribuida', writer)
+    writer.close()
+    assert len(storage.get_all_pages()) == 7
+    assert search_index.count('kb-distribuida') == 7
+    assert frontier.take_pages('kb-distribuida') == []
+
+
+def test_shared_frontier_is_abstract():
+    with pytest.raises(TypeError):
+        SharedFrontier()
+
+
+def test_pages_are_handed_over_with_the_completed_url(tmp_path):
+    frontier = SQLiteSharedFrontier(str(tmp_path / "shared.db"))
+    frontier.submit('kb', ["http://a.com/1"], 1)
+    [lease] = frontier.lease('worker-1')
+    page = {'url': lease.url, 'content': "<html></html>", 'etag': '"e1"', 'last_modified': None, 'content_hash': "h"}
+
+    frontier.complete('worker-1', 'kb', lease.url, [], [page, {'url': lease.url, 'text': "texto"}])
+
+    assert frontier.take_pages('kb', limit=1) == [page]
+    assert frontier.take_pages('kb') == [{'url': lease.url, 'text': "texto"}]
+    assert frontier.take_pages('kb') == []
+
+
+def test_near_duplicates_are_detected_across_workers(tmp_path):
+    path = str(tmp_path / "shared.db")
+    # Um índice por worker, cada um com a própria conexão à fronteira
+    first = SharedNearDuplicateIndex(SQLiteSharedFrontier(path), 'kb', 3)
+    second = SharedNearDuplicateIndex(SQLiteSharedFrontier(path), 'kb', 3)
+    fingerprint = (1 << 63) | 0b1011  # Bit alto ligado: guardado com sinal no SQLite
+
+    assert first.check("http://a.com/1", fingerprint) is None
+    assert first.check("http://a.com/1", fingerprint) is None  # Arrendamento refeito: a própria URL não conta
+    assert second.check("http://b.com/1", fingerprint ^ 0b110) == "http://a.com/1"
+    assert second.check("http://b.com/2", fingerprint ^ 0b1111 << 20) is None
+    assert first.report() == {'paginas_duplicadas': 1,
+                              'clusters': [{'url': "http://a.com/1", 'duplicadas': ["http://b.com/1"]}]}
+
+
+def test_coordinator_reads_the_sitemaps_into_the_shared_frontier(tmp_path):
+    server = make_server(SiteSpec(pages=40, fan_out=3, page_size=500, disallowed_fraction=0.1, sitemap=True, sitemap_size=10))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    public = sum(1 for page in range(40) if server.RequestHandlerClass.site.robots_allows(page) or page == 0)
+    frontier = SQLiteSharedFrontier(str(tmp_path / "shared.db"))
+    submit_knowledge_base(frontier, 'kb-sitemaps', [base_url], 1, {'search_index': False})
+    try:
+        discovery = start_sitemap_discovery(frontier, 'kb-sitemaps')
+        deadline = time.monotonic() + 30
+        while discovery.frontier.in_flight:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        assert not frontier.finished('kb-sitemaps')
+
+        DistributedWorker(frontier, 'worker-1', poll_interval=0.05).run(stop_when_idle=True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Sem os sitemaps, a profundidade 1 chegaria só à raiz e aos 3 filhos dela
+    assert frontier.progress('kb-sitemaps')['done'] == public
+    assert discovery.get_sitemap_report()['urls_enfileiradas'] >= public - 4
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import aiohttp
+import pytest
+
+from crawler.core import WebCrawler
+from crawler.async_core import AsyncWebCrawler
+from crawler.download import BodyReader, BodyLimitExceeded, check_declared_length
+
+
+def test_decodes_multibyte_characters_split_across_chunks():
+    data = "<p>ação</p>".encode('utf-8')
+    reader = BodyReader('utf-8')
+    for i in range(len(data)):
+        reader.feed(data[i:i + 1])
+
+    assert reader.text() == "<p>ação</p>"
+
+
+def test_stops_reading_above_max_body_size():
+    reader = BodyReader('utf-8', max_body_size=10)
+    reader.feed(b"x" * 10)
+
+    with pytest.raises(BodyLimitExceeded):
+        reader.feed(b"x")
+
+
+def test_stops_reading_after_deadline():
+    reader = BodyReader('utf-8', read_deadline=-1)
+
+    with pytest.raises(BodyLimitExceeded):
+        reader.feed(b"x")
+
+
+def test_rejects_declared_length_before_reading():
+    with pytest.raises(BodyLimitExceeded):
+        check_declared_length({'Content-Length': '2048'}, 1024)
+    check_declared_length({'Content-Length': '512'}, 1024)
+    check_declared_length({}, 1024)
+
+
+def test_unknown_encoding_falls_back_to_utf8():
+    reader = BodyReader('not-a-charset')
+    reader.feed("é".encode('utf-8'))
+
+    assert reader.text() == "é"
+
+
+class DripHandler(BaseHTTPRequestHandler):
+    # Cabeçalhos na hora e o corpo a um byte a cada 0,5 s
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path != '/drip':
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', '20')
+        self.end_headers()
+        try:
+            for _ in range(20):
+                self.wfile.write(b"x")
+                self.wfile.flush()
+                time.sleep(0.5)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def drip_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DripHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/drip"
+    server.shutdown()
+
+
+@pytest.mark.parametrize("crawler_cls", [WebCrawler, AsyncWebCrawler])
+def test_read_deadline_cuts_a_slow_drip(drip_url, crawler_cls):
+    crawler = crawler_cls(drip_url, 0, configuracoes={'read_deadline': 1, 'parse_processes': 0})
+
+    async def fetch_async():
+        async with aiohttp.ClientSession() as session:
+            return await crawler.fetch_async(session, drip_url)
+
+    start = time.monotonic()
+    result = asyncio.run(fetch_async()) if crawler_cls is AsyncWebCrawler else crawler.fetch(drip_url)
+
+    assert result.content is None
+    assert time.monotonic() - start < 2
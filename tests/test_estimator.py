@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from ml.estimator import PagePredictor, SUPPORTED_AREAS
+
+COLUMNS = ['profundidade', 'media_paginas_extraidas'] + [f'area_atuacao_{area}' for area in SUPPORTED_AREAS]
+
+
+def trained_model():
+    rng = np.random.default_rng(0)
+    X = np.zeros((200, len(COLUMNS)))
+    X[:, 0] = rng.integers(1, 6, 200)
+    X[:, 1] = rng.uniform(0, 100, 200)
+    X[np.arange(200), 2 + rng.integers(0, len(SUPPORTED_AREAS), 200)] = 1
+    y = X @ rng.uniform(-5, 5, len(COLUMNS)) + 7
+    return LinearRegression().fit(X, y)
+
+
+def test_predictor_matches_the_linear_model_in_batch(tmp_path):
+    model = trained_model()
+    predictor = PagePredictor.from_model(model, COLUMNS, {('news', 2): 40.0})
+    pairs = [(area, depth) for area in SUPPORTED_AREAS for depth in range(1, 4)]
+
+    expected = []
+    for area, depth in pairs:
+        row = dict.fromkeys(COLUMNS, 0.0)
+        row.update({'profundidade': depth, 'media_paginas_extraidas': 40.0 if (area, depth) == ('news', 2) else 0.0,
+                    f'area_atuacao_{area}': 1.0})
+        expected.append(model.predict(np.array([[row[column] for column in COLUMNS]]))[0])
+
+    batch = predictor.predict_batch([area for area, _ in pairs], [depth for _, depth in pairs])
+    assert np.allclose(batch, expected)
+    assert predictor.predict('news', 2) == pytest.approx(expected[pairs.index(('news', 2))])
+
+    predictor.save(tmp_path / 'estimator.npz')
+    loaded = PagePredictor.load(tmp_path / 'estimator.npz')
+    assert np.allclose(loaded.predict_batch([area for area, _ in pairs], [depth for _, depth in pairs]), expected)
+
+
+def test_unknown_area_is_rejected():
+    predictor = PagePredictor.from_model(trained_model(), COLUMNS)
+
+    with pytest.raises(ValueError, match="other"):
+        predictor.predict_batch(['news', 'other'], [1, 2])
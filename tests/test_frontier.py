@@ -0,0 +1,66 @@
+from crawler.frontier import Frontier, PersistentFrontier
+
+
+def test_frontier_orders_by_depth_and_dedups():
+    frontier = Frontier(max_depth=2)
+    assert frontier.put("http://a/2", 2)
+    assert frontier.put("http://a/0", 0)
+    assert frontier.put("http://a/1", 1)
+    assert not frontier.put("http://a/1", 1)  # Duplicada
+    assert not frontier.put("http://a/3", 3)  # Além da profundidade máxima
+    frontier.mark_seen("http://a/unchanged")
+    assert not frontier.put("http://a/unchanged", 1)  # Vista sem ser enfileirada
+
+    assert [frontier.get()[0] for _ in range(3)] == ["http://a/0", "http://a/1", "http://a/2"]
+
+
+def test_frontier_orders_by_priority_within_a_depth_and_waits_for_holders():
+    frontier = Frontier(max_depth=1)
+    frontier.put("http://a/link", 1)
+    frontier.put("http://a/old", 1, priority=-100)
+    frontier.put("http://a/new", 1, priority=-200)
+    frontier.hold()  # Ex.: sitemaps ainda sendo lidos
+
+    assert [frontier.get()[0] for _ in range(3)] == ["http://a/new", "http://a/old", "http://a/link"]
+    for _ in range(3):
+        frontier.task_done()
+    assert not frontier.finished
+    frontier.task_done()
+    assert frontier.finished
+
+
+def test_frontier_finishes_only_when_nothing_in_flight():
+    frontier = Frontier(max_depth=1)
+    frontier.put("http://a/", 0)
+
+    assert frontier.get() == ("http://a/", 0, "http://a/")
+    assert not frontier.finished
+    frontier.put("http://a/child", 1, fetch_url="http://a/child/")
+    frontier.task_done()
+
+    assert frontier.get() == ("http://a/child", 1, "http://a/child/")
+    frontier.task_done()
+    assert frontier.finished
+    assert frontier.get() is None
+
+
+def test_persistent_frontier_resumes_pending_urls(tmp_path):
+    path = tmp_path / "crawl_state.db"
+    frontier = PersistentFrontier("base", max_depth=2, path=path)
+    frontier.put("http://a/", 0)
+    frontier.put("http://a/1", 1)
+    frontier.put("http://a/2", 1, fetch_url="http://a/2/")
+    frontier.get()
+    frontier.mark_visited(["http://a/"])
+    frontier.close()
+
+    resumed = PersistentFrontier("base", max_depth=2, path=path)
+    assert resumed.seeds() == ["http://a/"]
+    assert not resumed.put("http://a/", 0)  # Já visitada
+    assert resumed.put("http://a/3", 1)  # Nova URL mesclada à fronteira existente
+    assert [resumed.get()[::2] for _ in range(3)] == [("http://a/1", "http://a/1"), ("http://a/2", "http://a/2/"),
+                                                      ("http://a/3", "http://a/3")]
+
+    resumed.clear()
+    resumed.close()
+    assert len(PersistentFrontier("base", max_depth=2, path=path)) == 0
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sqlalchemy import create_engine
+
+from models.database import Base
+from ml.estimator import PagePredictor, SUPPORTED_AREAS
+from ml.history import append_history, import_history, iter_history_arrays
+from ml.train_model import train_model
+
+
+def make_history(tmp_path, rows=300):
+    rng = np.random.default_rng(1)
+    areas = rng.choice(SUPPORTED_AREAS, rows)
+    depths = rng.integers(1, 5, rows)
+    pages = (depths * 30 + rng.integers(0, 40, rows)).astype(object)
+    df = pd.DataFrame({'url': [f"http://site{i}.com" for i in range(rows)], 'profundidade': depths,
+                       'paginas_extraidas': pages, 'area_atuacao': areas})
+    df.loc[3, 'paginas_extraidas'] = 'n/a'
+    df.loc[4, 'area_atuacao'] = 'unknown'
+    path = tmp_path / 'history.csv'
+    df.to_csv(path, index=False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'storage.db'}")
+    Base.metadata.create_all(bind=engine)
+    return path, engine
+
+
+def test_import_is_chunked_and_drops_invalid_rows(tmp_path):
+    path, engine = make_history(tmp_path)
+
+    assert import_history(str(path), chunk_size=64, bind=engine) == (299, 1)
+    append_history("http://new.com", 2, 75, 'news', bind=engine)
+
+    chunks = list(iter_history_arrays(chunk_size=100, bind=engine))
+    assert [len(areas) for areas, _, _ in chunks] == [100, 100, 99]
+    areas, depths, pages = (np.concatenate(column) for column in zip(*chunks))
+    assert (SUPPORTED_AREAS[areas[-1]], depths[-1], pages[-1]) == ('news', 2, 75)
+
+
+def test_streaming_training_matches_the_linear_regression(tmp_path):
+    path, engine = make_history(tmp_path)
+    import_history(str(path), chunk_size=64, bind=engine)
+
+    train_model(chunk_size=50, bind=engine, path=tmp_path / 'estimator.npz')
+    predictor = PagePredictor.load(tmp_path / 'estimator.npz')
+
+    # Mesmo treino, em memória, com pandas e scikit-learn
+    df = pd.read_sql("SELECT * FROM history", engine)
+    df = df[df['area_atuacao'].isin(SUPPORTED_AREAS)]
+    df['media_paginas_extraidas'] = df.groupby(['area_atuacao', 'profundidade'])['paginas_extraidas'].transform('mean')
+    X = pd.get_dummies(df[['profundidade', 'media_paginas_extraidas', 'area_atuacao']], columns=['area_atuacao'])
+    X = X.reindex(columns=predictor.columns, fill_value=0).astype(float)
+    train = df['id'] % 5 != 0
+    model = LinearRegression().fit(X[train], df['paginas_extraidas'][train])
+
+    predicted = predictor.predict_batch(df['area_atuacao'], df['profundidade'])
+    assert np.allclose(predicted, model.predict(X), atol=1e-6)
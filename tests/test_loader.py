@@ -0,0 +1,44 @@
+import subprocess
+import sys
+import threading
+import time
+
+from ml.loader import LazyResource, lazy_resource, warm_up
+
+
+def test_lazy_resource_loads_once_under_concurrency():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    resource = LazyResource('modelo', factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(resource.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not LazyResource('outro', factory).loaded
+    assert resource.loaded
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_warm_up_loads_registered_resources_in_background():
+    resource = lazy_resource('test-warm-up', lambda: 'carregado')
+
+    warm_up(['test-warm-up']).join(timeout=5)
+
+    assert resource.loaded and resource.get() == 'carregado'
+
+
+def test_crawler_workers_do_not_import_ml_libraries():
+    code = ("import sys, crawler.core, crawler.distributed; "
+            "print(sorted(m for m in ('spacy', 'sklearn', 'pandas') if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+    assert output.stdout.strip() == '[]'
@@ -0,0 +1,54 @@
+from crawler import metrics
+from crawler.core import WebCrawler
+from crawler.metrics import (MetricsRegistry, PAGES_FETCHED, FETCH_PHASE_SECONDS, ROBOTS_BLOCKED, ROBOTS_CHECK_SECONDS,
+                             HOST_REQUESTS, PARSE_SECONDS, DB_WRITE_SECONDS)
+
+
+def test_registry_renders_prometheus_text_format():
+    registry = MetricsRegistry()
+    fetched = registry.counter('pages_total', 'Pages fetched', ('base', 'status'))
+    latency = registry.histogram('latency_seconds', 'Latency', ('base',), buckets=(0.1, 1))
+    registry.gauge('queue_depth', 'Queue depth', ('queue',), lambda: {('parse',): 3})
+
+    fetched.inc('a "b"', '200')
+    fetched.inc('a "b"', '200', amount=2)
+    latency.observe(0.05, 'kb')
+    latency.observe(0.5, 'kb')
+    latency.observe(5, 'kb')
+
+    text = registry.render()
+    assert '# TYPE pages_total counter\npages_total{base="a \\"b\\"",status="200"} 3\n' in text
+    assert 'latency_seconds_bucket{base="kb",le="0.1"} 1\n' in text
+    assert 'latency_seconds_bucket{base="kb",le="1.0"} 2\n' in text
+    assert 'latency_seconds_bucket{base="kb",le="+Inf"} 3\n' in text
+    assert 'latency_seconds_sum{base="kb"} 5.55\n' in text
+    assert 'latency_seconds_count{base="kb"} 3\n' in text
+    assert '# TYPE queue_depth gauge\nqueue_depth{queue="parse"} 3\n' in text
+
+
+def test_host_label_cardinality_is_bounded(monkeypatch):
+    monkeypatch.setattr(metrics, '_hosts', set())
+    monkeypatch.setattr(metrics, 'METRICS_MAX_HOSTS', 2)
+
+    labels = [metrics.host_label(host) for host in ('a.com', 'b.com', 'c.com', 'a.com')]
+
+    assert labels == ['a.com', 'b.com', 'other', 'a.com']
+
+
+def test_crawl_records_per_base_counters_and_phase_latencies():
+    base = 'metrics-kb'
+    crawler = WebCrawler(base_url="http://localhost:8081/page1.html", depth=1, max_workers=1, nome=base,
+                         configuracoes={'parse_processes': 0, 'search_index': False, 'incremental': False})
+
+    crawler.crawl()
+
+    assert PAGES_FETCHED.value(base, '200') == crawler.get_total_links_extracted() == 3
+    assert HOST_REQUESTS.value('localhost:8081', '2xx') >= 3
+    assert ROBOTS_BLOCKED.value(base) >= 1
+    assert ROBOTS_CHECK_SECONDS.count(base) >= 3
+    assert FETCH_PHASE_SECONDS.count(base, 'ttfb') == 3
+    assert FETCH_PHASE_SECONDS.count(base, 'download') == 3
+    assert FETCH_PHASE_SECONDS.count(base, 'connect') >= 1
+    assert FETCH_PHASE_SECONDS.count(base, 'dns') >= 1
+    assert PARSE_SECONDS.count(base) == 1  # Só a semente: as páginas na profundidade máxima não passam pelo parse
+    assert DB_WRITE_SECONDS.count(base, 'pages') >= 1
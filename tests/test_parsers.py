@@ -0,0 +1,49 @@
+import pytest
+
+from crawler.parsers import parse_html, create_parser
+
+HTML = """<!DOCTYPE html>
+<html>
+<head><title>Catalog</title><base href="/shop/"><script>document.write('<a href="no.html">')</script></head>
+<body>
+    <a href="item1.html">Item 1</a>
+    <a href="http://other.com/x">Other</a>
+    <style>.hidden {}</style>
+    <p>Visible   text</p>
+    <a>No href</a>
+</body>
+</html>"""
+
+
+@pytest.mark.parametrize("backend", ["lxml", "html.parser"])
+def test_parser_honours_base_href_and_extracts_visible_text(backend):
+    page = parse_html(HTML, "http://site.com/nested/page.html", backend)
+
+    assert page.links == ["http://site.com/shop/item1.html", "http://other.com/x"]
+    assert page.text == "Catalog Item 1 Other Visible text No href"
+
+
+@pytest.mark.parametrize("backend", ["lxml", "html.parser"])
+def test_main_text_leaves_out_navigation_and_footer(backend):
+    html = ("<html><head><title>Item</title></head><body><header><nav><a href='/'>Home</a></nav></header>"
+            "<p>Blue cotton shirt</p><aside>Related</aside><footer>Copyright</footer></body></html>")
+
+    page = parse_html(html, "http://site.com/item.html", backend)
+
+    assert page.text == "Item Home Blue cotton shirt Related Copyright"
+    assert page.main_text == "Item Blue cotton shirt"
+
+
+def test_lxml_parser_accepts_incremental_chunks():
+    parser = create_parser("http://site.com/nested/page.html", "lxml")
+    data = HTML.encode()
+    for i in range(0, len(data), 7):
+        parser.feed(data[i:i + 7])
+
+    assert parser.close().links == ["http://site.com/shop/item1.html", "http://other.com/x"]
+
+
+def test_relative_links_join_against_the_page_url():
+    page = parse_html('<a href="child.html">c</a>', "http://site.com/dir/page.html")
+
+    assert page.links == ["http://site.com/dir/child.html"]
@@ -0,0 +1,23 @@
+import threading
+
+from crawler.pipeline import ParseStage, get_parse_pool
+
+HTML = '<html><body><a href="/next">next</a></body></html>'
+
+
+def test_a_slow_consumer_does_not_stall_other_crawls_sharing_the_pool():
+    pool = get_parse_pool()
+    slow, fast = ParseStage('lxml', 4, pool=pool), ParseStage('lxml', 4, pool=pool)
+    release = threading.Event()
+    parsed = []
+
+    slow.submit(HTML, "http://slow.com/", lambda page, error: release.wait(10))
+    fast.submit(HTML, "http://fast.com/", lambda page, error: parsed.append((page.links, threading.current_thread())))
+    fast.close()
+
+    assert not release.is_set()
+    assert parsed[0][0] == ["http://fast.com/next"]
+    assert parsed[0][1].name == "parse-results"
+    release.set()
+    slow.close()
+    assert slow.queue_depth() == fast.queue_depth() == 0
@@ -0,0 +1,61 @@
+import pytest
+
+from crawler.async_core import AsyncWebCrawler
+from crawler.core import WebCrawler
+from crawler.politeness import PolitenessScheduler, parse_retry_after
+
+
+def test_caps_concurrent_connections_per_host():
+    scheduler = PolitenessScheduler(default_delay=0, max_connections=2)
+
+    assert scheduler.reserve("a.com") == 0
+    assert scheduler.reserve("a.com") == 0
+    assert scheduler.reserve("a.com") > 0
+    assert scheduler.reserve("b.com") == 0  # Outros hosts não são afetados
+
+    scheduler.release("a.com", 200, 0.1)
+    assert scheduler.reserve("a.com") == 0
+
+
+def test_backs_off_on_429_and_recovers_when_healthy():
+    scheduler = PolitenessScheduler(default_delay=0, max_connections=4)
+
+    scheduler.reserve("a.com")
+    scheduler.release("a.com", 429, 0.1, retry_after="5")
+    assert scheduler.get_delay("a.com") == 5
+    assert scheduler.reserve("a.com") > 4
+    assert scheduler.reserve("b.com") == 0
+
+    for _ in range(10):
+        scheduler.release("a.com", 200, 0.1)
+    assert scheduler.get_delay("a.com") == 0
+
+
+def test_robots_crawl_delay_is_the_floor():
+    scheduler = PolitenessScheduler(default_delay=0, max_connections=4)
+    scheduler.configure_host("a.com", crawl_delay=2)
+
+    scheduler.release("a.com", 200, 0.1)
+    assert scheduler.get_delay("a.com") == 2
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after(None) == 0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+
+
+@pytest.mark.parametrize("crawler_cls", [WebCrawler, AsyncWebCrawler])
+def test_host_slot_is_released_when_the_stored_version_cannot_be_read(crawler_cls):
+    politeness = PolitenessScheduler()
+    crawler = crawler_cls("http://localhost:8081/page2.html", 0, politeness=politeness,
+                          configuracoes={'parse_processes': 0, 'sitemaps': False})
+
+    def broken_storage(url):
+        raise RuntimeError("database is locked")
+    crawler.get_previous_version = broken_storage
+
+    crawler.crawl()
+
+    assert crawler.processed_urls == []
+    assert politeness.hosts['localhost:8081'].active == 0
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+
+import pytest
+
+from crawler.async_core import AsyncWebCrawler
+from crawler.robots import RobotsRules, RobotsCache, fetch_robots_txt
+
+ROBOTS_TXT = """
+User-agent: other-bot
+Disallow: /
+
+User-agent: *
+Disallow: /private
+Allow: /private/public
+Disallow: /*.pdf$
+Disallow: /search?
+Crawl-delay: 2
+Sitemap: http://example.com/sitemap.xml
+"""
+
+
+@pytest.mark.parametrize("url, allowed", [
+    ("http://example.com/", True),
+    ("http://example.com/private/data", False),
+    ("http://example.com/private/public/page", True),
+    ("http://example.com/docs/file.pdf", False),
+    ("http://example.com/docs/file.pdf.html", True),
+    ("http://example.com/search?q=1", False),
+    ("http://example.com/robots.txt", True),
+])
+def test_rules_use_longest_match(url, allowed):
+    assert RobotsRules.parse(ROBOTS_TXT).can_fetch(url) is allowed
+
+
+def test_rules_expose_delay_and_sitemaps():
+    rules = RobotsRules.parse(ROBOTS_TXT)
+
+    assert rules.delay() == 2
+    assert rules.sitemaps == ["http://example.com/sitemap.xml"]
+    assert RobotsRules.parse("User-agent: *\nRequest-rate: 1/5").delay() == 5
+
+
+def test_error_responses():
+    cache = RobotsCache(fetcher=lambda url: (503, ''))
+    assert not cache.can_fetch("http://down.com/page")
+    cache = RobotsCache(fetcher=lambda url: (404, ''))
+    assert cache.can_fetch("http://missing.com/page")
+
+
+def test_cache_hits_and_lru_eviction():
+    fetched = []
+
+    def fetcher(url):
+        fetched.append(url)
+        return 200, "User-agent: *\nDisallow: /private"
+
+    cache = RobotsCache(max_size=2, fetcher=fetcher)
+    cache.get("http://a.com/1")
+    cache.get("http://a.com/2")
+    cache.get("http://b.com/")
+    cache.get("http://a.com/3")
+    cache.get("http://c.com/")  # Despeja b.com, o menos usado
+
+    assert fetched == ["http://a.com/robots.txt", "http://b.com/robots.txt", "http://c.com/robots.txt"]
+    assert cache.stats() == {'hits': 2, 'misses': 3, 'evictions': 1, 'size': 2}
+    cache.get("http://b.com/")
+    assert cache.stats()['misses'] == 4
+
+
+def test_cache_is_keyed_by_scheme_and_host():
+    fetched = []
+    cache = RobotsCache(fetcher=lambda url: fetched.append(url) or (404, ''))
+    cache.get("http://a.com/")
+    cache.get("https://a.com/")
+    cache.get("http://a.com:8080/")
+
+    assert len(fetched) == 3
+
+
+def test_concurrent_misses_fetch_once():
+    fetched = []
+    release = threading.Event()
+
+    def fetcher(url):
+        fetched.append(url)
+        release.wait(1)
+        return 404, ''
+
+    cache = RobotsCache(fetcher=fetcher)
+    threads = [threading.Thread(target=cache.get, args=("http://a.com/",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert fetched == ["http://a.com/robots.txt"]
+
+
+def test_async_crawl_fetches_robots_off_the_event_loop():
+    on_loop = []
+
+    def fetcher(url):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(url)
+        except RuntimeError:
+            pass
+        return fetch_robots_txt(url)
+
+    cache = RobotsCache(fetcher=fetcher)
+    crawler = AsyncWebCrawler("http://localhost:8081/page1.html", 1, allowed_file_types=['.html', ''],
+                              configuracoes={'parse_processes': 0, 'sitemaps': False})
+    crawler.robots = cache  # Cache vazio: a entrada do host "vence" antes dos links da semente
+
+    crawler.crawl()
+
+    assert cache.stats()['misses'] == 1
+    assert on_loop == []
+    assert "http://localhost:8081/blocked.html" not in crawler.processed_urls
@@ -0,0 +1,170 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import select
+
+import app.scheduler
+
+from app.scheduler import CrawlScheduler, knowledge_bases
+from app.state import status_snapshot
+from models.history import History
+
+BASE_URL = "http://localhost:8081"
+CONFIGURACOES = {'parse_processes': 0}
+
+
+@pytest.fixture
+def scheduler():
+    return CrawlScheduler(worker_budget=4, max_active=2)
+
+
+@pytest.fixture
+def kb_names():
+    names = []
+    yield names
+    for nome in names:
+        knowledge_bases.pop(nome, None)
+
+
+def register(kb_names, nome, urls, profundidade=1):
+    kb_names.append(nome)
+    knowledge_bases[nome] = {'urls': urls, 'profundidade': profundidade, 'agendamento': None,
+                             'configuracoes': CONFIGURACOES, 'status': 'na fila'}
+
+
+def test_knowledge_bases_share_the_worker_budget(scheduler, kb_names):
+    register(kb_names, 'sched-a', [BASE_URL])
+    register(kb_names, 'sched-b', [BASE_URL + "/page7.html"])
+    register(kb_names, 'sched-c', [BASE_URL + "/page2.html"])
+
+    jobs = [scheduler.submit(nome, knowledge_bases[nome]['urls'], 1, CONFIGURACOES) for nome in kb_names]
+    for job in jobs:
+        assert job.done.wait(30)
+
+    assert len(scheduler.threads) == 4
+    assert scheduler.jobs == {}
+    assert status_snapshot('sched-a')['paginas_extraidas'] == 3
+    assert status_snapshot('sched-b')['paginas_extraidas'] == 2
+    assert all(knowledge_bases[nome]['status'] == 'concluído' for nome in kb_names)
+
+
+def test_seeds_of_one_base_are_crawled_together(scheduler, kb_names):
+    register(kb_names, 'sched-seeds', [BASE_URL + "/page7.html", BASE_URL + "/page2.html"], profundidade=0)
+
+    job = scheduler.submit('sched-seeds', knowledge_bases['sched-seeds']['urls'], 0, CONFIGURACOES)
+
+    assert job.done.wait(30)
+    assert status_snapshot('sched-seeds')['paginas_extraidas'] == 2
+
+
+def test_pause_resume_and_cancel(scheduler, kb_names):
+    register(kb_names, 'sched-paused', [BASE_URL])
+    register(kb_names, 'sched-cancelled', [BASE_URL])
+
+    job = scheduler.submit('sched-paused', [BASE_URL], 1, CONFIGURACOES, paused=True)
+    assert scheduler.snapshot()['sched-paused']['status'] == 'pausado'
+    assert not job.done.wait(0.3)
+
+    assert scheduler.resume('sched-paused')
+    assert job.done.wait(30)
+    assert knowledge_bases['sched-paused']['status'] == 'concluído'
+
+    cancelled = scheduler.submit('sched-cancelled', [BASE_URL], 1, CONFIGURACOES, paused=True)
+    assert scheduler.cancel('sched-cancelled')
+    assert cancelled.done.is_set()
+    assert knowledge_bases['sched-cancelled']['status'] == 'cancelado'
+    assert not scheduler.resume('sched-cancelled')
+
+
+def wait_for_status(scheduler, nome, status, timeout=10):
+    deadline = time.monotonic() + timeout
+    while scheduler.snapshot()[nome]['status'] != status:
+        assert time.monotonic() < deadline, scheduler.snapshot()[nome]
+        time.sleep(0.02)
+
+
+def test_urls_added_while_pausing_are_kept_for_the_resume(scheduler, kb_names):
+    seed, added = BASE_URL + "/slowpage.html", BASE_URL + "/page2.html"
+    register(kb_names, 'sched-pausing', [seed], profundidade=0)
+    job = scheduler.submit('sched-pausing', [seed], 0, CONFIGURACOES)
+    wait_for_status(scheduler, 'sched-pausing', 'em andamento')
+
+    with scheduler.condition:  # A URL chega antes de o crawl parar
+        assert scheduler.pause('sched-pausing')
+        assert scheduler.add_urls('sched-pausing', [added])
+        assert job.state == 'pausando'
+    wait_for_status(scheduler, 'sched-pausing', 'pausado')
+    assert job.urls == [seed, added]
+
+    assert scheduler.resume('sched-pausing')
+    assert job.done.wait(30)
+    assert knowledge_bases['sched-pausing']['status'] == 'concluído'
+    assert status_snapshot('sched-pausing')['paginas_extraidas'] == 2  # A semente, antes da pausa, e a URL nova
+
+
+def test_urls_are_seeded_outside_the_scheduler_lock(scheduler, kb_names, monkeypatch):
+    seed, added = BASE_URL + "/slowpage.html", BASE_URL + "/page2.html"
+    register(kb_names, 'sched-seeding', [seed], profundidade=0)
+    job = scheduler.submit('sched-seeding', [seed], 0, CONFIGURACOES)
+    wait_for_status(scheduler, 'sched-seeding', 'em andamento')
+    fetching, release = threading.Event(), threading.Event()
+    robots_get = job.crawler.robots.get
+
+    def slow_robots(url):
+        if url == added:  # robots.txt de um host novo, lento para responder
+            fetching.set()
+            release.wait(10)
+        return robots_get(url)
+    monkeypatch.setattr(job.crawler.robots, 'get', slow_robots)
+
+    adding = threading.Thread(target=scheduler.add_urls, args=('sched-seeding', [added]))
+    adding.start()
+    assert fetching.wait(5)
+    assert scheduler.condition.acquire(timeout=1)  # Pausa, retomada e /status não esperam o robots.txt
+    scheduler.condition.release()
+    release.set()
+    adding.join(10)
+
+    assert job.done.wait(30)
+    assert status_snapshot('sched-seeding')['paginas_extraidas'] == 2
+
+
+def test_history_row_has_the_whole_crawl_and_the_estimated_area(scheduler, kb_names, isolated_stores, monkeypatch):
+    def slow_estimate(url, profundidade):
+        while 'sched-history' in scheduler.snapshot():  # A estimativa só termina depois do crawl
+            time.sleep(0.05)
+        return 'news', 2.0
+    monkeypatch.setattr(app.scheduler, 'fetch_and_estimate', slow_estimate)
+    seed, added = BASE_URL + "/slowpage.html", BASE_URL + "/page2.html"
+    register(kb_names, 'sched-history', [seed], profundidade=0)
+    job = scheduler.submit('sched-history', [seed], 0, CONFIGURACOES)
+    wait_for_status(scheduler, 'sched-history', 'em andamento')
+    assert scheduler.pause('sched-history')
+    assert scheduler.add_urls('sched-history', [added])
+    wait_for_status(scheduler, 'sched-history', 'pausado')
+    assert scheduler.resume('sched-history')
+    assert job.done.wait(30)
+
+    deadline = time.monotonic() + 10
+    with isolated_stores.connect() as conn:
+        while not (rows := conn.execute(select(History.url, History.paginas_extraidas, History.area_atuacao)).all()):
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+    assert rows == [(seed, 2, 'news')]
+
+
+def test_async_crawl_is_charged_its_concurrency(scheduler, kb_names):
+    configuracoes = dict(CONFIGURACOES, engine='async', max_concurrency=200)
+    register(kb_names, 'sched-async', [BASE_URL + "/slowpage.html"], profundidade=0)
+    job = scheduler.submit('sched-async', [BASE_URL + "/slowpage.html"], 0, configuracoes)
+
+    deadline = time.monotonic() + 10
+    while scheduler.snapshot()['sched-async']['workers'] < 4:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    assert job.crawler.max_concurrency == 4  # Limitada ao orçamento livre
+    assert scheduler.utilization() == {(): 1.0}
+
+    assert job.done.wait(30)
+    assert scheduler.utilization() == {(): 0.0}
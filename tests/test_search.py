@@ -0,0 +1,67 @@
+from crawler.search import SearchIndex
+from crawler.storage import PageWriter
+from crawler.core import WebCrawler
+
+
+def test_search_ranks_filters_by_base_and_paginates(tmp_path):
+    index = SearchIndex(str(tmp_path / 'search.db'))
+    index.add_documents('noticias', [
+        ("http://a/1", "Eleições municipais: resultado da apuração em São Paulo"),
+        ("http://a/2", "Previsão do tempo para o fim de semana"),
+        ("http://a/3", "Eleições, eleições e mais eleições: o calendário eleitoral"),
+    ])
+    index.add_documents('esportes', [("http://b/1", "Eleições no clube de futebol")])
+
+    results = index.search("eleicoes")  # remove_diacritics: casa com "Eleições"
+    assert results['total'] == 3
+    assert results['resultados'][0]['url'] == "http://a/3"
+    assert '<b>Eleições</b>' in results['resultados'][0]['trecho']
+
+    assert [r['url'] for r in index.search("eleições", base='esportes')['resultados']] == ["http://b/1"]
+    second_page = index.search("eleições", base='noticias', page=2, per_page=1)
+    assert second_page['total'] == 2
+    assert second_page['resultados'][0]['url'] == "http://a/1"
+
+
+def test_reindexing_replaces_text_and_queries_are_not_fts_syntax(tmp_path):
+    index = SearchIndex(str(tmp_path / 'search.db'))
+    index.add_documents('kb', [("http://a/1", "texto antigo")])
+    index.add_documents('kb', [("http://a/1", "texto novo")])
+
+    assert index.count('kb') == 1
+    assert index.search("antigo")['total'] == 0
+    assert index.search('novo" OR "x')['total'] == 0
+    assert index.search('NEAR( texto AND')['total'] == 0
+    assert index.search("   ")['total'] == 0
+
+
+def test_snippet_escapes_the_page_text(tmp_path):
+    index = SearchIndex(str(tmp_path / 'search.db'))
+    index.add_documents('kb', [("http://a/1", "Promoção <script>alert(1)</script> & \x02ofertas\x03 da semana")])
+
+    [result] = index.search("promoção")['resultados']
+
+    assert result['trecho'] == "<b>Promoção</b> &lt;script&gt;alert(1)&lt;/script&gt; &amp; ofertas da semana"
+
+
+def test_page_writer_indexes_text_in_batches(tmp_path):
+    index = SearchIndex(str(tmp_path / 'search.db'))
+    writer = PageWriter(None, batch_size=10, search_index=index, base='kb').start()
+    for i in range(25):
+        writer.put_text(f"http://a/{i}", f"documento número {i}")
+    writer.close()
+
+    assert writer.pages_indexed == 25
+    assert writer.pages_written == 0
+    assert index.search("documento", base='kb')['total'] == 25
+
+
+def test_crawl_of_a_knowledge_base_fills_the_index(tmp_path):
+    crawler = WebCrawler(base_url="http://localhost:8081", depth=1, max_workers=2, nome='search-kb',
+                         configuracoes={'parse_processes': 0})
+    crawler.writer.search_index = SearchIndex(str(tmp_path / 'search.db'))
+
+    crawler.crawl()
+
+    assert crawler.writer.pages_indexed == crawler.get_total_links_extracted() == 3
+    assert crawler.writer.search_index.count('search-kb') == 3
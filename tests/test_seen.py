@@ -0,0 +1,31 @@
+import pytest
+
+from crawler.seen import UrlSet, FingerprintSet, ScalableBloomFilter, create_seen_urls
+
+
+@pytest.mark.parametrize("seen", [UrlSet(), FingerprintSet(capacity=16), ScalableBloomFilter(initial_capacity=100)])
+def test_seen_urls_have_no_false_negatives(seen):
+    urls = [f"http://site/{i}" for i in range(1000)]
+    for url in urls:
+        seen.add(url)
+        seen.add(url)
+
+    assert all(url in seen for url in urls)
+    assert len(seen) <= 1000
+    assert len(seen) >= 990  # O Bloom filter pode contar um falso positivo como já visto
+
+
+def test_bloom_filter_false_positive_rate_stays_bounded():
+    seen = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01)
+    for i in range(5000):
+        seen.add(f"http://site/{i}")
+
+    false_positives = sum(f"http://other/{i}" in seen for i in range(10000))
+    assert false_positives / 10000 < 0.01
+
+
+def test_create_seen_urls_from_configuracoes():
+    assert isinstance(create_seen_urls(), UrlSet)
+    assert isinstance(create_seen_urls({'seen_backend': 'bloom', 'bloom_error_rate': 0.01}), ScalableBloomFilter)
+    with pytest.raises(ValueError):
+        create_seen_urls({'seen_backend': 'unknown'})
@@ -0,0 +1,97 @@
+import gzip
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.synthetic_site import SiteSpec, make_server
+from crawler.core import WebCrawler
+from crawler.metrics import HOST_REQUESTS
+from crawler.politeness import PolitenessScheduler
+from crawler.sitemaps import SitemapParser, parse_lastmod
+from tests.test_storage import make_storage
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <!-- comentario -->
+  <url><loc> http://a/1 </loc><lastmod>2024-03-01T10:00:00+02:00</lastmod></url>
+  <url><loc>http://a/2</loc></url>
+  <url><loc>http://a/3</loc><lastmod>2024-05</lastmod></url>
+</urlset>"""
+
+
+def feed_in_chunks(parser, data, size=7):
+    entries = []
+    for i in range(0, len(data), size):
+        entries.extend(parser.feed(data[i:i + size]))
+    return entries + parser.close()
+
+
+def test_parser_streams_plain_and_gzipped_sitemaps():
+    for data in (URLSET, gzip.compress(URLSET)):
+        entries = feed_in_chunks(SitemapParser(), data)
+
+        assert [(kind, entry.url, entry.lastmod) for kind, entry in entries] == [
+            ('url', 'http://a/1', datetime(2024, 3, 1, 8, 0)),
+            ('url', 'http://a/2', None),
+            ('url', 'http://a/3', datetime(2024, 5, 1)),
+        ]
+
+    index = b'<sitemapindex><sitemap><loc>http://a/s1.xml.gz</loc></sitemap></sitemapindex>'
+    assert [(kind, entry.url) for kind, entry in feed_in_chunks(SitemapParser(), index)] == [('sitemap', 'http://a/s1.xml.gz')]
+    assert parse_lastmod('2024') == datetime(2024, 1, 1)
+    assert parse_lastmod('ontem') is None
+
+
+def test_crawl_reaches_sitemap_pages_past_the_depth_limit_and_skips_them_on_recrawl(tmp_path):
+    spec = SiteSpec(pages=120, fan_out=3, page_size=1500, disallowed_fraction=0.1, sitemap=True, sitemap_size=50)
+    server = make_server(spec)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    storage = make_storage(tmp_path)
+    public = sum(1 for page in range(120) if server.RequestHandlerClass.site.robots_allows(page) or page == 0)
+
+    def crawl():
+        crawler = WebCrawler(base_url, depth=1, max_workers=4, configuracoes={'parse_processes': 0, 'search_index': False})
+        crawler.storage = crawler.writer.storage = storage
+        crawler.crawl()
+        return crawler
+
+    try:
+        first = crawl()
+        assert first.get_total_links_extracted() == public  # Sem os sitemaps, a profundidade 1 chega a 4 páginas
+        # Os 3 filhos da raiz podem chegar antes pelos links
+        assert public - 4 <= first.get_sitemap_report()['urls_enfileiradas'] <= public - 1
+
+        # Os lastmod (2024) são anteriores às cópias armazenadas: só a raiz e os links dela são baixados de novo
+        second = crawl()
+        report = second.get_sitemap_report()
+        assert second.get_total_links_extracted() <= 4
+        assert report['urls_enfileiradas'] == 0
+        assert report['urls_inalteradas'] == public - second.get_total_links_extracted()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_sitemap_fetches_wait_for_the_host_backoff_and_are_counted():
+    server = make_server(SiteSpec(pages=10, sitemap=True, sitemap_size=5))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"127.0.0.1:{server.server_address[1]}"
+    politeness = PolitenessScheduler(default_delay=0)
+    politeness.reserve(host)
+    politeness.release(host, 503, 0.1, retry_after="1")  # Um 503 de uma página do mesmo host
+    crawler = WebCrawler(f"http://{host}", depth=1, politeness=politeness, configuracoes={'parse_processes': 0})
+    before = HOST_REQUESTS.value(host, '2xx')
+
+    try:
+        start = time.monotonic()
+        entries = list(crawler.fetch_sitemap(f"http://{host}/sitemap_index.xml"))
+
+        assert time.monotonic() - start >= 0.9
+        assert [(kind, entry.url) for kind, entry in entries] == [
+            ('sitemap', f"http://{host}/sitemaps/0.xml.gz"), ('sitemap', f"http://{host}/sitemaps/1.xml.gz")]
+        assert HOST_REQUESTS.value(host, '2xx') == before + 1
+        assert politeness.hosts[host].active == 0  # A vaga foi devolvida
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,27 @@
+from app.state import update_status, status_snapshot
+
+
+def test_progress_is_tracked_per_knowledge_base():
+    update_status(status='em andamento', depth=2, current_url="http://a.com/", nome='kb-a')
+    update_status(status='em andamento', depth=1, current_url="http://b.com/", nome='kb-b')
+    update_status(pages_extracted=5, nome='kb-a')
+    update_status(total_pages=40.0, area='news', nome='kb-a')
+
+    assert status_snapshot('kb-a') == {
+        'status': 'em andamento',
+        'paginas_extraidas': 5,
+        'paginas_totais': 40.0,
+        'area_atuacao': 'news',
+        'url_atual': "http://a.com/",
+        'profundidade': 2,
+    }
+    assert status_snapshot('kb-b')['paginas_extraidas'] == 0
+    assert status_snapshot('missing') is None
+
+
+def test_snapshot_is_a_copy():
+    update_status(pages_extracted=1, nome='kb-c')
+    snapshot = status_snapshot()
+    snapshot['kb-c']['paginas_extraidas'] = 99
+
+    assert status_snapshot('kb-c')['paginas_extraidas'] == 1
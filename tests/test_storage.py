@@ -0,0 +1,143 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models.database import Base
+from models.page import Page
+from crawler.blobs import BlobStore
+from crawler.storage import Storage, PageWriter
+from crawler.core import WebCrawler
+from crawler.frontier import PersistentFrontier
+
+
+def make_storage(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'storage.db'}")
+    Base.metadata.create_all(bind=engine)
+    return Storage(sessionmaker(bind=engine)(), BlobStore(str(tmp_path / 'blobs')))
+
+
+def test_page_writer_flushes_in_batches_and_rewrites_only_changed_pages(tmp_path):
+    storage = make_storage(tmp_path)
+    storage.save_page("http://a/0", "same")
+    storage.save_page("http://a/1", "old")
+    unchanged_fetched_at = storage.get_page_by_url("http://a/0").fetched_at
+
+    flushed = []
+    writer = PageWriter(storage, batch_size=3, buffer_size=2, on_flush=flushed.extend).start()
+    writer.put("http://a/0", "same", etag='"v2"')
+    writer.put_validators("http://a/0", etag='"v3"', last_modified="Wed, 01 Jan 2025 00:00:00 GMT")
+    for i in range(1, 10):
+        writer.put(f"http://a/{i}", "new", etag='"v2"')
+    writer.close()
+    storage.db.expire_all()
+
+    assert writer.pages_written == 10
+    assert sorted(flushed) == sorted(["http://a/0"] * 2 + [f"http://a/{i}" for i in range(1, 10)])
+    assert storage.db.query(Page).count() == 10
+    assert storage.get_content("http://a/1") == "new"
+    assert storage.get_page_by_url("http://a/1").content is None
+    assert len(list(storage.blobs.hashes())) == 3  # "same", "old" e "new", cada corpo gravado uma vez
+    # O corpo igual não é regravado, mas os validadores e o fetched_at da página inalterada são
+    unchanged = storage.get_page_by_url("http://a/0")
+    assert unchanged.fetched_at > unchanged_fetched_at
+    assert (unchanged.etag, unchanged.last_modified) == ('"v3"', "Wed, 01 Jan 2025 00:00:00 GMT")
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    # 200 com ETag na primeira visita, 500 nas seguintes
+    visits = 0
+
+    def do_GET(self):
+        if self.path != '/page':
+            self.send_error(404)
+            return
+        FlakyHandler.visits += 1
+        if FlakyHandler.visits > 1:
+            self.send_error(500)
+            return
+        body = b"<html><body>stored</body></html>"
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('ETag', '"e1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_failed_recrawl_keeps_the_stored_page(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/page"
+    storage = make_storage(tmp_path)
+    try:
+        for _ in range(2):
+            crawler = WebCrawler(base_url=url, depth=0, configuracoes={'parse_processes': 0})
+            crawler.storage = crawler.writer.storage = storage
+            crawler.crawl()
+            storage.db.expire_all()
+    finally:
+        server.shutdown()
+
+    assert FlakyHandler.visits == 2
+    page = storage.get_page_by_url(url)
+    assert (page.etag, page.content_hash is not None) == ('"e1"', True)
+    assert storage.get_content(url) == "<html><body>stored</body></html>"
+    assert storage.prune_blobs() == 0
+
+
+class ValidatorHandler(BaseHTTPRequestHandler):
+    # Mesmo corpo sempre: sem ETag na primeira visita, "e2" depois, e 304 para quem manda "e2"
+    visits = []
+
+    def do_GET(self):
+        if self.path != '/page':
+            self.send_error(404)
+            return
+        ValidatorHandler.visits.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"e2"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = b"<html><body>same</body></html>"
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        if len(ValidatorHandler.visits) > 1:
+            self.send_header('ETag', '"e2"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_unchanged_recrawl_refreshes_validators_and_marks_the_page_visited(tmp_path):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ValidatorHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/page"
+    storage = make_storage(tmp_path)
+    state = str(tmp_path / "crawl_state.db")
+    unchanged = []
+    try:
+        for run in range(3):
+            frontier = PersistentFrontier(f"run-{run}", max_depth=0, path=state)
+            crawler = WebCrawler(base_url=url, depth=0, frontier=frontier, configuracoes={'parse_processes': 0})
+            crawler.storage = crawler.writer.storage = storage
+            crawler.crawl()
+            frontier.close()
+            unchanged.append(crawler.get_pages_unchanged())
+            storage.db.expire_all()
+    finally:
+        server.shutdown()
+
+    # O hash igual da segunda visita grava o ETag novo, e a terceira já recebe 304
+    assert ValidatorHandler.visits == [None, None, '"e2"']
+    assert unchanged == [0, 1, 1]
+    assert storage.get_page_by_url(url).etag == '"e2"'
+    # Página inalterada também sai da fronteira: retomar o crawl não a baixa de novo
+    assert all(len(PersistentFrontier(f"run-{run}", max_depth=0, path=state)) == 0 for run in range(3))
@@ -0,0 +1,50 @@
+import threading
+
+import requests
+from sqlalchemy import text
+
+from benchmarks.bench_crawl import run_benchmark
+from benchmarks.synthetic_site import SiteSpec, SyntheticSite, make_server
+
+
+def test_site_serves_a_deterministic_tree_with_errors_and_robots():
+    spec = SiteSpec(pages=50, fan_out=4, page_size=2000, errors={503: 0.2}, disallowed_fraction=0.2, seed=7)
+    site = SyntheticSite(spec)
+    server = make_server(spec)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        robots = requests.get(f"{base}/robots.txt")
+        assert 'Disallow: /private/' in robots.text
+
+        root = requests.get(base)
+        assert root.status_code == 200
+        assert root.text == site.render(0)
+        for child in site.children(0):
+            assert f'href="{site.path(child)}"' in root.text
+
+        errors = [page for page in range(1, 50) if site.error_status(page)]
+        private = [page for page in range(1, 50) if site.is_private(page)]
+        assert errors and private
+        assert requests.get(base + site.path(errors[0])).status_code == 503
+        assert requests.get(f"{base}/p/{private[0]}").status_code == 404
+        assert requests.get(f"{base}/p/50").status_code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_benchmark_crawls_the_reachable_site(isolated_stores, tmp_path):
+    spec = SiteSpec(pages=60, fan_out=5, page_size=3000, errors={500: 0.1}, disallowed_fraction=0.1)
+
+    results = run_benchmark(spec, workers=4)
+
+    # O benchmark grava só no diretório temporário dele, nunca no storage.db e no ./blobs padrão
+    with isolated_stores.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM pages")).scalar() == 0
+    assert not (tmp_path / 'blobs').exists()
+
+    assert results['pages_fetched'] == results['pages_expected'] == SyntheticSite(spec).expected_fetches(3)
+    assert results['pages_written'] == results['pages_fetched']  # Os fetches com erro também ficam registrados
+    assert 0 < results['fetch_p50_ms'] <= results['fetch_p99_ms']
+    assert results['pages_per_second'] > 0 and results['peak_rss_mb'] > 0